@@ -0,0 +1,121 @@
+import subprocess
+import sys
+import threading
+import time
+
+
+class _DesktopInput:
+    """
+    Lazy access to pyautogui and keyboard
+    They are only imported when the first key is sent, so backends can be
+    created (and this module imported) on headless machines
+    """
+
+    def __init__(self):
+        self._pyautogui = None
+        self._keyboard = None
+
+    @property
+    def pyautogui(self):
+        if self._pyautogui is None:
+            import pyautogui
+            self._pyautogui = pyautogui
+        return self._pyautogui
+
+    @property
+    def keyboard(self):
+        if self._keyboard is None:
+            import keyboard
+            self._keyboard = keyboard
+        return self._keyboard
+
+
+class WindowsBackend(_DesktopInput):
+    """Sends real key presses with pyautogui/keyboard and locks through the Windows API"""
+
+    def press(self, key, presses=1):
+        self.pyautogui.press(key, presses=presses)
+
+    def write(self, text):
+        # Using keyboard.write instead of pyautogui.write
+        self.keyboard.write(text)
+
+    def lock_workstation(self):
+        import ctypes
+
+        ctypes.windll.user32.LockWorkStation()
+
+
+class LinuxBackend(_DesktopInput):
+    """Key presses through pyautogui (X11) and screen locking through loginctl"""
+
+    def press(self, key, presses=1):
+        self.pyautogui.press(key, presses=presses)
+
+    def write(self, text):
+        # keyboard needs root on Linux, pyautogui does not
+        self.pyautogui.write(text)
+
+    def lock_workstation(self):
+        subprocess.run(["loginctl", "lock-session"], check=True)
+
+
+class NoopBackend:
+    """Ignores every action, for machines with no desktop session"""
+
+    def press(self, key, presses=1):
+        pass
+
+    def write(self, text):
+        pass
+
+    def lock_workstation(self):
+        pass
+
+
+class RecordingBackend:
+    """Records every action instead of performing it, for tests and headless machines"""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def _record(self, action, *args):
+        with self.lock:
+            self.events.append((time.perf_counter(), action) + args)
+
+    def press(self, key, presses=1):
+        self._record('press', key, presses)
+
+    def write(self, text):
+        self._record('write', text)
+
+    def lock_workstation(self):
+        self._record('lock')
+
+    def actions(self):
+        """Recorded events without their timestamps"""
+        with self.lock:
+            return [event[1:] for event in self.events]
+
+
+BACKENDS = {
+    'windows': WindowsBackend,
+    'linux': LinuxBackend,
+    'noop': NoopBackend,
+    'recording': RecordingBackend,
+}
+
+
+def get_backend(name=None):
+    """Create a backend by name, or pick one for the current platform"""
+    if name is None:
+        if sys.platform.startswith('win'):
+            name = 'windows'
+        elif sys.platform.startswith('linux'):
+            name = 'linux'
+        else:
+            name = 'noop'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown action backend {name!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+
+import metrics
+
+
+class ActionExecutor:
+    """
+    Runs gesture actions on a background thread so the frame loop never blocks
+
+    Jobs go through a bounded queue; when it is full new jobs are dropped.
+    Per-action cooldowns are enforced on the executor thread, so a job that
+    arrives inside its action's cooldown is skipped rather than executed.
+    Cooldowns are measured from when a job starts, or from when it was
+    submitted according to clock if one is given. With synchronous=True
+    submit runs each job on the calling thread instead and never drops one,
+    which keeps replays deterministic.
+    """
+
+    def __init__(self, max_queue=8, cooldowns=None, clock=None, synchronous=False):
+        self.jobs = queue.Queue(maxsize=max_queue)
+        self.synchronous = synchronous
+        self.cooldowns = dict(cooldowns or {})
+        self.clock = clock
+        self.last_run = {}
+
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.executed = 0
+        self.dropped = 0
+        self.cooldown_skipped = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+        self.thread = None
+        if not synchronous:
+            self.thread = threading.Thread(target=self._run, name='action-executor', daemon=True)
+            self.thread.start()
+
+    def set_cooldown(self, name, seconds):
+        self.cooldowns[name] = seconds
+
+    def submit(self, name, func, *args):
+        """Queue func(*args) under the action name; returns False if the queue was full"""
+        event_time = self.clock() if self.clock is not None else None
+        job = (name, func, args, time.perf_counter(), event_time)
+        if self.synchronous:
+            with self.lock:
+                self.queued += 1
+            self._execute(job)
+            return True
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            metrics.counter('action_dropped_total', 'Actions dropped on a full queue', {'action': name}).inc()
+            return False
+        with self.lock:
+            self.queued += 1
+        return True
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            self._execute(job)
+
+    def _execute(self, job):
+        name, func, args, submitted_at, event_time = job
+
+        started = time.perf_counter()
+        now = started if event_time is None else event_time
+        cooldown = self.cooldowns.get(name, 0.0)
+        if cooldown and now - self.last_run.get(name, float('-inf')) < cooldown:
+            with self.lock:
+                self.cooldown_skipped += 1
+            metrics.counter('action_cooldown_skipped_total', 'Actions skipped inside their cooldown',
+                            {'action': name}).inc()
+            return
+        self.last_run[name] = now
+
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"Error running action {name}: {e}")
+            with self.lock:
+                self.errors += 1
+            metrics.counter('action_errors_total', 'Actions that raised', {'action': name}).inc()
+            return
+
+        finished = time.perf_counter()
+        metrics.histogram('action_run_seconds', 'Time spent running an action', {'action': name}).observe(
+            finished - started)
+        latency = started - submitted_at
+        metrics.histogram('action_queue_seconds', 'Time an action waited in the queue').observe(latency)
+        with self.lock:
+            self.executed += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def stats(self):
+        """Queued, executed, dropped and cooldown-skipped counts plus queue latency"""
+        with self.lock:
+            return {
+                'queued': self.queued,
+                'executed': self.executed,
+                'dropped': self.dropped,
+                'cooldown_skipped': self.cooldown_skipped,
+                'errors': self.errors,
+                'pending': self.jobs.qsize(),
+                'avg_latency_ms': self.latency_total / self.executed * 1000 if self.executed else 0.0,
+                'max_latency_ms': self.latency_max * 1000,
+            }
+
+    def close(self, timeout=2.0):
+        """Run the jobs already queued, then stop the executor thread"""
+        if self.thread is None:
+            return
+        self.jobs.put(None)
+        self.thread.join(timeout=timeout)
@@ -0,0 +1,120 @@
+import metrics
+
+# Operating points, from best quality to cheapest
+HAND_SCALES = (1.0, 0.75, 0.5)
+YOLO_SIZES = (608, 416, 320)
+
+
+class AdaptiveController:
+    """
+    Keeps a stage's latency inside a budget by walking a ladder of operating points
+
+    levels runs from the most expensive setting to the cheapest. Each update
+    feeds one measured latency into an exponential moving average. The
+    controller steps to a cheaper level once the average has been above
+    budget * upper for down_patience updates in a row, and back to a more
+    expensive one only after up_patience updates below budget * lower. The gap
+    between the two thresholds, the longer patience going up and a cooldown
+    after every change keep it from oscillating between neighbouring levels.
+
+    apply(value) is called on every change; the current value and the number
+    of changes are exported as metrics under the controller's name.
+    """
+
+    def __init__(self, name, levels, budget, apply=None, start=0, smoothing=0.2, upper=1.0, lower=0.6,
+                 down_patience=5, up_patience=30, cooldown=15):
+        if not levels:
+            raise ValueError("levels must not be empty")
+        if not 0 < lower < upper:
+            raise ValueError(f"need 0 < lower < upper, got lower={lower}, upper={upper}")
+        self.name = name
+        self.levels = tuple(levels)
+        self.budget = budget
+        self.apply = apply
+        self.smoothing = smoothing
+        self.upper = upper
+        self.lower = lower
+        self.down_patience = down_patience
+        self.up_patience = up_patience
+        self.cooldown = cooldown
+
+        self.index = min(max(start, 0), len(self.levels) - 1)
+        self.average = None
+        self.over = 0
+        self.under = 0
+        self.hold = 0
+        self.changes = 0
+
+        self.level_gauge = metrics.gauge('adaptive_operating_point', 'Current operating point of each adaptive knob',
+                                         {'knob': name})
+        self.budget_gauge = metrics.gauge('adaptive_budget_seconds', 'Latency budget of each adaptive knob',
+                                          {'knob': name})
+        self.average_gauge = metrics.gauge('adaptive_latency_seconds', 'Smoothed latency seen by each adaptive knob',
+                                           {'knob': name})
+        self.level_gauge.set(self.value)
+        self.budget_gauge.set(budget)
+        if apply is not None:
+            apply(self.value)
+
+    @property
+    def value(self):
+        return self.levels[self.index]
+
+    def _step(self, direction):
+        self.index += direction
+        self.changes += 1
+        self.over = self.under = 0
+        # Measurements from the old operating point no longer apply
+        self.average = None
+        self.hold = self.cooldown
+        self.level_gauge.set(self.value)
+        metrics.counter('adaptive_changes_total', 'Operating point changes per adaptive knob',
+                        {'knob': self.name, 'direction': 'down' if direction > 0 else 'up'}).inc()
+        if self.apply is not None:
+            self.apply(self.value)
+
+    def update(self, latency):
+        """Record one latency in seconds and return the (possibly new) operating point"""
+        if self.average is None:
+            self.average = latency
+        else:
+            self.average += self.smoothing * (latency - self.average)
+        self.average_gauge.set(self.average)
+
+        if self.hold:
+            self.hold -= 1
+            return self.value
+
+        if self.average > self.budget * self.upper:
+            self.over += 1
+            self.under = 0
+        elif self.average < self.budget * self.lower:
+            self.under += 1
+            self.over = 0
+        else:
+            self.over = self.under = 0
+
+        if self.over >= self.down_patience and self.index < len(self.levels) - 1:
+            self._step(1)
+        elif self.under >= self.up_patience and self.index > 0:
+            self._step(-1)
+        return self.value
+
+    def stats(self):
+        return {'value': self.value, 'average_ms': (self.average or 0.0) * 1000,
+                'budget_ms': self.budget * 1000, 'changes': self.changes}
+
+
+def hand_scale_controller(tracker, budget, **kwargs):
+    """Controller for the MediaPipe input downscale of a HandTracker, fed with find_hands latency"""
+    def apply(scale):
+        tracker.input_scale = scale
+    return AdaptiveController('hand_input_scale', HAND_SCALES, budget, apply, **kwargs)
+
+
+def yolo_size_controller(detector, budget, **kwargs):
+    """Controller for the YOLO blob size of an AsyncObjectDetector, fed with process_frame latency"""
+    def apply(size):
+        detector.input_size = size
+    kwargs.setdefault('start', YOLO_SIZES.index(416))
+    return AdaptiveController('yolo_input_size', YOLO_SIZES, budget, apply, **kwargs)
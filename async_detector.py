@@ -0,0 +1,208 @@
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import metrics
+from object_scanner import process_frame
+
+PROPAGATION_MODES = ('flow', 'velocity', 'none')
+
+
+def box_iou(box_a, box_b):
+    """IoU of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = inter_w * inter_h
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class AsyncObjectDetector:
+    """
+    Runs YOLO on a background worker at its own cadence
+
+    submit() is called for every frame and hands a copy to the worker when a
+    detection is due (every_n_frames frames and at least min_interval seconds
+    since the last run) and the worker is idle. Between detector runs the last
+    detections are carried forward to the current frame:
+        flow     - shift each box by the median Lucas-Kanade flow of points inside it
+        velocity - extrapolate each box with the velocity measured between the last two runs
+        none     - keep the boxes where they were detected
+    """
+
+    def __init__(self, net, classes, every_n_frames=5, min_interval=0.0, confidence_threshold=0.5,
+                 nms_threshold=0.4, class_aware_nms=False, propagation='flow', flow_scale=0.5, input_size=416):
+        if propagation not in PROPAGATION_MODES:
+            raise ValueError(f"propagation must be one of {PROPAGATION_MODES}, got {propagation!r}")
+
+        self.net = net
+        self.classes = classes
+        self.every_n_frames = max(1, every_n_frames)
+        self.min_interval = min_interval
+        self.confidence_threshold = confidence_threshold
+        self.nms_threshold = nms_threshold
+        self.class_aware_nms = class_aware_nms
+        self.propagation = propagation
+        self.flow_scale = flow_scale
+        self.input_size = input_size
+        # Optional AdaptiveController fed with each run's latency (see adaptive.py)
+        self.size_controller = None
+
+        self.frame_index = 0
+        self.last_submit_index = None
+        self.last_submit_time = 0.0
+        self.busy = False
+        self.runs = 0
+        self.errors = 0
+        self.error_counter = metrics.counter('object_detector_errors_total', 'Detector runs that raised')
+
+        # Current (propagated) detections, kept boxes only
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.confidences = []
+        self.class_ids = []
+        self.velocities = np.zeros((0, 2), dtype=np.float32)
+        self.detected_at = 0.0
+
+        self.prev_gray = None
+        self.pending = None
+        self.lock = threading.Lock()
+        self.jobs = queue.Queue(maxsize=1)
+        self.stop_event = threading.Event()
+        self.worker = threading.Thread(target=self._worker_loop, name='object-detector', daemon=True)
+        self.worker.start()
+
+    def _worker_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                frame, gray, submitted_at = self.jobs.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            started = time.perf_counter()
+            pending = None
+            try:
+                boxes, confidences, class_ids, indices = process_frame(
+                    frame, self.net, self.classes, self.confidence_threshold,
+                    self.nms_threshold, self.class_aware_nms, self.input_size)
+                if self.size_controller is not None:
+                    self.size_controller.update(time.perf_counter() - started)
+                keep = np.asarray(indices, dtype=np.int64).flatten()
+                pending = (
+                    np.asarray([boxes[i] for i in keep], dtype=np.float32).reshape(-1, 4),
+                    [confidences[i] for i in keep],
+                    [class_ids[i] for i in keep],
+                    gray,
+                    submitted_at,
+                )
+            except Exception as e:
+                # Keep the previous detections; the next due frame tries again
+                print(f"Error running object detection: {e}")
+                with self.lock:
+                    self.errors += 1
+                self.error_counter.inc()
+            finally:
+                # busy must always be cleared or _due() never schedules another run
+                with self.lock:
+                    if pending is not None:
+                        self.pending = pending
+                        self.runs += 1
+                    self.busy = False
+
+    def _due(self, now):
+        if self.busy:
+            return False
+        if self.last_submit_index is None:
+            return True
+        return (self.frame_index - self.last_submit_index >= self.every_n_frames
+                and now - self.last_submit_time >= self.min_interval)
+
+    def _to_gray(self, frame):
+        small = cv2.resize(frame, None, fx=self.flow_scale, fy=self.flow_scale, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _flow_shift(self, boxes, prev_gray, gray):
+        """Median optical-flow displacement of a 3x3 grid of points inside each box"""
+        if len(boxes) == 0 or prev_gray is None or prev_gray.shape != gray.shape:
+            return boxes
+        grid = np.array([0.25, 0.5, 0.75], dtype=np.float32)
+        gx, gy = np.meshgrid(grid, grid)
+        offsets = np.stack([gx.ravel(), gy.ravel()], axis=1)
+        points = boxes[:, None, :2] + offsets[None] * boxes[:, None, 2:]
+        points = (points * self.flow_scale).reshape(-1, 1, 2).astype(np.float32)
+
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None,
+                                                    winSize=(15, 15), maxLevel=2)
+        shift = (moved - points).reshape(len(boxes), -1, 2) / self.flow_scale
+        valid = status.reshape(len(boxes), -1).astype(bool)
+
+        shifted = boxes.copy()
+        for i in range(len(boxes)):
+            if valid[i].any():
+                shifted[i, :2] += np.median(shift[i][valid[i]], axis=0)
+        return shifted
+
+    def _estimate_velocities(self, new_boxes, new_class_ids, elapsed):
+        """Match new boxes to the previous ones by class and IoU to estimate their velocity"""
+        velocities = np.zeros((len(new_boxes), 2), dtype=np.float32)
+        if elapsed <= 0:
+            return velocities
+        for i, (box, class_id) in enumerate(zip(new_boxes, new_class_ids)):
+            best_iou, best = 0.3, None
+            for j, (old_box, old_class_id) in enumerate(zip(self.boxes, self.class_ids)):
+                if old_class_id == class_id:
+                    iou = box_iou(box, old_box)
+                    if iou > best_iou:
+                        best_iou, best = iou, j
+            if best is not None:
+                velocities[i] = (box[:2] - self.boxes[best][:2]) / elapsed
+        return velocities
+
+    def submit(self, frame):
+        """Register a new frame, start a detector run when one is due, and propagate the boxes"""
+        now = time.time()
+        gray = self._to_gray(frame) if self.propagation == 'flow' else None
+
+        with self.lock:
+            pending, self.pending = self.pending, None
+        if pending is not None:
+            boxes, confidences, class_ids, detection_gray, submitted_at = pending
+            if self.propagation == 'flow':
+                # Catch the boxes up from the frame they were detected on
+                boxes = self._flow_shift(boxes, detection_gray, gray)
+            elif self.propagation == 'velocity':
+                self.velocities = self._estimate_velocities(boxes, class_ids, submitted_at - self.detected_at)
+            self.boxes, self.confidences, self.class_ids = boxes, confidences, class_ids
+            self.detected_at = submitted_at
+        elif self.propagation == 'flow':
+            self.boxes = self._flow_shift(self.boxes, self.prev_gray, gray)
+
+        with self.lock:
+            due = self._due(now)
+            if due:
+                # Mark busy before queueing so a fast worker cannot finish first
+                self.busy = True
+        if due:
+            self.jobs.put_nowait((frame.copy(), gray, now))
+            self.last_submit_index = self.frame_index
+            self.last_submit_time = now
+
+        self.prev_gray = gray
+        self.frame_index += 1
+
+    def get_detections(self):
+        """Current detections in the (boxes, confidences, class_ids, indices) form draw_detections expects"""
+        boxes = self.boxes
+        if self.propagation == 'velocity' and len(boxes):
+            boxes = boxes.copy()
+            boxes[:, :2] += self.velocities * (time.time() - self.detected_at)
+        boxes = np.rint(boxes).astype(int).tolist()
+        indices = np.arange(len(boxes), dtype=np.int32)
+        return boxes, list(self.confidences), list(self.class_ids), indices
+
+    def close(self):
+        self.stop_event.set()
+        self.worker.join(timeout=1.0)
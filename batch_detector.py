@@ -0,0 +1,170 @@
+"""
+Batched YOLO detection for offline videos and multi-camera hosts
+
+BatchedDetector groups frames from any number of callers into batches of up
+to batch_size and runs one forward pass per batch; a batch is sent early when
+its oldest frame has waited max_wait seconds. Larger batches raise throughput,
+a shorter max_wait lowers latency.
+
+    python batch_detector.py session.mp4 -o session_objects.npz --batch-size 8 --model yolov3-tiny
+"""
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+from object_scanner import BlobBuffer, load_model, process_frames
+
+
+class BatchedDetector:
+    """
+    Collects frames on a queue and detects them in batches on a worker thread
+    submit() returns a Future resolving to that frame's (boxes, confidences, class_ids, indices)
+    """
+
+    def __init__(self, net, classes, batch_size=4, max_wait=0.02, confidence_threshold=0.5, nms_threshold=0.4,
+                 class_aware_nms=False, input_size=416, max_queue=64):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        self.net = net
+        self.classes = classes
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.confidence_threshold = confidence_threshold
+        self.nms_threshold = nms_threshold
+        self.class_aware_nms = class_aware_nms
+        self.input_size = input_size
+        self.blob_buffer = BlobBuffer(batch_size, input_size)
+
+        self.jobs = queue.Queue(maxsize=max_queue)
+        self.batches = 0
+        self.frames = 0
+        self.stop_event = threading.Event()
+        self.worker = threading.Thread(target=self._worker_loop, name='batched-detector', daemon=True)
+        self.worker.start()
+
+    def submit(self, frame):
+        """Queue a frame, blocking while max_queue frames are waiting"""
+        future = Future()
+        self.jobs.put((frame, future))
+        return future
+
+    def _collect(self):
+        """Wait for a first frame, then gather more until the batch is full or max_wait has passed"""
+        try:
+            batch = [self.jobs.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.jobs.get(timeout=remaining) if remaining > 0 else self.jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker_loop(self):
+        while not (self.stop_event.is_set() and self.jobs.empty()):
+            batch = self._collect()
+            if not batch:
+                continue
+            frames = [frame for frame, _ in batch]
+            try:
+                results = process_frames(frames, self.net, self.classes, self.confidence_threshold,
+                                         self.nms_threshold, self.class_aware_nms, self.input_size,
+                                         self.blob_buffer)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.frames += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        return {'batches': self.batches, 'frames': self.frames,
+                'avg_batch': self.frames / self.batches if self.batches else 0.0}
+
+    def close(self, timeout=5.0):
+        """Finish the frames already queued, then stop the worker"""
+        self.stop_event.set()
+        self.worker.join(timeout=timeout)
+
+
+def detect_video(path, detector, max_pending=None):
+    """
+    Detect every frame of a video through a BatchedDetector
+    Returns (frame_index, boxes (n, 4) xywh, confidences, class_ids) arrays for the kept detections
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video {path}")
+    max_pending = max_pending or detector.batch_size * 2
+    pending = []
+    frame_index, boxes, confidences, class_ids = [], [], [], []
+
+    def collect(index, future):
+        frame_boxes, frame_confidences, frame_class_ids, indices = future.result()
+        for i in np.asarray(indices, dtype=np.int64).flatten():
+            frame_index.append(index)
+            boxes.append(frame_boxes[i])
+            confidences.append(frame_confidences[i])
+            class_ids.append(frame_class_ids[i])
+
+    index = 0
+    try:
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            pending.append((index, detector.submit(frame)))
+            index += 1
+            # Keep a few batches in flight, collecting results in frame order
+            while len(pending) > max_pending:
+                collect(*pending.pop(0))
+        for item in pending:
+            collect(*item)
+    finally:
+        cap.release()
+
+    return (np.asarray(frame_index, dtype=np.int64), np.asarray(boxes, dtype=np.int32).reshape(-1, 4),
+            np.asarray(confidences, dtype=np.float32), np.asarray(class_ids, dtype=np.int32))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Batched YOLO object detection over video files")
+    parser.add_argument("videos", nargs="+", help="Video files to process")
+    parser.add_argument("-o", "--output", help="Output .npz (single video only, default: <video>_objects.npz)")
+    parser.add_argument("--model", default="yolov3", help="Registered model name (see model_registry.py)")
+    parser.add_argument("--batch-size", type=int, default=4, help="Frames per forward pass")
+    parser.add_argument("--max-wait", type=float, default=0.02,
+                        help="Seconds a partial batch waits for more frames before running")
+    parser.add_argument("--confidence", type=float, default=0.5, help="Confidence threshold")
+    parser.add_argument("--offline", action="store_true", help="Never download model files")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from model_registry import MODELS
+
+    args = parse_args()
+    if args.output and len(args.videos) > 1:
+        raise SystemExit("--output can only be used with a single video")
+
+    net, classes = load_model(args.model, offline=True if args.offline else None)
+    detector = BatchedDetector(net, classes, args.batch_size, args.max_wait, args.confidence,
+                               input_size=MODELS[args.model].input_size)
+    for video in args.videos:
+        start = time.perf_counter()
+        frame_index, boxes, confidences, class_ids = detect_video(video, detector)
+        output = args.output or f"{video.rsplit('.', 1)[0]}_objects.npz"
+        np.savez(output, frame_index=frame_index, boxes=boxes, confidences=confidences, class_ids=class_ids)
+        print(f"{video}: {len(boxes)} detections in {time.perf_counter() - start:.1f} s -> {output}")
+    detector.close()
+    print(f"Batches: {detector.stats()}")
@@ -0,0 +1,219 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+# One tracker per worker process, created lazily for each mode
+_trackers = {}
+_max_hands = 2
+
+
+def _init_worker(max_hands):
+    global _max_hands
+    _max_hands = max_hands
+    # The pool already uses every core, so keep OpenCV from spawning its own threads
+    cv2.setNumThreads(1)
+
+
+def _get_tracker(static):
+    """Return this worker's tracker, static mode for images and tracking mode for video"""
+    from hand_tracker import HandTracker
+
+    tracker = _trackers.get(static)
+    if tracker is None:
+        tracker = HandTracker(mode=static, max_hands=_max_hands)
+        _trackers[static] = tracker
+    return tracker
+
+
+def _video_frames(path, start, stop):
+    cap = cv2.VideoCapture(path)
+    try:
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        index = start
+        while stop is None or index < stop:
+            success, frame = cap.read()
+            if not success:
+                break
+            yield index, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def _image_frames(paths, start):
+    for offset, path in enumerate(paths):
+        frame = cv2.imread(path)
+        if frame is None:
+            print(f"Skipping unreadable image: {path}")
+            continue
+        yield start + offset, 0.0, frame
+
+
+def _process_task(task):
+    """Run hand tracking over one chunk of frames and write it to a .npz file"""
+    kind, source, start, stop, chunk_path = task
+    static = kind == 'images'
+    tracker = _get_tracker(static)
+
+    # Every chunk starts a fresh tracking session
+    if hasattr(tracker.hands, 'reset'):
+        tracker.hands.reset()
+
+    if static:
+        frames = _image_frames(source, start)
+    else:
+        frames = _video_frames(source, start, stop)
+
+    frame_indices = []
+    timestamps = []
+    frame_sizes = []
+    hand_counts = []
+    landmarks = []
+    boxes = []
+    handedness = []
+    gestures = []
+
+    started = time.perf_counter()
+    for index, timestamp, frame in frames:
+        _, hand_landmarks, pixels, hand_boxes, hand_handedness, _ = tracker.find_hands_array(frame, draw=False)
+
+        count = len(pixels)
+        # Sub-pixel coordinates, as the live path classifies on
+        points = tracker.point_buffer[:count]
+        frame_landmarks = np.zeros((_max_hands, 21, 3), dtype=np.float32)
+        frame_boxes = np.zeros((_max_hands, 4), dtype=np.int32)
+        frame_handedness = np.full(_max_hands, -1, dtype=np.int8)
+        frame_gestures = np.zeros(_max_hands, dtype=np.int8)
+
+        frame_landmarks[:count, :, :2] = points
+        frame_landmarks[:count, :, 2] = hand_landmarks[:, :, 2]
+        frame_boxes[:count] = hand_boxes
+        frame_handedness[:count] = hand_handedness
+        if count:
+            finger_states = tracker.get_finger_states_batch(points)
+            frame_gestures[:count] = tracker.get_hand_gestures_batch(finger_states, points, as_ids=True)
+
+        frame_indices.append(index)
+        timestamps.append(timestamp)
+        # Landmarks are in pixels of this frame; divide by its size for normalized coordinates
+        frame_sizes.append((frame.shape[1], frame.shape[0]))
+        hand_counts.append(count)
+        landmarks.append(frame_landmarks)
+        boxes.append(frame_boxes)
+        handedness.append(frame_handedness)
+        gestures.append(frame_gestures)
+
+    n_frames = len(frame_indices)
+    np.savez_compressed(
+        chunk_path,
+        frame_index=np.asarray(frame_indices, dtype=np.int64),
+        timestamp=np.asarray(timestamps, dtype=np.float64),
+        frame_size=np.asarray(frame_sizes, dtype=np.int32).reshape(n_frames, 2),
+        hand_count=np.asarray(hand_counts, dtype=np.int8),
+        landmarks=np.asarray(landmarks, dtype=np.float32).reshape(n_frames, _max_hands, 21, 3),
+        boxes=np.asarray(boxes, dtype=np.int32).reshape(n_frames, _max_hands, 4),
+        handedness=np.asarray(handedness, dtype=np.int8).reshape(n_frames, _max_hands),
+        gesture=np.asarray(gestures, dtype=np.int8).reshape(n_frames, _max_hands),
+    )
+    return chunk_path, n_frames, time.perf_counter() - started
+
+
+def build_tasks(sources, output_dir, chunk_size=300):
+    """
+    Split video files and image directories into chunks of at most chunk_size frames
+    Each task is (kind, source, start, stop, chunk_path); chunk files are prefixed with the
+    source's position in sources, so sources with the same name never share a chunk file
+    """
+    tasks = []
+    for source_index, source in enumerate(sources):
+        stem = os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+        prefix = os.path.join(output_dir, f"{source_index:03d}_{stem}")
+
+        if os.path.isdir(source):
+            images = sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            for chunk, start in enumerate(range(0, len(images), chunk_size)):
+                chunk_path = f"{prefix}_chunk{chunk:05d}.npz"
+                tasks.append(('images', images[start:start + chunk_size], start, None, chunk_path))
+            continue
+
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            print(f"Error: Could not open video {source}")
+            continue
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        if frame_count <= 0:
+            # Unknown length, process the whole stream as one chunk
+            tasks.append(('video', source, 0, None, f"{prefix}_chunk00000.npz"))
+            continue
+
+        for chunk, start in enumerate(range(0, frame_count, chunk_size)):
+            chunk_path = f"{prefix}_chunk{chunk:05d}.npz"
+            tasks.append(('video', source, start, min(start + chunk_size, frame_count), chunk_path))
+    return tasks
+
+
+def process_sources(sources, output_dir, workers=None, chunk_size=300, max_hands=2):
+    """
+    Run hand tracking and gesture recognition over video files and image directories
+    Work is split into chunks across a process pool; each chunk is written to its own .npz file
+    Returns the list of chunk paths in source order
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = build_tasks(sources, output_dir, chunk_size)
+    if not tasks:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    total_frames = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(max_hands,)) as executor:
+        futures = [executor.submit(_process_task, task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            chunk_path, n_frames, elapsed = future.result()
+            total_frames += n_frames
+            print(f"[{done}/{len(tasks)}] {chunk_path}: {n_frames} frames in {elapsed:.1f}s")
+
+    elapsed = time.perf_counter() - started
+    fps = total_frames / elapsed if elapsed > 0 else 0.0
+    print(f"Processed {total_frames} frames in {elapsed:.1f}s ({fps:.1f} fps, {workers} workers)")
+    return [task[4] for task in tasks]
+
+
+def load_results(chunk_paths):
+    """Concatenate chunk files back into a single dict of arrays"""
+    columns = {}
+    for path in chunk_paths:
+        with np.load(path) as chunk:
+            for name in chunk.files:
+                columns.setdefault(name, []).append(chunk[name])
+    return {name: np.concatenate(parts) for name, parts in columns.items()}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline hand tracking over video files and image directories")
+    parser.add_argument("sources", nargs="+", help="Video files or directories of images")
+    parser.add_argument("-o", "--output", default="batch_output", help="Directory for the .npz chunk files")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=300, help="Frames per chunk")
+    parser.add_argument("--max-hands", type=int, default=2, help="Maximum number of hands per frame")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    process_sources(args.sources, args.output, args.workers, args.chunk_size, args.max_hands)
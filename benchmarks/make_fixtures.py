@@ -0,0 +1,153 @@
+"""
+Generate the synthetic fixtures used by the benchmark suite
+
+    python benchmarks/make_fixtures.py
+
+The fixtures are checked in so benchmark runs are reproducible; rerun this
+script only when the fixture format changes.
+"""
+import os
+
+import cv2
+import numpy as np
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LANDMARK_FIXTURE = os.path.join(FIXTURE_DIR, "landmarks.npz")
+CLIP_FIXTURE = os.path.join(FIXTURE_DIR, "clip.avi")
+HANDS_CLIP_FIXTURE = os.path.join(FIXTURE_DIR, "hands_clip.avi")
+HANDS_TRACK_FIXTURE = os.path.join(FIXTURE_DIR, "hands_clip.npz")
+
+# Landmarks are stored in pixels of a 640x480 reference frame
+REFERENCE_SIZE = (640, 480)
+
+# Hand layout in "hand units" with the wrist at the origin and fingers pointing up (-y)
+_WRIST = np.array([0.0, 0.0])
+_THUMB_CMC = np.array([-0.2, -0.25])
+_THUMB_MCP = np.array([-0.4, -0.45])
+_FINGER_MCPS = np.array([[-0.25, -0.9], [-0.08, -0.95], [0.08, -0.9], [0.23, -0.8]])
+_SEGMENTS = np.array([0.4, 0.25, 0.22])
+
+
+def synthesize_hand(states, rng, center, scale, angle):
+    """
+    Build 21 pixel landmarks for a hand whose fingers follow the given states
+    states is (thumb, index, middle, ring, pinky); angle is the in-plane rotation in degrees
+    """
+    points = np.zeros((21, 2))
+    points[0] = _WRIST
+    points[1] = _THUMB_CMC
+    points[2] = _THUMB_MCP
+
+    if states[0]:
+        direction = np.array([-0.6, -0.8])
+        points[3] = points[2] + 0.3 * direction
+        points[4] = points[3] + 0.25 * direction
+    else:
+        # Thumb folded across the palm
+        points[3] = points[2] + np.array([0.2, -0.05])
+        points[4] = points[3] + np.array([0.2, 0.1])
+
+    for finger, up in enumerate(states[1:]):
+        mcp_index = 5 + finger * 4
+        points[mcp_index] = _FINGER_MCPS[finger]
+        if up:
+            spread = (finger - 1.5) * 0.03
+            for segment in range(3):
+                step = np.array([spread, -_SEGMENTS[segment]])
+                points[mcp_index + segment + 1] = points[mcp_index + segment] + step
+        else:
+            # Curl the finger back towards the palm
+            points[mcp_index + 1] = points[mcp_index] + np.array([0.0, -0.3])
+            points[mcp_index + 2] = points[mcp_index + 1] + np.array([0.02, 0.2])
+            points[mcp_index + 3] = points[mcp_index + 2] + np.array([0.0, 0.15])
+
+    theta = np.radians(angle)
+    rotation = np.array([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+    points = points @ rotation.T * scale + center
+    points += rng.normal(0.0, 1.0, points.shape)
+    return points
+
+
+def make_landmark_fixture(n_hands=512, seed=0):
+    """Random finger combinations at random positions, sizes and small rotations"""
+    rng = np.random.default_rng(seed)
+    width, height = REFERENCE_SIZE
+    states = rng.random((n_hands, 5)) < 0.5
+    hands = np.empty((n_hands, 21, 2), dtype=np.float32)
+    for i in range(n_hands):
+        scale = rng.uniform(80, 140)
+        center = np.array([rng.uniform(0.3, 0.7) * width, rng.uniform(0.7, 0.9) * height])
+        hands[i] = synthesize_hand(states[i], rng, center, scale, rng.uniform(-10, 10))
+    return hands, states
+
+
+def make_clip(path, size=(320, 240), n_frames=30):
+    """Short clip of skin-coloured blobs moving across a gradient background"""
+    width, height = size
+    gradient = np.linspace(20, 90, width, dtype=np.float32)[None, :, None]
+    background = np.broadcast_to(gradient, (height, width, 3)).astype(np.uint8)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, size)
+    for i in range(n_frames):
+        frame = background.copy()
+        x = int(width * (0.2 + 0.6 * i / n_frames))
+        cv2.ellipse(frame, (x, height // 2), (30, 45), 0, 0, 360, (140, 170, 220), -1)
+        cv2.ellipse(frame, (width - x, height // 2 + 20), (30, 45), 0, 0, 360, (120, 150, 200), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def draw_hand(frame, points, colour):
+    """Render 21 landmarks as a filled palm with finger segments a fifth of the palm wide"""
+    palm = np.linalg.norm(points[9] - points[0])
+    thickness = max(2, int(palm * 0.22))
+    outline = points[[0, 1, 2, 5, 9, 13, 17]].astype(np.int32)
+    cv2.fillConvexPoly(frame, cv2.convexHull(outline), colour, cv2.LINE_AA)
+    for base in (1, 5, 9, 13, 17):
+        chain = points[[0 if base == 1 else base] + list(range(base, base + 4))]
+        for a, b in zip(chain[:-1], chain[1:]):
+            cv2.line(frame, tuple(int(v) for v in a), tuple(int(v) for v in b), colour, thickness, cv2.LINE_AA)
+    for tip in (4, 8, 12, 16, 20):
+        cv2.circle(frame, tuple(int(v) for v in points[tip]), thickness // 2, colour, -1, cv2.LINE_AA)
+
+
+def make_hands_clip(video_path, track_path, size=(640, 480), n_frames=60):
+    """
+    Clip of two rendered hands drifting slowly over a gradient background,
+    with the landmarks of every frame, so ROI tracking has hands to follow
+    """
+    width, height = size
+    gradient = np.linspace(30, 110, width, dtype=np.float32)[None, :, None]
+    background = np.broadcast_to(gradient, (height, width, 3)).astype(np.uint8)
+
+    poses = [(True, True, True, True, True), (False, True, True, False, False)]
+    colours = [(120, 160, 215), (105, 145, 200)]
+    tracks = np.zeros((n_frames, len(poses), 21, 2), dtype=np.float32)
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 30, size)
+    for i in range(n_frames):
+        t = i / n_frames
+        frame = background.copy()
+        # Hands at arm's length in front of the body, close enough for one crop to cover both
+        centers = [(width * (0.4 + 0.05 * t), height * (0.75 - 0.03 * np.sin(2 * np.pi * t))),
+                   (width * (0.6 - 0.05 * t), height * (0.72 + 0.03 * np.sin(2 * np.pi * t)))]
+        for hand, (states, colour, center) in enumerate(zip(poses, colours, centers)):
+            points = synthesize_hand(states, np.random.default_rng(i * 2 + hand), np.array(center), 60,
+                                     -10 + 20 * hand)
+            tracks[i, hand] = points
+            draw_hand(frame, points, colour)
+        writer.write(frame)
+    writer.release()
+    np.savez_compressed(track_path, hands=tracks, size=np.array(size))
+
+
+def main():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    hands, states = make_landmark_fixture()
+    np.savez_compressed(LANDMARK_FIXTURE, hands=hands, states=states,
+                        reference_size=np.array(REFERENCE_SIZE))
+    make_clip(CLIP_FIXTURE)
+    make_hands_clip(HANDS_CLIP_FIXTURE, HANDS_TRACK_FIXTURE)
+    print(f"Wrote {LANDMARK_FIXTURE}, {CLIP_FIXTURE}, {HANDS_CLIP_FIXTURE} and {HANDS_TRACK_FIXTURE}")
+
+
+if __name__ == "__main__":
+    main()
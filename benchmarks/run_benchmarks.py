@@ -0,0 +1,602 @@
+"""
+Benchmark harness for the hand and object pipelines
+
+Runs every stage on the checked-in synthetic fixtures (no webcam, no GUI) and
+reports p50/p95/p99 latency and throughput per stage, resolution and hand count.
+
+    python benchmarks/run_benchmarks.py                   # run and compare with the baseline
+    python benchmarks/run_benchmarks.py --update-baseline # store the current numbers
+    python benchmarks/run_benchmarks.py --stages get_finger_state draw_detections
+
+Exits with status 1 when a stage's p50 latency regresses past the stored baseline.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from make_fixtures import (LANDMARK_FIXTURE, CLIP_FIXTURE, HANDS_CLIP_FIXTURE, HANDS_TRACK_FIXTURE,  # noqa: E402
+                           REFERENCE_SIZE)
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESOLUTIONS = [(320, 240), (640, 480), (1280, 720), (1920, 1080)]
+HAND_COUNTS = [1, 2]
+
+# Registered stages: name -> function yielding (case, callable, items_per_call)
+STAGES = {}
+
+
+class SkipStage(Exception):
+    """Raised by a stage whose dependencies (model files, MediaPipe, display) are unavailable"""
+
+
+def stage(name):
+    def register(func):
+        STAGES[name] = func
+        return func
+    return register
+
+
+def load_landmarks():
+    fixture = np.load(LANDMARK_FIXTURE)
+    return fixture["hands"], fixture["states"]
+
+
+def load_clip_frames(path=CLIP_FIXTURE):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        success, frame = cap.read()
+        if not success:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise SkipStage(f"could not read {CLIP_FIXTURE}")
+    return frames
+
+
+def load_hands_clip():
+    """Frames of the rendered-hands clip and the (n_frames, 2, 21, 2) landmarks drawn in each"""
+    fixture = np.load(HANDS_TRACK_FIXTURE)
+    return load_clip_frames(HANDS_CLIP_FIXTURE), fixture["hands"], tuple(fixture["size"].tolist())
+
+
+def scale_hands(hands, resolution):
+    """Scale reference-frame landmarks to integer pixels at another resolution"""
+    ref_width, ref_height = REFERENCE_SIZE
+    width, height = resolution
+    factor = height / ref_height
+    offset = (width - ref_width * factor) / 2
+    scaled = hands * factor
+    scaled[..., 0] += offset
+    return scaled.astype(np.int64)
+
+
+def landmark_tracker():
+    """HandTracker for the landmark-only stages, which never build the MediaPipe graph"""
+    from hand_tracker import HandTracker
+
+    return HandTracker()
+
+
+def percentile_summary(latencies, items_per_call):
+    latencies_ms = np.asarray(latencies) * 1000
+    total = float(np.sum(latencies))
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "throughput": len(latencies) * items_per_call / total if total > 0 else 0.0,
+    }
+
+
+def measure(func, iterations, warmup, time_budget):
+    """Call func repeatedly and return per-call latencies in seconds"""
+    for _ in range(warmup):
+        func()
+    latencies = []
+    deadline = time.perf_counter() + time_budget
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+        if start > deadline and len(latencies) >= 20:
+            break
+    return latencies
+
+
+@stage("find_hands")
+def bench_find_hands():
+    from hand_tracker import HandTracker
+
+    try:
+        HandTracker().warm_up()
+    except Exception as e:
+        raise SkipStage(f"MediaPipe unavailable: {e}")
+    # Two rendered hands, so roi=True actually runs on crops after the first full-frame pass
+    frames, _, _ = load_hands_clip()
+    for resolution in RESOLUTIONS:
+        resized = [cv2.resize(frame, resolution) for frame in frames]
+        for roi_mode in (False, True):
+            tracker = HandTracker(roi_mode=roi_mode)
+            state = {"i": 0}
+
+            def run(resized=resized, tracker=tracker, state=state):
+                frame = resized[state["i"] % len(resized)].copy()
+                state["i"] += 1
+                tracker.find_hands(frame, draw=False)
+
+            yield f"{resolution[0]}x{resolution[1]},roi={roi_mode}", run, 1
+            if roi_mode:
+                passes = tracker.roi_passes + tracker.full_passes
+                print(f"    {tracker.roi_passes} of {passes} passes ran on a crop")
+
+
+@stage("roi_input")
+def bench_roi_input():
+    """
+    The input-side work ROI mode saves: cropping and converting the image
+    MediaPipe is given. Crops follow the fixture's hands through _roi_region,
+    so this runs without the MediaPipe models.
+    """
+    from hand_tracker import HandTracker
+
+    frames, tracks, size = load_hands_clip()
+    for resolution in RESOLUTIONS:
+        resized = [cv2.resize(frame, resolution) for frame in frames]
+        points = tracks * (np.array(resolution) / np.array(size))
+        # Padded hand boxes as find_hands_array computes them
+        boxes = np.concatenate([points.min(axis=2) - 20, points.max(axis=2) + 20], axis=2).astype(np.int32)
+        height, width = resized[0].shape[:2]
+        full_frame = (0, 0, width, height)
+        tracker = HandTracker(roi_mode=True)
+        regions = []
+        for frame_boxes in boxes:
+            tracker.roi = tracker._roi_region(frame_boxes, resized[0].shape)
+            regions.append(tracker.roi)
+        area = np.mean([(x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regions]) / (width * height)
+        print(f"    {width}x{height}: crops cover {area:.0%} of the frame on average")
+
+        for roi_mode in (False, True):
+            state = {"i": 0}
+
+            def run(resized=resized, regions=regions, roi_mode=roi_mode, state=state):
+                i = state["i"] % len(resized)
+                state["i"] += 1
+                tracker.prepare_region(resized[i], regions[i] if roi_mode else full_frame)
+
+            yield f"{width}x{height},roi={roi_mode}", run, 1
+
+
+@stage("get_finger_state")
+def bench_get_finger_state():
+    tracker = landmark_tracker()
+    hands, _ = load_landmarks()
+    for resolution in RESOLUTIONS:
+        scaled = scale_hands(hands, resolution).tolist()
+        for count in HAND_COUNTS:
+            state = {"i": 0}
+
+            def run(scaled=scaled, count=count, state=state):
+                start = state["i"]
+                for hand in scaled[start:start + count]:
+                    tracker.get_finger_state(hand)
+                state["i"] = (start + count) % (len(scaled) - count)
+
+            yield f"{resolution[0]}x{resolution[1]},hands={count}", run, count
+
+
+@stage("finger_states_batch")
+def bench_finger_states_batch():
+    from hand_tracker import finger_states_batch
+
+    hands, _ = load_landmarks()
+    scaled = scale_hands(hands, (640, 480))
+    for batch in (2, 64, 512):
+        yield f"batch={batch}", lambda batch=batch: finger_states_batch(scaled[:batch]), batch
+
+
+@stage("get_hand_gesture")
+def bench_get_hand_gesture():
+    tracker = landmark_tracker()
+    hands, _ = load_landmarks()
+    for resolution in RESOLUTIONS:
+        scaled = scale_hands(hands, resolution).tolist()
+        states = [tracker.get_finger_state(hand) for hand in scaled]
+        for count in HAND_COUNTS:
+            state = {"i": 0}
+
+            def run(scaled=scaled, states=states, count=count, state=state):
+                start = state["i"]
+                for i in range(start, start + count):
+                    tracker.get_hand_gesture(states[i], scaled[i])
+                state["i"] = (start + count) % (len(scaled) - count)
+
+            yield f"{resolution[0]}x{resolution[1]},hands={count}", run, count
+
+
+@stage("frame_gestures")
+def bench_frame_gestures():
+    try:
+        from main import GestureProcessor
+    except Exception as e:
+        raise SkipStage(f"main unavailable: {e}")
+    from hand_tracks import HandTrack
+
+    # The live per-frame path: every moving hand of a frame classified in one batched call
+    tracker = landmark_tracker()
+    processor = GestureProcessor(tracker, action_handler=None, collect_overlay=False)
+    hands, _ = load_landmarks()
+    for resolution in RESOLUTIONS:
+        scaled = scale_hands(hands, resolution).astype(np.float32)
+        for count in HAND_COUNTS:
+            tracks = [HandTrack(i, (0, 0, 0, 0)) for i in range(count)]
+            state = {"i": 0}
+
+            def run(scaled=scaled, tracks=tracks, count=count, state=state):
+                start = state["i"]
+                tracker.point_buffer[:count] = scaled[start:start + count]
+                processor.classify(tracks)
+                state["i"] = (start + count) % (len(scaled) - count)
+
+            yield f"{resolution[0]}x{resolution[1]},hands={count}", run, count
+
+
+@stage("classify_batch")
+def bench_classify_batch():
+    from hand_tracker import finger_states_batch
+    from gesture_classifier import GestureClassifier
+
+    classifier = GestureClassifier()
+    hands, _ = load_landmarks()
+    scaled = scale_hands(hands, (640, 480))
+    states = finger_states_batch(scaled)
+    for batch in (2, 64, 512):
+        yield (f"batch={batch}",
+               lambda batch=batch: classifier.classify_batch(states[:batch], scaled[:batch], as_ids=True), batch)
+
+
+@stage("learned_classify_batch")
+def bench_learned_classify_batch():
+    from hand_tracker import finger_states_batch
+    from gesture_classifier import GestureClassifier
+    from learned_classifier import KNNGestureClassifier, MLPGestureClassifier
+
+    hands, _ = load_landmarks()
+    scaled = scale_hands(hands, (640, 480))
+    # Trained on the rule engine's labels; only throughput is measured here
+    labels = GestureClassifier().classify_batch(finger_states_batch(scaled), scaled)
+    classifiers = {
+        "knn": KNNGestureClassifier.fit(scaled, labels),
+        "mlp": MLPGestureClassifier.fit(scaled, labels, epochs=20),
+    }
+    for kind, classifier in classifiers.items():
+        for batch in (2, 64, 512):
+            yield (f"{kind},batch={batch}",
+                   lambda classifier=classifier, batch=batch: classifier.classify_batch(None, scaled[:batch], as_ids=True),
+                   batch)
+
+
+@stage("process_frame")
+def bench_process_frame():
+    import object_scanner
+    from model_registry import ModelCacheError
+
+    try:
+        net, classes = object_scanner.load_model(offline=True)
+    except ModelCacheError as e:
+        raise SkipStage(str(e))
+    frames = load_clip_frames()
+    for resolution in RESOLUTIONS:
+        frame = cv2.resize(frames[0], resolution)
+        yield (f"{resolution[0]}x{resolution[1]}",
+               lambda frame=frame: object_scanner.process_frame(frame, net, classes), 1)
+
+
+def synthetic_yolo_outputs(seed=0, hot_fraction=0.01):
+    """YOLOv3-shaped outputs (three scales, 85 columns) with a few confident candidates"""
+    rng = np.random.default_rng(seed)
+    outputs = []
+    for rows in (507, 2028, 8112):
+        output = rng.random((rows, 85), dtype=np.float32) * 0.3
+        output[:, :4] = rng.random((rows, 4), dtype=np.float32)
+        hot = np.flatnonzero(rng.random(rows) < hot_fraction)
+        output[hot, 5 + rng.integers(0, 80, len(hot))] = rng.uniform(0.5, 1.0, len(hot))
+        outputs.append(output)
+    return outputs
+
+
+@stage("yolo_postprocess")
+def bench_yolo_postprocess():
+    import object_scanner
+
+    outputs = synthetic_yolo_outputs()
+    for resolution in RESOLUTIONS:
+        width, height = resolution
+        for class_aware in (False, True):
+            def run(width=width, height=height, class_aware=class_aware):
+                object_scanner.postprocess_detections(outputs, width, height, class_aware_nms=class_aware)
+
+            yield f"{width}x{height},class_aware={class_aware}", run, 1
+
+
+@stage("draw_detections")
+def bench_draw_detections():
+    import object_scanner
+
+    rng = np.random.default_rng(0)
+    classes = [f"class{i}" for i in range(80)]
+    frames = load_clip_frames()
+    for resolution in RESOLUTIONS:
+        width, height = resolution
+        base = cv2.resize(frames[0], resolution)
+        for n_detections in (5, 50):
+            xy = rng.integers(0, [width // 2, height // 2], (n_detections, 2))
+            wh = rng.integers(20, [width // 2, height // 2], (n_detections, 2))
+            boxes = np.hstack([xy, wh]).tolist()
+            confidences = rng.uniform(0.5, 1.0, n_detections).tolist()
+            class_ids = rng.integers(0, 80, n_detections).tolist()
+            indices = np.arange(n_detections, dtype=np.int32)
+            hand_boxes = [(50, 50, 200, 250), (300, 60, 450, 260)]
+            gestures = ["Open Hand", "Peace Sign"]
+
+            def run(base=base, boxes=boxes, confidences=confidences, class_ids=class_ids, indices=indices):
+                object_scanner.draw_detections(base.copy(), boxes, confidences, class_ids, indices,
+                                               classes, 30.0, hand_boxes, gestures)
+
+            yield f"{width}x{height},detections={n_detections}", run, 1
+
+
+@stage("render_overlay")
+def bench_render_overlay():
+    from renderer import Overlay, Renderer
+
+    hands, _ = load_landmarks()
+    frames = load_clip_frames()
+    renderer = Renderer("benchmark", static_texts=[("Press q to quit", (10, 30))])
+    for resolution in RESOLUTIONS:
+        base = cv2.resize(frames[0], resolution)
+        scaled = scale_hands(hands, resolution)
+        for count in HAND_COUNTS:
+            overlay = Overlay()
+            for hand in scaled[:count]:
+                overlay.add_hand(hand)
+                overlay.add_text("#1 Peace Sign (0.4s)", (int(hand[:, 0].min()), int(hand[:, 1].min()) - 10))
+
+            def run(base=base, overlay=overlay):
+                renderer.draw(base.copy(), overlay)
+
+            yield f"{resolution[0]}x{resolution[1]},hands={count}", run, 1
+
+
+def drain_socket(sock):
+    sock.setblocking(False)
+    try:
+        while True:
+            sock.recv(65536)
+    except BlockingIOError:
+        pass
+    finally:
+        sock.settimeout(1.0)
+
+
+@stage("landmark_stream")
+def bench_landmark_stream():
+    import socket
+    import tempfile
+    from landmark_stream import LandmarkPublisher, LandmarkSubscriber
+
+    hands, _ = load_landmarks()
+    landmarks = np.zeros((2, 21, 3), dtype=np.float32)
+    landmarks[..., :2] = hands[:2, :, :2] / REFERENCE_SIZE
+    boxes = np.zeros((2, 4), dtype=np.int32)
+    handedness = np.array([0, 1], dtype=np.int8)
+    gestures = np.array([4, 14], dtype=np.uint8)
+    scores = np.array([0.9, 0.8], dtype=np.float32)
+
+    addresses = [("udp", "udp://127.0.0.1:0")]
+    if hasattr(socket, "AF_UNIX"):
+        addresses.append(("unix", f"unix://{tempfile.gettempdir()}/hand_landmarks_bench_{os.getpid()}.sock"))
+    for transport, address in addresses:
+        subscriber = LandmarkSubscriber(address, timeout=1.0)
+        if transport == "udp":
+            address = "udp://127.0.0.1:%d" % subscriber.socket.getsockname()[1]
+        publisher = LandmarkPublisher(address)
+        for count in HAND_COUNTS:
+            def publish(publisher=publisher, count=count):
+                publisher.publish(0.0, REFERENCE_SIZE, landmarks[:count], boxes[:count],
+                                  handedness[:count], gestures[:count], scores[:count])
+
+            def round_trip(publish=publish, subscriber=subscriber):
+                publish()
+                subscriber.receive()
+
+            # Publish-only cases fill the subscriber's socket, so drain it before the round trips
+            yield f"{transport},hands={count},publish", publish, 1
+            drain_socket(subscriber.socket)
+            yield f"{transport},hands={count},round_trip", round_trip, 1
+        publisher.close()
+        subscriber.close()
+
+
+@stage("hand_object_interactions")
+def bench_hand_object_interactions():
+    from interactions import FINGER_TIPS, InteractionTracker
+
+    hands, _ = load_landmarks()
+    resolution = (1280, 720)
+    points = scale_hands(hands[:2], resolution).astype(np.float64)
+    rng = np.random.default_rng(0)
+    every_n_frames, n_frames = 5, 60
+    for count in (10, 100, 1000):
+        # Cluttered scene: many small and medium boxes anywhere in the frame
+        boxes = np.hstack([rng.uniform(0, 1, (count, 2)) * resolution, rng.uniform(20, 160, (count, 2))])
+        class_ids = rng.integers(0, 80, count)
+        indices = np.arange(count)
+
+        # What object_scanner feeds update() with the defaults (--detect-every 5, flow propagation):
+        # a new detection every 5th frame, in between the same boxes shifted by a few pixels each
+        sequence = []
+        current = boxes.copy()
+        for frame in range(n_frames):
+            if frame % every_n_frames == 0:
+                current = boxes + np.hstack([rng.normal(0, 4, (count, 2)), rng.normal(0, 2, (count, 2))])
+            else:
+                current = current + np.hstack([rng.normal(0, 2, (count, 2)), np.zeros((count, 2))])
+            sequence.append(np.rint(current))
+        tracker = InteractionTracker()
+        state = {"i": 0}
+
+        def frame(tracker=tracker, sequence=sequence, class_ids=class_ids, indices=indices, state=state):
+            boxes = sequence[state["i"] % n_frames]
+            state["i"] += 1
+            tracker.update(points, (0, 1), boxes, class_ids, indices, resolution, 0.0)
+
+        def rebuild(tracker=InteractionTracker(), boxes=boxes, class_ids=class_ids, indices=indices):
+            # Build and query on every frame, the cost without reusing the grid
+            tracker.grid.build(boxes, resolution)
+            tracker.update(points, (0, 1), boxes, class_ids, indices, resolution, 0.0)
+
+        def pairwise(boxes=boxes):
+            # Every landmark of every hand against every box, for comparison
+            flat = points.reshape(-1, 2)[:, None, :]
+            inside = ((flat >= boxes[None, :, :2]) & (flat <= boxes[None, :, :2] + boxes[None, :, 2:])).all(axis=2)
+            return inside.reshape(len(points), 21, count)[:, FINGER_TIPS].sum(axis=1)
+
+        yield f"frame,detections={count}", frame, 1
+        print(f"    grid rebuilt on {tracker.grid.builds} of {state['i']} frames")
+        yield f"rebuild,detections={count}", rebuild, 1
+        yield f"pairwise,detections={count}", pairwise, 1
+
+
+@stage("motion_gate")
+def bench_motion_gate():
+    from motion_gate import MotionGate
+
+    rng = np.random.default_rng(0)
+    for resolution in RESOLUTIONS:
+        width, height = resolution
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        # Static scene: every check compares against the reference and skips
+        gate = MotionGate(name="bench", heartbeat=float("inf"))
+        gate.should_run(frame, 0.0)
+        yield f"{width}x{height},static", lambda gate=gate, frame=frame: gate.should_run(frame, 1.0), 1
+
+        # Moving scene: alternating frames always differ, so every check counts pixels and runs
+        moved = np.roll(frame, width // 8, axis=1)
+        gate = MotionGate(name="bench", heartbeat=float("inf"))
+        state = {"i": 0}
+
+        def moving(gate=gate, frames=(frame, moved), state=state):
+            state["i"] += 1
+            return gate.should_run(frames[state["i"] % 2], 1.0)
+
+        yield f"{width}x{height},moving", moving, 1
+        print(f"    moving: {gate.runs} runs, {gate.skips} skips")
+
+
+@stage("control_volume")
+def bench_control_volume():
+    try:
+        from gesture_actions import GestureActionHandler
+        from action_backends import RecordingBackend
+    except Exception as e:
+        raise SkipStage(f"gesture_actions unavailable: {e}")
+
+    # Record key presses instead of sending them
+    handler = GestureActionHandler(backend=RecordingBackend())
+    # Pinch distance oscillating between 20 and 180 pixels
+    trace = 100 + 80 * np.sin(np.linspace(0, 20 * np.pi, 1000))
+    state = {"i": 0}
+
+    def run():
+        distance = trace[state["i"] % len(trace)]
+        state["i"] += 1
+        handler.control_volume((300 + distance, 200), (300, 200))
+
+    yield "trace", run, 1
+
+
+def run_stages(names, iterations, warmup, time_budget):
+    results = {}
+    for name in names:
+        try:
+            for case, func, items in STAGES[name]():
+                key = f"{name}[{case}]"
+                summary = percentile_summary(measure(func, iterations, warmup, time_budget), items)
+                results[key] = summary
+                print(f"{key:<50} p50 {summary['p50_ms']:8.3f} ms  p95 {summary['p95_ms']:8.3f} ms  "
+                      f"p99 {summary['p99_ms']:8.3f} ms  {summary['throughput']:10.1f} /s")
+        except SkipStage as e:
+            print(f"{name:<50} skipped: {e}")
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance, min_slack_ms):
+    """Return the list of cases whose p50 regressed past the baseline"""
+    regressions = []
+    for key, summary in results.items():
+        if key not in baseline:
+            continue
+        allowed = baseline[key]["p50_ms"] * (1 + tolerance) + min_slack_ms
+        if summary["p50_ms"] > allowed:
+            regressions.append((key, baseline[key]["p50_ms"], summary["p50_ms"]))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the hand and object pipeline stages")
+    parser.add_argument("--stages", nargs="+", choices=sorted(STAGES), default=list(STAGES),
+                        help="Stages to run (default: all)")
+    parser.add_argument("--iterations", type=int, default=300, help="Maximum timed calls per case")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed calls before measuring")
+    parser.add_argument("--time-budget", type=float, default=2.0, help="Seconds per case before stopping early")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative p50 regression")
+    parser.add_argument("--min-slack-ms", type=float, default=0.01, help="Absolute slack added to every limit")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_stages(args.stages, args.iterations, args.warmup, args.time_budget)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found, run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline, args.tolerance, args.min_slack_ms)
+    for key, before, after in regressions:
+        print(f"REGRESSION {key}: p50 {before:.3f} ms -> {after:.3f} ms")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
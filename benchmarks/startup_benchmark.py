@@ -0,0 +1,98 @@
+"""
+Cold-start benchmark for the hand tracking app
+
+Each run starts a fresh interpreter and measures how long it takes to import
+the app modules, build the tracker and action handler, and process the first
+frame of the checked-in fixture clip with MediaPipe warming up in the
+background, the same way main.py starts.
+
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 5 --target-ms 1500
+
+Exits with status 1 when the median time to first frame exceeds --target-ms.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from make_fixtures import CLIP_FIXTURE  # noqa: E402
+
+# Runs in the child interpreter; prints one JSON line of timings in milliseconds
+CHILD_SCRIPT = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {repo!r})
+from hand_tracker import HandTracker
+from gesture_actions import GestureActionHandler
+from pipeline import open_source
+imported = time.perf_counter()
+
+tracker = HandTracker(warm_start=True)
+action_handler = GestureActionHandler(backend='noop')
+cap = open_source({clip!r})
+ok, frame = cap.read()
+opened = time.perf_counter()
+
+result = {{'import_ms': (imported - start) * 1000, 'open_ms': (opened - imported) * 1000}}
+try:
+    tracker.find_hands(frame, draw=False)
+    result['first_frame_ms'] = (time.perf_counter() - start) * 1000
+except Exception as e:
+    result['error'] = f"{{type(e).__name__}}: {{e}}"
+cap.release()
+action_handler.close()
+print(json.dumps(result))
+"""
+
+
+def run_once():
+    script = CHILD_SCRIPT.format(repo=REPO_DIR, clip=CLIP_FIXTURE)
+    completed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "child failed")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure cold import and time to first processed frame")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to start")
+    parser.add_argument("--target-ms", type=float, help="Fail when the median time to first frame exceeds this")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    runs = [run_once() for _ in range(args.runs)]
+
+    summary = {}
+    for key in ("import_ms", "open_ms", "first_frame_ms"):
+        values = [run[key] for run in runs if key in run]
+        if values:
+            summary[key] = float(np.median(values))
+            print(f"{key:<16} median {summary[key]:9.1f} ms  (min {min(values):.1f}, max {max(values):.1f})")
+
+    errors = [run["error"] for run in runs if "error" in run]
+    if errors:
+        print(f"First frame not processed, MediaPipe unavailable: {errors[0]}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": runs, "median": summary}, f, indent=2, sort_keys=True)
+
+    if args.target_ms is not None and "first_frame_ms" in summary and summary["first_frame_ms"] > args.target_ms:
+        print(f"Startup {summary['first_frame_ms']:.1f} ms exceeds the {args.target_ms:.1f} ms target")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,122 +1,61 @@
-import pyautogui
 import time
 from typing import Callable, Dict
-import ctypes
-from ctypes import wintypes
-import keyboard  # Add this import
 import numpy as np
-
-# Windows API constants
-KEYEVENTF_KEYUP = 0x0002
-INPUT_KEYBOARD = 1
-VK_F1 = 0x70  # Virtual key code for F1
-
-# Define the Windows API structures
-class KEYBDINPUT(ctypes.Structure):
-    _fields_ = [
-        ("wVk", wintypes.WORD),
-        ("wScan", wintypes.WORD),
-        ("dwFlags", wintypes.DWORD),
-        ("time", wintypes.DWORD),
-        ("dwExtraInfo", ctypes.POINTER(ctypes.c_ulong))
-    ]
-
-class INPUT(ctypes.Structure):
-    class _INPUT(ctypes.Union):
-        _fields_ = [
-            ("ki", KEYBDINPUT),
-            ("padding", ctypes.c_byte * 8)
-        ]
-    _anonymous_ = ("_input",)
-    _fields_ = [
-        ("type", wintypes.DWORD),
-        ("_input", _INPUT)
-    ]
+import metrics
+from action_backends import get_backend
+from action_executor import ActionExecutor
+from gesture_classifier import REFERENCE_PALM_LENGTH
+from volume_controller import VolumeController
 
 class GestureActionHandler:
-    def __init__(self):
-        self.last_action_time = 0
+    def __init__(self, backend=None, executor=None, clock=None):
+        # OS calls go through a pluggable backend and run on a background executor
+        if backend is None or isinstance(backend, str):
+            backend = get_backend(backend)
+        self.backend = backend
+        # Volume timing and action cooldowns follow clock when one is given, e.g. for replays
+        self.clock = clock or time.time
+        self.executor = executor if executor is not None else ActionExecutor(clock=clock)
         self.action_cooldown = 1.0  # seconds
-        self.extra = ctypes.pointer(ctypes.c_ulong(0))
-        self.last_volume_distance = None
-        self.volume_change_threshold = 20  # Reduced threshold for easier activation
-        self.volume_cooldown = 0.2  # Reduced cooldown for smoother control
-        self.last_volume_change_time = 0
-        self.volume_deadzone = 10  # Reduced deadzone
-        self.volume_direction = None  # Track the direction of volume change
-        self.volume_hold_start = None  # Track when we started holding the gesture
-        self.volume_hold_threshold = 0.5  # Time to hold before continuous volume change
+        self.executor.set_cooldown('lock_computer', self.action_cooldown)
+        self.executor.set_cooldown('thumbs_up', self.action_cooldown)
 
-    def lock_computer(self) -> None:
-        """Lock the computer using Windows API"""
-        current_time = time.time()
-        
-        # Check if enough time has passed since last action
-        if current_time - self.last_action_time < self.action_cooldown:
-            return
-            
+        # Pinch distance -> coalesced volume key events
+        self.volume_controller = VolumeController()
+
+    def _lock_computer(self) -> None:
         try:
-            # Lock the computer using Windows API
-            ctypes.windll.user32.LockWorkStation()
-            self.last_action_time = current_time
+            # Lock the computer through the platform backend
+            self.backend.lock_workstation()
             print("Computer locked successfully")
         except Exception as e:
             print(f"Error locking computer: {e}")
 
-    def control_volume(self, index_tip, thumb_tip) -> None:
-        """Control system volume based on distance between index finger and thumb"""
+    def lock_computer(self) -> None:
+        """Lock the computer"""
+        self.executor.submit('lock_computer', self._lock_computer)
+
+    @metrics.timed('gesture_actions_control_volume_seconds', 'control_volume on the frame loop')
+    def control_volume(self, index_tip, thumb_tip, palm_length=None) -> None:
+        """
+        Control system volume based on distance between index finger and thumb
+        With the hand's palm_length the distance is rescaled to a REFERENCE_PALM_LENGTH
+        hand, so the same pinch gives the same volume at any resolution
+        """
         if index_tip is None or thumb_tip is None:
-            self.volume_hold_start = None
+            self.volume_controller.reset()
             return
 
-        current_time = time.time()
-        
         # Calculate distance between index finger and thumb
         current_distance = np.linalg.norm(np.array(index_tip) - np.array(thumb_tip))
-        
-        # Initialize last_volume_distance if it's None
-        if self.last_volume_distance is None:
-            self.last_volume_distance = current_distance
-            return
+        if palm_length:
+            current_distance *= REFERENCE_PALM_LENGTH / palm_length
 
-        # Calculate distance change
-        distance_change = current_distance - self.last_volume_distance
-        
-        # Check if we're in the deadzone
-        if abs(distance_change) < self.volume_deadzone:
-            self.volume_hold_start = None
-            return
-
-        # Determine direction of change
-        new_direction = 1 if distance_change > 0 else -1
-        
-        # Check if we should start continuous volume change
-        if abs(distance_change) > self.volume_change_threshold:
-            if self.volume_hold_start is None:
-                self.volume_hold_start = current_time
-                self.volume_direction = new_direction
-                # Initial volume change
-                if new_direction > 0:
-                    pyautogui.press('volumeup')
-                else:
-                    pyautogui.press('volumedown')
-            elif self.volume_direction == new_direction:
-                # Check if we've held long enough for continuous change
-                if current_time - self.volume_hold_start >= self.volume_hold_threshold:
-                    # Check cooldown for continuous changes
-                    if current_time - self.last_volume_change_time >= self.volume_cooldown:
-                        if new_direction > 0:
-                            pyautogui.press('volumeup')
-                        else:
-                            pyautogui.press('volumedown')
-                        self.last_volume_change_time = current_time
-        else:
-            # Reset hold if movement is too small
-            self.volume_hold_start = None
-            self.volume_direction = None
-
-        # Update last distance
-        self.last_volume_distance = current_distance
+        # Send only the net number of steps, batched into one key call
+        for key, presses in self.volume_controller.update(current_distance, self.clock()):
+            if not self.executor.submit('volume', self.backend.press, key, presses):
+                # Dropped on a full queue: the system volume did not move, so neither does the estimate
+                self.volume_controller.discard(key, presses)
 
     def open_hand_action(self) -> None:
         """Action for open hand gesture"""
@@ -134,9 +73,20 @@ class GestureActionHandler:
         """Action for gun sign gesture"""
         print("Gun Sign detected! 🔫")
 
+    def _thumbs_up(self) -> None:
+        self.backend.press('space')
+        time.sleep(0.1)  # Small delay after space
+        self.backend.write('Password')
+        print("Thumbs Up detected! 👍 - Space + 9004 pressed")
+
     def thumbs_up_action(self) -> None:
         """Action for thumbs up gesture - presses space and types 9004"""
-        pyautogui.press('space')
-        time.sleep(0.1)  # Small delay after space
-        keyboard.write('Password')  # Using keyboard.write instead of pyautogui.write
-        print("Thumbs Up detected! 👍 - Space + 9004 pressed") 
\ No newline at end of file
+        self.executor.submit('thumbs_up', self._thumbs_up)
+
+    def stats(self) -> Dict[str, float]:
+        """Queued, executed, dropped and latency counts from the action executor"""
+        return self.executor.stats()
+
+    def close(self) -> None:
+        """Finish queued actions and stop the executor"""
+        self.executor.close()
@@ -0,0 +1,235 @@
+import numpy as np
+
+# Gesture labels; classify_batch can return indices into this list
+GESTURE_NAMES = [
+    "No hand detected",
+    "Unknown Gesture",
+    "Open Hand",
+    "Closed Fist",
+    "Peace Sign",
+    "Pointing",
+    "Gun Sign",
+    "Four Fingers",
+    "Thumbs Up",
+    "Middle Finger",
+    "Ring Up",
+    "Pinky Up",
+    "Two Fingers",
+    "Three Fingers",
+    "Volume Control",
+]
+NO_HAND = 0
+UNKNOWN = 1
+
+# Bit for each finger in the 5-bit key: thumb, index, middle, ring, pinky
+FINGER_WEIGHTS = np.array([1, 2, 4, 8, 16])
+THUMB, INDEX, MIDDLE, RING, PINKY = (int(weight) for weight in FINGER_WEIGHTS)
+
+
+def finger_key(finger_states):
+    """Pack (thumb, index, middle, ring, pinky) flags into a 5-bit key"""
+    key = 0
+    for weight, state in zip((THUMB, INDEX, MIDDLE, RING, PINKY), finger_states):
+        if state:
+            key |= weight
+    return key
+
+
+# Gesture distances are measured in palm lengths (wrist to middle finger MCP),
+# so a pose classifies the same at any capture resolution and hand size
+WRIST = 0
+MIDDLE_MCP = 9
+# Palm length in pixels of a hand at 640x480, the size the original pixel thresholds were tuned for
+REFERENCE_PALM_LENGTH = 100.0
+# 10-150 px for the ~100 px palm of a hand at 640x480; made lenient for volume control
+SPACING_RANGE = (0.1, 1.5)
+
+# Batches up to this many hands are classified hand by hand, which is faster than grouping them
+SMALL_BATCH = 16
+
+
+def palm_lengths(landmarks):
+    """Wrist to middle finger MCP distance of (..., 21, 2|3) landmarks; 1 where it is zero"""
+    points = np.asarray(landmarks)
+    palm = (points[..., MIDDLE_MCP, :2] - points[..., WRIST, :2]).astype(np.float64)
+    length = np.sqrt(palm[..., 0] * palm[..., 0] + palm[..., 1] * palm[..., 1])
+    return np.where(length > 0, length, 1.0)
+
+
+def palm_length(hand_landmarks):
+    """palm_lengths for a single hand, also accepting a list of points"""
+    wrist, mcp = hand_landmarks[WRIST], hand_landmarks[MIDDLE_MCP]
+    dx, dy = float(mcp[0] - wrist[0]), float(mcp[1] - wrist[1])
+    length = np.sqrt(dx * dx + dy * dy)
+    return length if length > 0 else 1.0
+
+
+def spacing_ok(distance, palm):
+    """Fingertips count as properly spaced when distance is within SPACING_RANGE palm lengths"""
+    ratio = distance / palm
+    return (SPACING_RANGE[0] < ratio) & (ratio < SPACING_RANGE[1])
+
+
+def spacing(tip1, tip2):
+    """Spacing predicate between two landmark indices"""
+    return ('spacing', tip1, tip2)
+
+
+def _expand_pattern(fingers):
+    """All keys matching a 5-tuple of True/False/None (None matches either state)"""
+    keys = [0]
+    for weight, state in zip((THUMB, INDEX, MIDDLE, RING, PINKY), fingers):
+        if state is None:
+            keys = keys + [key | weight for key in keys]
+        elif state:
+            keys = [key | weight for key in keys]
+    return keys
+
+
+def _builtin_rules():
+    """
+    Rules equivalent to the original if/elif cascade in HandTracker.get_hand_gesture
+    Gun Sign and Four Fingers could never be reached there and are not produced
+    """
+    rules = {key: [] for key in range(32)}
+    rules[0].append(("Closed Fist", None))
+    rules[THUMB | INDEX].append(("Volume Control", spacing(4, 8)))
+    rules[INDEX | MIDDLE].append(("Peace Sign", spacing(8, 12)))
+    rules[INDEX].append(("Pointing", None))
+    rules[MIDDLE].append(("Middle Finger", None))
+    rules[RING].append(("Ring Up", None))
+    rules[PINKY].append(("Pinky Up", None))
+    rules[THUMB].append(("Thumbs Up", None))
+    rules[INDEX | RING].append(("Two Fingers", spacing(8, 16)))
+    for key in range(32):
+        if bin(key).count("1") == 3:
+            rules[key].append(("Three Fingers", spacing(8, 20)))
+    for key in _expand_pattern((None, True, True, True, True)):
+        rules[key].append(("Open Hand", None))
+    return rules
+
+
+class GestureClassifier:
+    """
+    Table-driven gesture classifier
+
+    The five finger flags are packed into a 5-bit key that indexes a 32-entry
+    table. Each entry is an ordered tuple of (gesture id, predicate) rules; the
+    first rule whose predicate holds wins, otherwise the gesture is unknown.
+    A predicate is None (always true), spacing(tip1, tip2), or a callable taking
+    the hand landmarks and returning a bool.
+    """
+
+    def __init__(self):
+        self.gesture_names = list(GESTURE_NAMES)
+        self.rules = _builtin_rules()
+        self._compile()
+
+    def _gesture_id(self, name):
+        if name not in self.gesture_names:
+            self.gesture_names.append(name)
+        return self.gesture_names.index(name)
+
+    def gesture_id(self, name):
+        """Id of a gesture name, UNKNOWN for names the classifier never produces"""
+        if name not in self.gesture_names:
+            return UNKNOWN
+        return self.gesture_names.index(name)
+
+    def _compile(self):
+        self.table = [
+            tuple((self._gesture_id(name), predicate) for name, predicate in self.rules[key])
+            for key in range(32)
+        ]
+        self.spacing_pairs = sorted({
+            predicate[1:] for rules in self.table for _, predicate in rules
+            if isinstance(predicate, tuple)
+        })
+
+    def register_gesture(self, name, fingers, predicate=None, priority=True):
+        """
+        Add a gesture for a finger pattern
+        fingers is a 5-tuple (thumb, index, middle, ring, pinky) of True, False or
+        None for "either"; predicate is None, spacing(tip1, tip2) or a callable.
+        With priority the rule is tried before the existing rules for those keys.
+        """
+        if len(fingers) != 5:
+            raise ValueError("fingers must have 5 entries: thumb, index, middle, ring, pinky")
+        for key in _expand_pattern(fingers):
+            if priority:
+                self.rules[key].insert(0, (name, predicate))
+            else:
+                self.rules[key].append((name, predicate))
+        self._compile()
+
+    def _check(self, predicate, hand_landmarks):
+        if predicate is None:
+            return True
+        if isinstance(predicate, tuple):
+            _, tip1, tip2 = predicate
+            p1, p2 = hand_landmarks[tip1], hand_landmarks[tip2]
+            dx, dy = float(p1[0] - p2[0]), float(p1[1] - p2[1])
+            return bool(spacing_ok(np.sqrt(dx * dx + dy * dy), palm_length(hand_landmarks)))
+        return bool(predicate(hand_landmarks))
+
+    def classify_id(self, finger_states, hand_landmarks):
+        """Gesture id for one hand"""
+        if finger_states is None or len(finger_states) == 0 or hand_landmarks is None or len(hand_landmarks) == 0:
+            return NO_HAND
+        for gesture_id, predicate in self.table[finger_key(finger_states)]:
+            if self._check(predicate, hand_landmarks):
+                return gesture_id
+        return UNKNOWN
+
+    def classify(self, finger_states, hand_landmarks):
+        """Gesture name for one hand"""
+        return self.gesture_names[self.classify_id(finger_states, hand_landmarks)]
+
+    def classify_batch(self, finger_states, landmarks, as_ids=False):
+        """
+        Classify many hands at once
+        finger_states has shape (..., 5) and landmarks (..., 21, 2|3)
+        Returns an array of gesture ids, or a nested list of names unless as_ids
+        """
+        states = np.asarray(finger_states, dtype=bool)
+        points = np.asarray(landmarks)
+        batch_shape = states.shape[:-1]
+        states = states.reshape(-1, 5)
+        points = points.reshape(-1, points.shape[-2], points.shape[-1])
+
+        if len(states) <= SMALL_BATCH:
+            # The few hands of a live frame: per-hand table lookups beat the array setup below
+            ids = np.array([self.classify_id(hand_states, hand) for hand_states, hand in zip(states.tolist(), points)],
+                           dtype=np.int16).reshape(batch_shape)
+        else:
+            ids = self._classify_rows(states, points).reshape(batch_shape)
+        if as_ids:
+            return ids
+        names = np.asarray(self.gesture_names, dtype=object)[ids]
+        return names.tolist()
+
+    def _classify_rows(self, states, points):
+        """Gesture ids for (n, 5) finger states and (n, 21, 2|3) landmarks, grouped by finger key"""
+        keys = states.astype(np.int64) @ FINGER_WEIGHTS
+        spacing_results = {}
+        palms = palm_lengths(points) if self.spacing_pairs else None
+        for tip1, tip2 in self.spacing_pairs:
+            delta = (points[:, tip1, :2] - points[:, tip2, :2]).astype(np.float64)
+            spacing_results[tip1, tip2] = spacing_ok(np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1]),
+                                                     palms)
+
+        ids = np.full(len(keys), UNKNOWN, dtype=np.int16)
+        for key in np.unique(keys):
+            rows = np.flatnonzero(keys == key)
+            for gesture_id, predicate in self.table[key]:
+                if len(rows) == 0:
+                    break
+                if predicate is None:
+                    passed = np.ones(len(rows), dtype=bool)
+                elif isinstance(predicate, tuple):
+                    passed = spacing_results[predicate[1:]][rows]
+                else:
+                    passed = np.array([bool(predicate(points[row])) for row in rows], dtype=bool)
+                ids[rows[passed]] = gesture_id
+                rows = rows[~passed]
+        return ids
@@ -1,239 +1,464 @@
+import threading
+import time
+
 import cv2
-import mediapipe as mp
 import numpy as np
+import metrics
+from gesture_classifier import REFERENCE_PALM_LENGTH, GestureClassifier, palm_lengths, spacing_ok
+
+# Landmark indices used by the finger-state rules (thumb, index, middle, ring, pinky)
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+FINGER_PIPS = np.array([3, 6, 10, 14, 18])
+FINGER_MCPS = np.array([2, 5, 9, 13, 17])
+WRIST = 0
+ANGLE_P1 = np.append(FINGER_TIPS, 4)
+ANGLE_P2 = np.append(FINGER_PIPS, 2)
+ANGLE_P3 = np.append(FINGER_MCPS, WRIST)
+
+# Largest sideways offset of a raised fingertip from its MCP, in palm lengths (30 px at 640x480)
+ALIGNMENT_TOLERANCE = 0.3
+
+# Handedness is stored as an index into this list
+HANDEDNESS_LABELS = ["Left", "Right"]
+
+MEDIAPIPE_SECONDS = metrics.histogram('hand_tracker_mediapipe_seconds', 'MediaPipe Hands inference per processed region')
+HANDS_DETECTED = metrics.counter('hand_tracker_hands_detected_total', 'Hands returned by find_hands')
+
+
+def joint_angles_batch(points, p1_idx, p2_idx, p3_idx):
+    """
+    Calculate the angle at p2 for every (p1, p2, p3) landmark triple
+    points has shape (..., 21, 2|3); only x and y are used
+    Returns angles in degrees with shape (..., len(p2_idx)); zero-length vectors give 0
+    """
+    v1 = points[..., p1_idx, :2] - points[..., p2_idx, :2]
+    v2 = points[..., p3_idx, :2] - points[..., p2_idx, :2]
+
+    dot = v1[..., 0] * v2[..., 0] + v1[..., 1] * v2[..., 1]
+    norm_v1 = np.sqrt(v1[..., 0] * v1[..., 0] + v1[..., 1] * v1[..., 1])
+    norm_v2 = np.sqrt(v2[..., 0] * v2[..., 0] + v2[..., 1] * v2[..., 1])
+
+    valid = (norm_v1 != 0) & (norm_v2 != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_angle = np.clip(dot / (norm_v1 * norm_v2), -1.0, 1.0)
+    return np.where(valid, np.degrees(np.arccos(np.where(valid, cos_angle, 1.0))), 0.0)
+
+
+def finger_geometry_batch(landmarks):
+    """
+    Compute joint angles, length ratios and finger-up flags for many hands at once
+    landmarks has shape (n_hands, 21, 2|3) or (n_frames, n_hands, 21, 2|3) in any
+    coordinates with equal x and y units; every threshold is an angle, a ratio or
+    a multiple of the palm length, so scaling the hands does not change the result
+    Returns a dict of arrays:
+        angles           (..., 5) angle at the PIP joint (IP for the thumb)
+        thumb_base_angle (...)    angle between thumb tip, thumb MCP and wrist
+        length_ratios    (..., 4) tip-MCP / PIP-MCP length for index..pinky
+        aligned          (..., 4) alignment check for index..pinky
+        palm_length      (...)    wrist to middle finger MCP distance
+        states           (..., 5) finger-up flags for thumb, index, middle, ring, pinky
+    """
+    points = np.asarray(landmarks)
+    if points.ndim < 3 or points.shape[-2] != 21 or points.shape[-1] not in (2, 3):
+        raise ValueError(f"Expected landmarks of shape (..., 21, 2|3), got {points.shape}")
+    # Integer pixel coordinates stay exact, everything else is promoted to float64
+    points = points.astype(np.int64 if points.dtype.kind in 'iub' else np.float64, copy=False)
+
+    # The five PIP (thumb IP) angles and the thumb tip / thumb MCP / wrist angle in one pass
+    all_angles = joint_angles_batch(points, ANGLE_P1, ANGLE_P2, ANGLE_P3)
+    angles = all_angles[..., :5]
+    thumb_base_angle = all_angles[..., 5]
+
+    tips = points[..., FINGER_TIPS[1:], :2]
+    pips = points[..., FINGER_PIPS[1:], :2]
+    mcps = points[..., FINGER_MCPS[1:], :2]
+
+    # Finger length ratio between the whole finger and its base segment
+    tip_mcp = tips - mcps
+    pip_mcp = pips - mcps
+    finger_length = np.sqrt(tip_mcp[..., 0] * tip_mcp[..., 0] + tip_mcp[..., 1] * tip_mcp[..., 1])
+    base_length = np.sqrt(pip_mcp[..., 0] * pip_mcp[..., 0] + pip_mcp[..., 1] * pip_mcp[..., 1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        length_ratios = np.where(base_length > 0, finger_length / base_length, 0.0)
+
+    # The sideways tolerance grows with the hand instead of being a fixed pixel count
+    palm_length = palm_lengths(points)
+    tolerance = ALIGNMENT_TOLERANCE * palm_length[..., None]
+    aligned = (np.abs(tips[..., 0] - mcps[..., 0]) < tolerance) & (length_ratios > 1.2)
+
+    states = np.empty(angles.shape, dtype=bool)
+    # Thumb is up if both the IP angle and the angle to the wrist are large enough
+    states[..., 0] = (angles[..., 0] > 150) & (thumb_base_angle > 120)
+    # Other fingers must be straight, pointing up and properly aligned
+    states[..., 1:] = (angles[..., 1:] > 160) & (tips[..., 1] < pips[..., 1]) & aligned
+
+    return {
+        'angles': angles,
+        'thumb_base_angle': thumb_base_angle,
+        'length_ratios': length_ratios,
+        'aligned': aligned,
+        'palm_length': palm_length,
+        'states': states,
+    }
+
+
+def finger_states_batch(landmarks):
+    """Return the (..., 5) finger-up flags for a batch of hands"""
+    return finger_geometry_batch(landmarks)['states']
+
 
 class HandTracker:
-    def __init__(self, mode=False, max_hands=2, detection_confidence=0.5, tracking_confidence=0.5):
+    def __init__(self, mode=False, max_hands=2, detection_confidence=0.5, tracking_confidence=0.5,
+                 roi_mode=False, roi_margin=0.5, min_roi_size=192, full_frame_interval=30, warm_start=False,
+                 input_scale=1.0, recorder=None, gesture_classifier=None):
         self.mode = mode
         self.max_hands = max_hands
         self.detection_confidence = detection_confidence
         self.tracking_confidence = tracking_confidence
+        # Downscale factor for the image handed to MediaPipe; landmarks stay in frame coordinates
+        self.input_scale = input_scale
+        # Optional LandmarkRecorder that every find_hands result is appended to
+        self.recorder = recorder
+
+        # Region-of-interest tracking around the previous frame's hands
+        self.roi_mode = roi_mode
+        self.roi_margin = roi_margin
+        self.min_roi_size = min_roi_size
+        self.full_frame_interval = full_frame_interval
+        self.roi = None
+        self.results_region = None
+        self.frames_since_full = 0
+        self.full_passes = 0
+        self.roi_passes = 0
+
+        # Preallocated per-frame outputs, reused by every find_hands call
+        self.num_hands = 0
+        self.landmark_buffer = np.zeros((max_hands, 21, 3), dtype=np.float32)
+        self.pixel_buffer = np.zeros((max_hands, 21, 2), dtype=np.int32)
+        # Sub-pixel frame coordinates, used for gesture geometry so small frames lose no precision
+        self.point_buffer = np.zeros((max_hands, 21, 2), dtype=np.float32)
+        self.box_buffer = np.zeros((max_hands, 4), dtype=np.int32)
+        self.handedness_buffer = np.full(max_hands, -1, dtype=np.int8)
+        self.score_buffer = np.zeros(max_hands, dtype=np.float32)
+        self.prev_boxes = np.zeros((max_hands, 4), dtype=np.int32)
+        self.prev_count = 0
+        self._raw_buffer = np.zeros((max_hands, 21, 3), dtype=np.float32)
+        self._pixel_scratch = np.zeros((max_hands, 21, 2), dtype=np.float64)
+        self._region_size = np.zeros(2, dtype=np.float64)
+        self._region_offset = np.zeros(2, dtype=np.float64)
+        self._frame_size = np.zeros(2, dtype=np.float64)
+        self._frame_size_int = np.zeros(2, dtype=np.int32)
+
+        # Rule table by default; a learned_classifier model has the same interface
+        self.gesture_classifier = gesture_classifier or GestureClassifier()
 
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        # MediaPipe is imported and its Hands graph built on first use, or in the
+        # background straight away with warm_start so it overlaps camera start-up
+        self._hands = None
+        self._roi_hands = None
+        self._hands_lock = threading.Lock()
+        self._warm_thread = None
+        self.mp_hands = None
+        self.mp_draw = None
+        self.mp_drawing_styles = None
+        self.landmark_style = None
+        self.connection_style = None
+        if warm_start:
+            self.warm_up(background=True)
+
+    def _build_hands(self):
+        with self._hands_lock:
+            if self._hands is not None:
+                return
+            import mediapipe as mp
+
+            self.mp_hands = mp.solutions.hands
+            self.mp_draw = mp.solutions.drawing_utils
+            self.mp_drawing_styles = mp.solutions.drawing_styles
+            # Built once here instead of on every drawn hand
+            self.landmark_style = self.mp_drawing_styles.get_default_hand_landmarks_style()
+            self.connection_style = self.mp_drawing_styles.get_default_hand_connections_style()
+            self._hands = self._new_hands()
+            if self.roi_mode:
+                self._roi_hands = self._new_hands()
+
+    def _new_hands(self):
+        return self.mp_hands.Hands(
             static_image_mode=self.mode,
             max_num_hands=self.max_hands,
             min_detection_confidence=self.detection_confidence,
             min_tracking_confidence=self.tracking_confidence
         )
-        self.mp_draw = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
 
-    def check_finger_spacing(self, tip1, tip2):
-        """Check if two fingers are properly spaced"""
+    def warm_up(self, background=False):
+        """Import MediaPipe and build the Hands graph, optionally on a background thread"""
+        if self._hands is not None:
+            return
+        if background:
+            if self._warm_thread is None:
+                self._warm_thread = threading.Thread(target=self._build_hands, name='mediapipe-warmup', daemon=True)
+                self._warm_thread.start()
+            return
+        if self._warm_thread is not None:
+            self._warm_thread.join()
+        # Also covers a background build that failed, re-raising its error here
+        self._build_hands()
+
+    @property
+    def hands(self):
+        if self._hands is None:
+            self.warm_up()
+        return self._hands
+
+    @hands.setter
+    def hands(self, hands):
+        self._hands = hands
+
+    @property
+    def roi_hands(self):
+        """
+        Hands graph used for ROI crops
+        In tracking mode MediaPipe seeds each frame with the previous frame's
+        landmarks, which are normalized to that frame's input. Crops and full
+        frames therefore go to separate graphs, and a graph is reset whenever its
+        input geometry changes (see find_hands_array).
+        """
+        if self._roi_hands is None:
+            self.warm_up()
+            with self._hands_lock:
+                if self._roi_hands is None:
+                    self._roi_hands = self._new_hands()
+        return self._roi_hands
+
+    @roi_hands.setter
+    def roi_hands(self, hands):
+        self._roi_hands = hands
+
+    @staticmethod
+    def _reset_hands(hands):
+        # Drops the tracked landmarks, so the next frame starts with palm detection
+        if hasattr(hands, 'reset'):
+            hands.reset()
+
+    def check_finger_spacing(self, tip1, tip2, palm_length=None):
+        """
+        Check if two fingers are properly spaced, relative to the hand's palm length
+        Without palm_length the tips are taken to be pixels of a 640x480 frame, the original 10-150 px range
+        """
         distance = np.linalg.norm(np.array(tip1) - np.array(tip2))
-        return 10 < distance < 150  # Made more lenient for volume control
+        return bool(spacing_ok(distance, REFERENCE_PALM_LENGTH if palm_length is None else palm_length))
+
+    def _roi_region(self, hand_boxes, frame_shape):
+        """Enlarged union of the (n, 4) hand boxes, reused while the hands stay well inside it"""
+        h, w = frame_shape[:2]
+        x_min, y_min = hand_boxes[:, :2].min(axis=0).tolist()
+        x_max, y_max = hand_boxes[:, 2:].max(axis=0).tolist()
+
+        # Keep the previous crop while the hands have not drifted into its outer band,
+        # so MediaPipe's tracker sees a stable input between frames
+        if self.roi is not None:
+            rx0, ry0, rx1, ry1 = self.roi
+            band_x = (rx1 - rx0) * self.roi_margin / (1 + 2 * self.roi_margin) / 2
+            band_y = (ry1 - ry0) * self.roi_margin / (1 + 2 * self.roi_margin) / 2
+            if (x_min >= rx0 + band_x or rx0 == 0) and (y_min >= ry0 + band_y or ry0 == 0) \
+                    and (x_max <= rx1 - band_x or rx1 == w) and (y_max <= ry1 - band_y or ry1 == h):
+                return self.roi
+
+        # MediaPipe's palm detector needs some context, so never crop below min_roi_size
+        pad_x = max((x_max - x_min) * self.roi_margin, (self.min_roi_size - (x_max - x_min)) / 2)
+        pad_y = max((y_max - y_min) * self.roi_margin, (self.min_roi_size - (y_max - y_min)) / 2)
+        return (max(0, int(x_min - pad_x)), max(0, int(y_min - pad_y)),
+                min(w, int(x_max + pad_x)), min(h, int(y_max + pad_y)))
+
+    def prepare_region(self, frame, region):
+        """The RGB image MediaPipe is given for one (x0, y0, x1, y1) region of a BGR frame"""
+        x0, y0, x1, y1 = region
+        view = frame[y0:y1, x0:x1]
+
+        # MediaPipe returns region-normalized landmarks, so a downscaled input maps back unchanged
+        if self.input_scale < 1.0:
+            region_h, region_w = view.shape[:2]
+            size = (max(1, int(region_w * self.input_scale)), max(1, int(region_h * self.input_scale)))
+            view = cv2.resize(view, size, interpolation=cv2.INTER_AREA)
 
-    def find_hands(self, frame, draw=True):
         # Convert the BGR image to RGB
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
+        return cv2.cvtColor(view, cv2.COLOR_BGR2RGB)
+
+    def _process_region(self, frame, region, hands):
+        """
+        Run a MediaPipe Hands graph on one region of the frame and fill the landmark buffers
+        Returns the number of hands found
+        """
+        x0, y0, x1, y1 = region
+        h, w = frame.shape[:2]
+        region_w, region_h = x1 - x0, y1 - y0
+        frame_rgb = self.prepare_region(frame, region)
+
         # Process the frame and detect hands
-        self.results = self.hands.process(frame_rgb)
-        
-        # Initialize list to store hand landmarks and bounding boxes
-        all_hands = []
-        hand_boxes = []
-        
-        # If hands are detected
+        with MEDIAPIPE_SECONDS.time():
+            self.results = hands.process(frame_rgb)
+
+        n = 0
         if self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                if draw:
-                    # Draw hand landmarks with custom style
-                    self.mp_draw.draw_landmarks(
-                        frame,
-                        hand_landmarks,
-                        self.mp_hands.HAND_CONNECTIONS,
-                        self.mp_drawing_styles.get_default_hand_landmarks_style(),
-                        self.mp_drawing_styles.get_default_hand_connections_style()
-                    )
-                
-                # Get landmarks for this hand
-                hand = []
-                x_coords = []
-                y_coords = []
-                
-                for landmark in hand_landmarks.landmark:
-                    h, w, c = frame.shape
-                    x, y = int(landmark.x * w), int(landmark.y * h)
-                    hand.append([x, y])
-                    x_coords.append(x)
-                    y_coords.append(y)
-                
-                # Calculate bounding box
-                x_min = max(0, min(x_coords) - 20)
-                y_min = max(0, min(y_coords) - 20)
-                x_max = min(w, max(x_coords) + 20)
-                y_max = min(h, max(y_coords) + 20)
-                
-                all_hands.append(hand)
-                hand_boxes.append((x_min, y_min, x_max, y_max))
-        
+            raw = self._raw_buffer
+            for hand_landmarks in self.results.multi_hand_landmarks[:self.max_hands]:
+                for j, landmark in enumerate(hand_landmarks.landmark):
+                    raw[n, j, 0] = landmark.x
+                    raw[n, j, 1] = landmark.y
+                    raw[n, j, 2] = landmark.z
+                n += 1
+
+            self.handedness_buffer[:] = -1
+            self.score_buffer[:] = 0
+            for i, handedness in enumerate((self.results.multi_handedness or [])[:n]):
+                classification = handedness.classification[0]
+                self.handedness_buffer[i] = HANDEDNESS_LABELS.index(classification.label)
+                self.score_buffer[i] = classification.score
+
+        self.num_hands = n
+        if n == 0:
+            return 0
+
+        # Region-normalized coordinates -> full-frame pixels, computed in float64
+        # so the integer pixels match int(landmark.x * width + x0) exactly
+        scratch = self._pixel_scratch[:n]
+        self._region_size[:] = (region_w, region_h)
+        self._region_offset[:] = (x0, y0)
+        self._frame_size[:] = (w, h)
+        np.multiply(self._raw_buffer[:n, :, :2], self._region_size, out=scratch, dtype=np.float64)
+        np.add(scratch, self._region_offset, out=scratch)
+        np.copyto(self.pixel_buffer[:n], scratch, casting='unsafe')
+        np.copyto(self.point_buffer[:n], scratch, casting='same_kind')
+        np.divide(scratch, self._frame_size, out=self.landmark_buffer[:n, :, :2], casting='same_kind')
+        self.landmark_buffer[:n, :, 2] = self._raw_buffer[:n, :, 2]
+
+        # Calculate bounding boxes
+        boxes = self.box_buffer[:n]
+        np.min(self.pixel_buffer[:n], axis=1, out=boxes[:, :2])
+        np.max(self.pixel_buffer[:n], axis=1, out=boxes[:, 2:])
+        np.subtract(boxes[:, :2], 20, out=boxes[:, :2])
+        np.maximum(boxes[:, :2], 0, out=boxes[:, :2])
+        np.add(boxes[:, 2:], 20, out=boxes[:, 2:])
+        np.minimum(boxes[:, 2:], self._frame_size_int, out=boxes[:, 2:])
+        return n
+
+    @metrics.timed('hand_tracker_find_hands_seconds', 'find_hands including MediaPipe and ROI handling')
+    def find_hands_array(self, frame, draw=True):
+        """
+        Detect hands and return views into the tracker's preallocated buffers:
+            landmarks  (n, 21, 3) float32 x, y normalized to the full frame, plus MediaPipe z
+            pixels     (n, 21, 2) int32 full-frame pixel coordinates
+            boxes      (n, 4) int32 padded (x_min, y_min, x_max, y_max)
+            handedness (n,) int8 index into HANDEDNESS_LABELS, -1 if unknown
+            scores     (n,) float32 handedness scores
+        The views are overwritten by the next call; copy them to keep them
+        """
+        h, w = frame.shape[:2]
+        self._frame_size_int[:] = (w, h)
+        full_frame = (0, 0, w, h)
+        region = full_frame
+
+        # In ROI mode only the area around the previous hands is processed,
+        # with a full-frame pass on a schedule so new hands are picked up
+        if self.roi_mode and self.prev_count and self.frames_since_full < self.full_frame_interval:
+            region = self._roi_region(self.prev_boxes[:self.prev_count], frame.shape)
+
+        if region != full_frame:
+            if region != self.roi:
+                # A new crop: the tracked landmarks are normalized to the previous one
+                self._reset_hands(self.roi_hands)
+            n = self._process_region(frame, region, self.roi_hands)
+            # Fall back to a full-frame pass as soon as a hand is lost from the crop
+            if n < self.prev_count:
+                region = full_frame
+        if region == full_frame:
+            if self.roi is not None:
+                # The full-frame graph last saw the hands before the ROI passes began
+                self._reset_hands(self.hands)
+            n = self._process_region(frame, region, self.hands)
+
+        if region == full_frame:
+            self.full_passes += 1
+            self.frames_since_full = 0
+            self.roi = None
+        else:
+            self.roi_passes += 1
+            self.frames_since_full += 1
+            self.roi = region
+        self.results_region = region
+        self.prev_boxes[:n] = self.box_buffer[:n]
+        self.prev_count = n
+        HANDS_DETECTED.inc(n)
+        if self.recorder is not None:
+            self.recorder.write(time.time(), (w, h), self.landmark_buffer[:n], self.pixel_buffer[:n],
+                                self.box_buffer[:n], self.handedness_buffer[:n], self.score_buffer[:n])
+
+        if draw and n:
+            # Landmarks are normalized to the processed region, so draw on a view of it
+            x0, y0, x1, y1 = region
+            view = frame[y0:y1, x0:x1]
+            for hand_landmarks in self.results.multi_hand_landmarks[:n]:
+                # Draw hand landmarks with custom style
+                self.mp_draw.draw_landmarks(
+                    view,
+                    hand_landmarks,
+                    self.mp_hands.HAND_CONNECTIONS,
+                    self.landmark_style,
+                    self.connection_style
+                )
+
+        return (frame, self.landmark_buffer[:n], self.pixel_buffer[:n], self.box_buffer[:n],
+                self.handedness_buffer[:n], self.score_buffer[:n])
+
+    def find_hands(self, frame, draw=True):
+        """
+        Detect hands and return (frame, hands, hand_boxes) as Python lists
+        hands holds 21 [x, y] pixel pairs per hand; this is a list view of find_hands_array
+        """
+        frame, _, pixels, boxes, _, _ = self.find_hands_array(frame, draw)
+        all_hands = pixels.tolist()
+        hand_boxes = [tuple(box) for box in boxes.tolist()]
         return frame, all_hands, hand_boxes
 
+    def get_handedness(self):
+        """Handedness labels ("Left"/"Right") for the hands found by the last find_hands call"""
+        return [HANDEDNESS_LABELS[i] if i >= 0 else None
+                for i in self.handedness_buffer[:self.num_hands].tolist()]
+
+    @metrics.timed('hand_tracker_finger_state_seconds', 'get_finger_state per hand')
     def get_finger_state(self, hand_landmarks):
         """
         Determine which fingers are up based on landmark positions and angles
         Returns a list of 5 boolean values representing thumb, index, middle, ring, and pinky
         """
-        if not hand_landmarks:
+        if hand_landmarks is None or len(hand_landmarks) == 0:
             return [False] * 5
 
-        # Get coordinates of finger tips and their corresponding PIP joints
-        # Thumb
-        thumb_tip = hand_landmarks[4]
-        thumb_ip = hand_landmarks[3]
-        thumb_mcp = hand_landmarks[2]
-        thumb_cmc = hand_landmarks[1]
-        
-        # Index finger
-        index_tip = hand_landmarks[8]
-        index_pip = hand_landmarks[6]
-        index_mcp = hand_landmarks[5]
-        index_cmc = hand_landmarks[0]
-        
-        # Middle finger
-        middle_tip = hand_landmarks[12]
-        middle_pip = hand_landmarks[10]
-        middle_mcp = hand_landmarks[9]
-        
-        # Ring finger
-        ring_tip = hand_landmarks[16]
-        ring_pip = hand_landmarks[14]
-        ring_mcp = hand_landmarks[13]
-        
-        # Pinky
-        pinky_tip = hand_landmarks[20]
-        pinky_pip = hand_landmarks[18]
-        pinky_mcp = hand_landmarks[17]
-
-        def calculate_angle(p1, p2, p3):
-            """Calculate angle between three points"""
-            v1 = np.array([p1[0] - p2[0], p1[1] - p2[1]])
-            v2 = np.array([p3[0] - p2[0], p3[1] - p2[1]])
-            
-            # Calculate norms
-            norm_v1 = np.linalg.norm(v1)
-            norm_v2 = np.linalg.norm(v2)
-            
-            # Check for zero vectors
-            if norm_v1 == 0 or norm_v2 == 0:
-                return 0
-                
-            # Calculate cosine of angle
-            cos_angle = np.dot(v1, v2) / (norm_v1 * norm_v2)
-            # Clamp cos_angle to valid range
-            cos_angle = np.clip(cos_angle, -1.0, 1.0)
-            
-            return np.degrees(np.arccos(cos_angle))
-
-        def is_finger_up(tip, pip, mcp, is_thumb=False):
-            """Check if a finger is up based on angles and positions"""
-            # Calculate angles
-            angle1 = calculate_angle(tip, pip, mcp)
-            
-            # For thumb, we need additional checks
-            if is_thumb:
-                # Check angle between thumb tip and index finger base
-                angle2 = calculate_angle(tip, mcp, index_cmc)
-                # Thumb is up if both angles are large enough
-                return angle1 > 150 and angle2 > 120
-            
-            # For other fingers, check if tip is above PIP joint
-            return angle1 > 160 and tip[1] < pip[1]
-
-        def check_finger_alignment(tip, pip, mcp):
-            """Check if finger is properly aligned"""
-            # Calculate vertical alignment
-            vertical_alignment = abs(tip[0] - mcp[0]) < 30
-            # Calculate finger length ratio
-            finger_length = np.linalg.norm(np.array(tip) - np.array(mcp))
-            base_length = np.linalg.norm(np.array(pip) - np.array(mcp))
-            length_ratio = finger_length / base_length if base_length > 0 else 0
-            
-            return vertical_alignment and length_ratio > 1.2
-
-        # Check each finger
-        thumb_up = is_finger_up(thumb_tip, thumb_ip, thumb_mcp, True)
-        index_up = is_finger_up(index_tip, index_pip, index_mcp) and check_finger_alignment(index_tip, index_pip, index_mcp)
-        middle_up = is_finger_up(middle_tip, middle_pip, middle_mcp) and check_finger_alignment(middle_tip, middle_pip, middle_mcp)
-        ring_up = is_finger_up(ring_tip, ring_pip, ring_mcp) and check_finger_alignment(ring_tip, ring_pip, ring_mcp)
-        pinky_up = is_finger_up(pinky_tip, pinky_pip, pinky_mcp) and check_finger_alignment(pinky_tip, pinky_pip, pinky_mcp)
-
-        return [thumb_up, index_up, middle_up, ring_up, pinky_up]
+        states = finger_states_batch(np.asarray(hand_landmarks)[None])[0]
+        return [bool(state) for state in states]
+
+    @metrics.timed('hand_tracker_finger_states_batch_seconds', 'get_finger_states_batch per call')
+    def get_finger_states_batch(self, landmarks):
+        """
+        Batched version of get_finger_state
+        Accepts an (n_hands, 21, 2|3) or (n_frames, n_hands, 21, 2|3) array and
+        returns a boolean array of shape (..., 5)
+        """
+        return finger_states_batch(landmarks)
 
+    @metrics.timed('hand_tracker_gesture_seconds', 'get_hand_gesture per hand')
     def get_hand_gesture(self, finger_states, hand_landmarks):
         """
         Determine the gesture based on finger states
         Returns a string describing the gesture
         """
-        if not finger_states or not hand_landmarks:
-            return "No hand detected"
-
-        thumb, index, middle, ring, pinky = finger_states
-
-        # Volume control gesture (only index and thumb up, others down)
-        if index and thumb and not (middle or ring or pinky):
-            # Check if the gesture is held for volume control
-            spacing = self.check_finger_spacing(hand_landmarks[4], hand_landmarks[8])  # Check spacing between thumb and index
-            print(f"Volume control check - Thumb: {thumb}, Index: {index}, Spacing: {spacing}")
-            if spacing:
-                return "Volume Control"
-
-        # Peace sign detection (index and middle up, others down)
-        if index and middle and not (ring or pinky or thumb):
-            # Additional check for peace sign
-            if self.check_finger_spacing(hand_landmarks[8], hand_landmarks[12]):  # Check spacing between index and middle tips
-                return "Peace Sign"
-            
-        # Count how many fingers are up
-        fingers_up = sum(finger_states)
-
-        # Basic gesture recognition with strict checks
-        if fingers_up >= 4:
-            # Check if all fingers are properly spread
-            if all([index, middle, ring, pinky]):
-                return "Open Hand"
-        elif fingers_up == 0:
-            # Check if all fingers are properly curled
-            if not any([index, middle, ring, pinky, thumb]):
-                return "Closed Fist"
-        elif index and not (middle or ring or pinky):
-            # Pointing gesture
-            if not thumb:  # Thumb should be down for pointing
-                return "Pointing"
-        elif thumb and index and not (middle or ring or pinky):
-            # Gun sign
-            if self.check_finger_spacing(hand_landmarks[4], hand_landmarks[8]):  # Check spacing between thumb and index
-                return "Gun Sign"
-        elif all([index, middle, ring, pinky]) and not thumb:
-            # Four fingers
-            if self.check_finger_spacing(hand_landmarks[8], hand_landmarks[20]):  # Check spacing between index and pinky
-                return "Four Fingers"
-        elif fingers_up == 1:
-            if index and not any([middle, ring, pinky, thumb]):
-                return "Pointing"
-            elif middle and not any([index, ring, pinky, thumb]):
-                return "Middle Finger"
-            elif ring and not any([index, middle, pinky, thumb]):
-                return "Ring Up"
-            elif pinky and not any([index, middle, ring, thumb]):
-                return "Pinky Up"
-            elif thumb and not any([index, middle, ring, pinky]):
-                return "Thumbs Up"
-        elif fingers_up == 2:
-            if index and middle and not (ring or pinky or thumb):
-                if self.check_finger_spacing(hand_landmarks[8], hand_landmarks[12]):
-                    return "Peace Sign"
-            elif thumb and index and not (middle or ring or pinky):
-                if self.check_finger_spacing(hand_landmarks[4], hand_landmarks[8]):
-                    return "Gun Sign"
-            elif index and ring and not (middle or pinky or thumb):
-                if self.check_finger_spacing(hand_landmarks[8], hand_landmarks[16]):
-                    return "Two Fingers"
-        elif fingers_up == 3:
-            # Check if the three fingers are properly spread
-            if self.check_finger_spacing(hand_landmarks[8], hand_landmarks[20]):
-                return "Three Fingers"
-        
-        return "Unknown Gesture" 
\ No newline at end of file
+        return self.gesture_classifier.classify(finger_states, hand_landmarks)
+
+    def register_gesture(self, name, fingers, predicate=None, priority=True):
+        """Add a custom gesture to this tracker's classifier, see GestureClassifier.register_gesture"""
+        self.gesture_classifier.register_gesture(name, fingers, predicate, priority)
+
+    @metrics.timed('hand_tracker_gestures_batch_seconds', 'get_hand_gestures_batch per call')
+    def get_hand_gestures_batch(self, finger_states, landmarks, as_ids=False):
+        """Batched version of get_hand_gesture over (..., 5) finger states and (..., 21, 2|3) landmarks"""
+        return self.gesture_classifier.classify_batch(finger_states, landmarks, as_ids)
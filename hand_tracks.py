@@ -0,0 +1,172 @@
+from collections import deque
+
+import numpy as np
+
+
+def box_iou(box_a, box_b):
+    """IoU of two (x_min, y_min, x_max, y_max) boxes"""
+    inter_w = max(0, min(box_a[2], box_b[2]) - max(box_a[0], box_b[0]))
+    inter_h = max(0, min(box_a[3], box_b[3]) - max(box_a[1], box_b[1]))
+    intersection = inter_w * inter_h
+    area_a = (box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
+    area_b = (box_b[2] - box_b[0]) * (box_b[3] - box_b[1])
+    union = area_a + area_b - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def box_centroid(box):
+    return ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+
+
+class HandTrack:
+    """State for one hand followed across frames"""
+
+    __slots__ = (
+        'track_id', 'handedness', 'box', 'missed',
+        'reference_landmarks', 'stationary',
+        'history', 'raw_gesture', 'gesture', 'candidate', 'candidate_count',
+        'hold_start', 'triggered',
+    )
+
+    def __init__(self, track_id, box, handedness=None, history_size=15):
+        self.track_id = track_id
+        self.handedness = handedness
+        self.box = box
+        self.missed = 0
+
+        # Landmarks at the last classification, used for the stationary check
+        self.reference_landmarks = None
+        self.stationary = False
+
+        # Ring buffer of recent raw gestures and the debounced gesture
+        self.history = deque(maxlen=history_size)
+        self.raw_gesture = None
+        self.gesture = None
+        self.candidate = None
+        self.candidate_count = 0
+
+        # Hold timer for the debounced gesture
+        self.hold_start = None
+        self.triggered = False
+
+    def observe(self, gesture, now, debounce_frames=3):
+        """
+        Record this frame's raw gesture and return the debounced gesture
+        A new gesture only replaces the current one after debounce_frames consecutive frames
+        """
+        self.raw_gesture = gesture
+        self.history.append(gesture)
+
+        if gesture == self.gesture:
+            self.candidate = None
+            self.candidate_count = 0
+            return self.gesture
+
+        if gesture == self.candidate:
+            self.candidate_count += 1
+        else:
+            self.candidate = gesture
+            self.candidate_count = 1
+
+        if self.gesture is None or self.candidate_count >= debounce_frames:
+            self.gesture = gesture
+            self.candidate = None
+            self.candidate_count = 0
+            self.reset_hold(now)
+        return self.gesture
+
+    def held_for(self, now):
+        """Seconds the debounced gesture has been held"""
+        return 0.0 if self.hold_start is None else now - self.hold_start
+
+    def reset_hold(self, now):
+        """Restart the hold timer and re-arm the timed action"""
+        self.hold_start = now
+        self.triggered = False
+
+
+class HandTrackManager:
+    """
+    Gives every detected hand a stable ID across frames
+
+    Detections are matched to existing tracks greedily, preferring box IoU and
+    falling back to centroid distance; when handedness is known on both sides
+    it must agree. Tracks that go unmatched for more than max_missed frames are
+    dropped. Each track's stationary flag is set when its landmarks are within
+    epsilon pixels of the landmarks it was last classified with.
+    """
+
+    def __init__(self, min_iou=0.2, max_distance=1.0, max_missed=5, epsilon=2.0, history_size=15):
+        self.min_iou = min_iou
+        self.max_distance = max_distance  # relative to the track's box diagonal
+        self.max_missed = max_missed
+        self.epsilon = epsilon
+        self.history_size = history_size
+        self.tracks = []
+        self.next_id = 1
+
+    def _match_score(self, track, box, handedness):
+        if handedness is not None and track.handedness is not None and handedness != track.handedness:
+            return None
+        iou = box_iou(track.box, box)
+        if iou >= self.min_iou:
+            return 1.0 + iou
+        tx, ty = box_centroid(track.box)
+        bx, by = box_centroid(box)
+        diagonal = np.hypot(track.box[2] - track.box[0], track.box[3] - track.box[1]) or 1.0
+        distance = np.hypot(tx - bx, ty - by) / diagonal
+        if distance <= self.max_distance:
+            return 1.0 - distance
+        return None
+
+    def update(self, hands, boxes, handedness=None):
+        """
+        Match this frame's hands to tracks
+        Returns the track for each hand, in the same order as hands
+        """
+        if handedness is None or len(handedness) != len(boxes):
+            handedness = [None] * len(boxes)
+
+        candidates = []
+        for t, track in enumerate(self.tracks):
+            for d, box in enumerate(boxes):
+                score = self._match_score(track, box, handedness[d])
+                if score is not None:
+                    candidates.append((score, t, d))
+        candidates.sort(reverse=True)
+
+        assigned = [None] * len(boxes)
+        used_tracks = set()
+        for score, t, d in candidates:
+            if t in used_tracks or assigned[d] is not None:
+                continue
+            used_tracks.add(t)
+            assigned[d] = self.tracks[t]
+
+        for d, box in enumerate(boxes):
+            track = assigned[d]
+            if track is None:
+                track = HandTrack(self.next_id, box, handedness[d], self.history_size)
+                self.next_id += 1
+                self.tracks.append(track)
+                assigned[d] = track
+            track.box = box
+            track.missed = 0
+            if handedness[d] is not None:
+                track.handedness = handedness[d]
+
+            landmarks = np.asarray(hands[d], dtype=np.float32)
+            reference = track.reference_landmarks
+            track.stationary = (
+                reference is not None and reference.shape == landmarks.shape
+                and float(np.max(np.abs(landmarks - reference))) <= self.epsilon
+            )
+            if not track.stationary:
+                track.reference_landmarks = landmarks
+
+        matched = set(id(track) for track in assigned)
+        for track in self.tracks:
+            if id(track) not in matched:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+        return assigned
@@ -0,0 +1,250 @@
+"""
+Hand-object interaction events
+
+The kept YOLO boxes go into a uniform grid (BoxGrid) and only the boxes
+registered in the cells under the fingertips are tested. Boxes are indexed
+with some slack, so the grid survives the per-frame shifts of flow or
+velocity propagation and is rebuilt only after a detector run or a larger
+move. InteractionTracker counts the fingertips inside each object and turns
+those counts into grab start, hold and release events with hysteresis.
+"""
+import numpy as np
+
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+
+
+class BoxGrid:
+    """
+    Uniform grid over (x, y, w, h) boxes
+    Cells are cell_size pixels square; every box is registered in each cell it
+    overlaps, grown by slack pixels on every side, and stored as one array of
+    box indices sorted by cell (CSR layout). Queries test the candidates
+    against the current boxes, so update() can keep the cells while every box
+    keeps its size and stays within slack of where it was indexed.
+    """
+
+    def __init__(self, cell_size=64, slack=None):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.cell_size = cell_size
+        self.slack = cell_size / 2 if slack is None else slack
+        self.boxes = np.zeros((0, 4), dtype=np.float64)
+        # Boxes as they were when the cells were built
+        self.indexed = self.boxes
+        self.builds = 0
+        self.frame_size = None
+        self.columns = 1
+        self.rows = 1
+        self.cell_start = np.zeros(2, dtype=np.int64)
+        self.entries = np.zeros(0, dtype=np.int64)
+
+    def build(self, boxes, frame_size):
+        """Index the (n, 4) x, y, w, h boxes of a frame_size (width, height) frame"""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        width, height = frame_size
+        self.boxes = self.indexed = boxes
+        self.frame_size = (width, height)
+        self.builds += 1
+        self.columns = max(1, -(-int(width) // self.cell_size))
+        self.rows = max(1, -(-int(height) // self.cell_size))
+        n_cells = self.columns * self.rows
+        if not len(boxes):
+            self.cell_start = np.zeros(n_cells + 1, dtype=np.int64)
+            self.entries = np.zeros(0, dtype=np.int64)
+            return self
+
+        # Inclusive cell ranges of every box plus slack, clipped to the grid
+        slack = self.slack
+        x0 = np.clip((boxes[:, 0] - slack) // self.cell_size, 0, self.columns - 1).astype(np.int64)
+        y0 = np.clip((boxes[:, 1] - slack) // self.cell_size, 0, self.rows - 1).astype(np.int64)
+        x1 = np.clip((boxes[:, 0] + boxes[:, 2] + slack) // self.cell_size, 0, self.columns - 1).astype(np.int64)
+        y1 = np.clip((boxes[:, 1] + boxes[:, 3] + slack) // self.cell_size, 0, self.rows - 1).astype(np.int64)
+        spans_x = x1 - x0 + 1
+        counts = spans_x * (y1 - y0 + 1)
+
+        # One (cell, box) entry per covered cell, enumerated without a Python loop
+        box_index = np.repeat(np.arange(len(boxes)), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = ((y0[box_index] + offset // spans_x[box_index]) * self.columns
+                 + x0[box_index] + offset % spans_x[box_index])
+
+        order = np.argsort(cells, kind='stable')
+        self.entries = box_index[order]
+        self.cell_start = np.zeros(n_cells + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=n_cells), out=self.cell_start[1:])
+        return self
+
+    def update(self, boxes, frame_size):
+        """
+        Point the grid at this frame's boxes, rebuilding it only when the cells no longer cover them:
+        after a new detector run (different boxes or sizes), or once a box moved more than slack
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        indexed = self.indexed
+        if (tuple(frame_size) != self.frame_size or boxes.shape != indexed.shape
+                or not np.array_equal(boxes[:, 2:], indexed[:, 2:])
+                or (len(boxes) and np.abs(boxes[:, :2] - indexed[:, :2]).max() > self.slack)):
+            return self.build(boxes, frame_size)
+        self.boxes = boxes
+        return self
+
+    def query(self, points):
+        """
+        Boxes containing each of the (m, 2) points
+        Returns (point_index, box_index) arrays with one entry per containing pair
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if not len(points) or not len(self.entries):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        cx = np.clip(points[:, 0] // self.cell_size, 0, self.columns - 1).astype(np.int64)
+        cy = np.clip(points[:, 1] // self.cell_size, 0, self.rows - 1).astype(np.int64)
+        cells = cy * self.columns + cx
+        starts = self.cell_start[cells]
+        counts = self.cell_start[cells + 1] - starts
+
+        # Candidates: every box registered in each point's cell
+        point_index = np.repeat(np.arange(len(points)), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        box_index = self.entries[starts[point_index] + offset]
+
+        candidate_points = points[point_index]
+        candidate_boxes = self.boxes[box_index]
+        inside = ((candidate_points[:, 0] >= candidate_boxes[:, 0])
+                  & (candidate_points[:, 0] <= candidate_boxes[:, 0] + candidate_boxes[:, 2])
+                  & (candidate_points[:, 1] >= candidate_boxes[:, 1])
+                  & (candidate_points[:, 1] <= candidate_boxes[:, 1] + candidate_boxes[:, 3]))
+        return point_index[inside], box_index[inside]
+
+
+class InteractionEvent:
+    """A grab 'start', periodic 'hold' or 'release' of an object class by one hand"""
+
+    __slots__ = ('kind', 'hand_id', 'class_id', 'label', 'started_at', 'duration', 'box')
+
+    def __init__(self, kind, hand_id, class_id, label, started_at, duration, box):
+        self.kind = kind
+        self.hand_id = hand_id
+        self.class_id = class_id
+        self.label = label
+        self.started_at = started_at
+        self.duration = duration
+        self.box = box
+
+    def __repr__(self):
+        return f"InteractionEvent({self.kind} hand={self.hand_id} {self.label} {self.duration:.2f}s)"
+
+
+class _Contact:
+    __slots__ = ('active', 'frames_in', 'frames_out', 'started_at', 'last_hold', 'last_seen', 'box')
+
+    def __init__(self):
+        self.active = False
+        self.frames_in = 0
+        self.frames_out = 0
+        self.started_at = None
+        self.last_hold = None
+        self.last_seen = None
+        self.box = None
+
+
+class InteractionTracker:
+    """
+    Turns per-frame fingertip contacts into grab events
+
+    A hand is in contact with an object class when at least min_tips of its
+    fingertips lie inside one box of that class. A grab starts after
+    start_frames consecutive frames in contact and is released only after
+    release_frames consecutive frames without, so a fingertip flickering on
+    the box edge or a missed detection does not end it. While a grab lasts a
+    'hold' event is emitted every hold_interval seconds. Hands are identified
+    by the hand_ids passed to update (e.g. HandTrack ids), objects by class.
+    """
+
+    def __init__(self, classes=None, cell_size=64, min_tips=2, start_frames=3, release_frames=5,
+                 hold_interval=1.0):
+        self.classes = classes
+        self.grid = BoxGrid(cell_size)
+        self.min_tips = min_tips
+        self.start_frames = start_frames
+        self.release_frames = release_frames
+        self.hold_interval = hold_interval
+        self.contacts = {}
+
+    def _label(self, class_id):
+        return str(self.classes[class_id]) if self.classes is not None else str(class_id)
+
+    def contacts_for(self, hand_points, boxes, class_ids, frame_size):
+        """
+        {(hand number, class_id): box} for every hand touching an object this frame
+        hand_points (n_hands, 21, 2|3) frame coordinates; boxes (n, 4) x, y, w, h of kept detections
+        """
+        hand_points = np.asarray(hand_points, dtype=np.float64)
+        if not len(hand_points) or not len(boxes):
+            return {}
+        self.grid.update(boxes, frame_size)
+        tips = hand_points[:, FINGER_TIPS, :2].reshape(-1, 2)
+        tip_index, box_index = self.grid.query(tips)
+
+        # Fingertips per (hand, box) pair that has any, then the best box of each class per hand
+        pairs, tip_counts = np.unique(tip_index // len(FINGER_TIPS) * len(boxes) + box_index, return_counts=True)
+        best = {}
+        for pair, count in zip(pairs.tolist(), tip_counts.tolist()):
+            if count < self.min_tips:
+                continue
+            hand, box = divmod(pair, len(boxes))
+            key = (hand, int(class_ids[box]))
+            if key not in best or count > best[key][0]:
+                best[key] = (count, box)
+        return {key: tuple(int(v) for v in boxes[box]) for key, (_, box) in best.items()}
+
+    def update(self, hand_points, hand_ids, boxes, class_ids, indices, frame_size, now):
+        """
+        Feed one frame and return the InteractionEvents it produced
+        boxes, class_ids and indices are in the form draw_detections takes
+        """
+        kept = np.asarray(indices, dtype=np.int64).flatten()
+        kept_boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)[kept]
+        kept_classes = np.asarray(class_ids, dtype=np.int64).reshape(-1)[kept]
+        touching = self.contacts_for(hand_points, kept_boxes, kept_classes, frame_size)
+        touching = {(hand_ids[hand], class_id): box for (hand, class_id), box in touching.items()}
+
+        events = []
+        for key in set(self.contacts) | set(touching):
+            contact = self.contacts.get(key)
+            if contact is None:
+                contact = self.contacts[key] = _Contact()
+            hand_id, class_id = key
+
+            if key in touching:
+                contact.box = touching[key]
+                contact.last_seen = now
+                contact.frames_in += 1
+                contact.frames_out = 0
+                if not contact.active and contact.frames_in >= self.start_frames:
+                    contact.active = True
+                    contact.started_at = contact.last_hold = now
+                    events.append(InteractionEvent('start', hand_id, class_id, self._label(class_id), now, 0.0,
+                                                   contact.box))
+                elif contact.active and now - contact.last_hold >= self.hold_interval:
+                    contact.last_hold = now
+                    events.append(InteractionEvent('hold', hand_id, class_id, self._label(class_id),
+                                                   contact.started_at, now - contact.started_at, contact.box))
+                continue
+
+            contact.frames_in = 0
+            contact.frames_out += 1
+            if contact.active and contact.frames_out >= self.release_frames:
+                # The grab lasted until the last frame in contact, not until the release was confirmed
+                events.append(InteractionEvent('release', hand_id, class_id, self._label(class_id),
+                                               contact.started_at, contact.last_seen - contact.started_at,
+                                               contact.box))
+                del self.contacts[key]
+            elif not contact.active:
+                del self.contacts[key]
+        return events
+
+    def held(self, hand_id):
+        """Labels of the objects a hand is currently holding"""
+        return [self._label(class_id) for (hand, class_id), contact in self.contacts.items()
+                if hand == hand_id and contact.active]
@@ -0,0 +1,191 @@
+"""
+Append-only landmark recordings
+
+A recording is a 32-byte file header followed by one fixed-size record per
+processed frame, all little-endian, so a whole file can be opened with
+np.memmap as a structured array without parsing anything.
+
+    header  magic b'HLRC', version u16, max_hands u16, record_size u32,
+            created f64 (time.time()), 12 padding bytes
+    record  timestamp f64 (time.time()), width u16, height u16, hand_count u16,
+            2 padding bytes, landmarks f32[max_hands][21][3], pixels
+            i32[max_hands][21][2], boxes i32[max_hands][4], scores
+            f32[max_hands], handedness i8[max_hands], padding to 8 bytes
+
+Field meanings match HandTracker.find_hands_array. Slots past hand_count
+are zero. A record cut short by a crash is ignored when the file is read.
+
+    python landmark_recording.py session.hlrec      # summarize a recording
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+MAGIC = b'HLRC'
+VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('max_hands', '<u2'),
+    ('record_size', '<u4'),
+    ('created', '<f8'),
+    ('padding', 'V12'),
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+
+def record_dtype(max_hands):
+    """Structured dtype of one frame record for recordings of up to max_hands hands"""
+    fields = [
+        ('timestamp', '<f8'),
+        ('width', '<u2'),
+        ('height', '<u2'),
+        ('hand_count', '<u2'),
+        ('padding', 'V2'),
+        ('landmarks', '<f4', (max_hands, 21, 3)),
+        ('pixels', '<i4', (max_hands, 21, 2)),
+        ('boxes', '<i4', (max_hands, 4)),
+        ('scores', '<f4', (max_hands,)),
+        ('handedness', 'i1', (max_hands,)),
+    ]
+    size = np.dtype(fields).itemsize
+    if size % 8:
+        fields.append(('tail', f'V{8 - size % 8}'))
+    return np.dtype(fields)
+
+
+def _read_header(path):
+    header = np.fromfile(path, HEADER_DTYPE, count=1)
+    if len(header) != 1 or header[0]['magic'] != MAGIC:
+        raise ValueError(f"{path} is not a landmark recording")
+    header = header[0]
+    if header['version'] != VERSION:
+        raise ValueError(f"{path} has recording version {header['version']}, expected {VERSION}")
+    if header['record_size'] != record_dtype(int(header['max_hands'])).itemsize:
+        raise ValueError(f"{path} has a corrupt header (record size {header['record_size']})")
+    return header
+
+
+class LandmarkRecorder:
+    """
+    Appends one record per frame to a recording file
+    Pass it to HandTracker(recorder=...) to record every find_hands call.
+    Records go through a buffered file and are only guaranteed on disk after
+    flush() or close().
+    """
+
+    def __init__(self, path, max_hands=2):
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            header = _read_header(path)
+            if header['max_hands'] != max_hands:
+                raise ValueError(f"{path} was recorded with max_hands={header['max_hands']}, not {max_hands}")
+            # Drop a partial record left behind by a crash so appends stay aligned
+            size = os.path.getsize(path)
+            record_size = int(header['record_size'])
+            complete = HEADER_SIZE + (size - HEADER_SIZE) // record_size * record_size
+            if complete != size:
+                os.truncate(path, complete)
+            self.file = open(path, 'ab')
+        else:
+            self.file = open(path, 'wb')
+            header = np.zeros(1, HEADER_DTYPE)
+            header['magic'] = MAGIC
+            header['version'] = VERSION
+            header['max_hands'] = max_hands
+            header['record_size'] = record_dtype(max_hands).itemsize
+            header['created'] = time.time()
+            self.file.write(header.tobytes())
+        self.path = path
+        self.max_hands = max_hands
+        # One record reused for every frame
+        self.record = np.zeros(1, record_dtype(max_hands))
+        self.frames = 0
+
+    def write(self, timestamp, frame_size, landmarks, pixels, boxes, handedness, scores):
+        """
+        Append one frame
+        The hand arrays are the (n, ...) views returned by find_hands_array
+        """
+        n = min(len(landmarks), self.max_hands)
+        record = self.record[0]
+        record['timestamp'] = timestamp
+        record['width'], record['height'] = frame_size
+        record['hand_count'] = n
+        # Clear the slots of hands seen in the previous frame
+        for field in ('landmarks', 'pixels', 'boxes', 'scores'):
+            record[field][n:] = 0
+        record['handedness'][n:] = -1
+        if n:
+            record['landmarks'][:n] = landmarks[:n]
+            record['pixels'][:n] = pixels[:n]
+            record['boxes'][:n] = boxes[:n]
+            record['handedness'][:n] = handedness[:n]
+            record['scores'][:n] = scores[:n]
+        self.file.write(self.record.data)
+        self.frames += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class LandmarkRecording:
+    """
+    Read-only, memory-mapped view of a recording
+    records is a structured array with one entry per frame; its fields are
+    the columns of the format, e.g. recording.records['timestamp']
+    """
+
+    def __init__(self, path):
+        header = _read_header(path)
+        self.path = path
+        self.max_hands = int(header['max_hands'])
+        self.created = float(header['created'])
+        self.dtype = record_dtype(self.max_hands)
+
+        count = (os.path.getsize(path) - HEADER_SIZE) // self.dtype.itemsize
+        if count:
+            self.records = np.memmap(path, self.dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def frame(self, index):
+        """(timestamp, (width, height), landmarks, pixels, boxes, handedness, scores) of one frame"""
+        record = self.records[index]
+        n = int(record['hand_count'])
+        return (float(record['timestamp']), (int(record['width']), int(record['height'])),
+                record['landmarks'][:n], record['pixels'][:n], record['boxes'][:n],
+                record['handedness'][:n], record['scores'][:n])
+
+    def duration(self):
+        if len(self) < 2:
+            return 0.0
+        return float(self.records['timestamp'][-1] - self.records['timestamp'][0])
+
+    def close(self):
+        # Drops the mapping once no views of it are left
+        self.records = np.zeros(0, self.dtype)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Summarize a landmark recording")
+    parser.add_argument("recording", help="Recording file written by LandmarkRecorder")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    recording = LandmarkRecording(args.recording)
+    counts = np.bincount(recording.records['hand_count'], minlength=recording.max_hands + 1)
+    print(f"{args.recording}: {len(recording)} frames over {recording.duration():.1f} s, "
+          f"max_hands={recording.max_hands}")
+    for hands, frames in enumerate(counts.tolist()):
+        print(f"  {hands} hands: {frames} frames")
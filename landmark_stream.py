@@ -0,0 +1,234 @@
+"""
+Binary landmark stream over local IPC
+
+Each processed frame is sent as one datagram over UDP or a Unix domain
+socket: a fixed 32-byte header followed by hand_count fixed 276-byte hand
+records, all little-endian. Packets are packed straight from NumPy arrays
+into a preallocated buffer, so nothing is formatted as text per frame.
+
+    header  magic b'HLMK', version u16, hand_count u16, stream_id u32,
+            frame_index u64, timestamp f64 (time.time()), width u16, height u16
+    hand    landmarks f32[21][3] (x, y normalized to the frame, MediaPipe z),
+            box i32[4] (x_min, y_min, x_max, y_max pixels), handedness i8
+            (index into HANDEDNESS_LABELS, -1 unknown), gesture u8 (index into
+            GESTURE_NAMES), 2 padding bytes, handedness score f32
+
+Addresses are 'udp://host:port' or 'unix:///path/to/socket'.
+
+    python landmark_stream.py unix:///tmp/hands.sock    # print what a publisher sends
+"""
+import argparse
+import os
+import socket
+
+import numpy as np
+
+MAGIC = b'HLMK'
+VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('hand_count', '<u2'),
+    ('stream_id', '<u4'),
+    ('frame_index', '<u8'),
+    ('timestamp', '<f8'),
+    ('width', '<u2'),
+    ('height', '<u2'),
+])
+HAND_DTYPE = np.dtype([
+    ('landmarks', '<f4', (21, 3)),
+    ('box', '<i4', (4,)),
+    ('handedness', 'i1'),
+    ('gesture', 'u1'),
+    ('padding', 'V2'),
+    ('score', '<f4'),
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+HAND_SIZE = HAND_DTYPE.itemsize
+MAX_HANDS = 16
+
+
+def parse_address(address):
+    """Split 'udp://host:port' or 'unix:///path' into (socket family, address)"""
+    if address.startswith('udp://'):
+        host, _, port = address[len('udp://'):].rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError(f"Expected udp://host:port, got {address!r}")
+        return socket.AF_INET, (host, int(port))
+    if address.startswith('unix://'):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix domain sockets are not available on this platform, use udp://")
+        return socket.AF_UNIX, address[len('unix://'):]
+    raise ValueError(f"Unknown landmark stream address {address!r}, expected udp://host:port or unix:///path")
+
+
+def packet_size(hand_count):
+    return HEADER_SIZE + hand_count * HAND_SIZE
+
+
+class LandmarkPublisher:
+    """
+    Sends one datagram per frame to a subscriber
+    The socket is non-blocking: if nobody is listening or the receiver is
+    full the packet is dropped and counted, the frame loop never waits
+    """
+
+    def __init__(self, address, stream_id=0, max_hands=2):
+        if not 0 < max_hands <= MAX_HANDS:
+            raise ValueError(f"max_hands must be between 1 and {MAX_HANDS}, got {max_hands}")
+        self.family, self.address = parse_address(address)
+        self.socket = socket.socket(self.family, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.max_hands = max_hands
+
+        self.buffer = bytearray(packet_size(max_hands))
+        self.header = np.frombuffer(self.buffer, HEADER_DTYPE, count=1)[0:1]
+        self.hands = np.frombuffer(self.buffer, HAND_DTYPE, count=max_hands, offset=HEADER_SIZE)
+        self.view = memoryview(self.buffer)
+        self.header['magic'] = MAGIC
+        self.header['version'] = VERSION
+        self.header['stream_id'] = stream_id
+
+        self.frame_index = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def publish(self, timestamp, frame_size, landmarks, boxes, handedness, gestures, scores=None):
+        """
+        Pack and send one frame
+        landmarks (n, 21, 3), boxes (n, 4), handedness (n,), gestures (n,) ids and
+        scores (n,) are arrays such as the views returned by find_hands_array
+        Returns False when the packet was dropped
+        """
+        n = min(len(landmarks), self.max_hands)
+        header = self.header
+        header['hand_count'] = n
+        header['frame_index'] = self.frame_index
+        header['timestamp'] = timestamp
+        header['width'], header['height'] = frame_size
+        self.frame_index += 1
+
+        if n:
+            hands = self.hands[:n]
+            hands['landmarks'] = landmarks[:n]
+            hands['box'] = boxes[:n]
+            hands['handedness'] = handedness[:n]
+            hands['gesture'] = gestures[:n]
+            hands['score'] = scores[:n] if scores is not None else 0.0
+
+        try:
+            self.socket.sendto(self.view[:packet_size(n)], self.address)
+        except (BlockingIOError, ConnectionRefusedError, FileNotFoundError):
+            self.dropped += 1
+            return False
+        self.sent += 1
+        return True
+
+    def stats(self):
+        return {'sent': self.sent, 'dropped': self.dropped}
+
+    def close(self):
+        self.socket.close()
+
+
+class LandmarkFrame:
+    """One received frame; the hand fields are views into the subscriber's buffer unless copied"""
+
+    __slots__ = ('stream_id', 'frame_index', 'timestamp', 'width', 'height',
+                 'landmarks', 'boxes', 'handedness', 'gestures', 'scores')
+
+    def __init__(self, header, hands):
+        self.stream_id = int(header['stream_id'])
+        self.frame_index = int(header['frame_index'])
+        self.timestamp = float(header['timestamp'])
+        self.width = int(header['width'])
+        self.height = int(header['height'])
+        self.landmarks = hands['landmarks']
+        self.boxes = hands['box']
+        self.handedness = hands['handedness']
+        self.gestures = hands['gesture']
+        self.scores = hands['score']
+
+    @property
+    def hand_count(self):
+        return len(self.landmarks)
+
+    def pixel_landmarks(self):
+        """(n, 21, 2) landmark pixel coordinates"""
+        return (self.landmarks[..., :2] * (self.width, self.height)).astype(np.int32)
+
+
+class LandmarkSubscriber:
+    """Binds the address and decodes the packets a LandmarkPublisher sends to it"""
+
+    def __init__(self, address, timeout=None):
+        self.family, self.address = parse_address(address)
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.remove(self.address)
+        self.socket = socket.socket(self.family, socket.SOCK_DGRAM)
+        self.socket.bind(self.address)
+        self.socket.settimeout(timeout)
+
+        self.buffer = bytearray(packet_size(MAX_HANDS))
+        self.view = memoryview(self.buffer)
+        self.received = 0
+        self.invalid = 0
+
+    def receive(self, copy=False):
+        """
+        Wait for the next frame and return it as a LandmarkFrame
+        Returns None on timeout; with copy=False the arrays are overwritten by the next receive
+        """
+        while True:
+            try:
+                size = self.socket.recv_into(self.view)
+            except socket.timeout:
+                return None
+            if size < HEADER_SIZE:
+                self.invalid += 1
+                continue
+            header = np.frombuffer(self.buffer, HEADER_DTYPE, count=1)[0]
+            n = int(header['hand_count'])
+            if header['magic'] != MAGIC or header['version'] != VERSION or size != packet_size(n):
+                self.invalid += 1
+                continue
+            hands = np.frombuffer(self.buffer, HAND_DTYPE, count=n, offset=HEADER_SIZE)
+            self.received += 1
+            if copy:
+                return LandmarkFrame(header.copy(), hands.copy())
+            return LandmarkFrame(header, hands)
+
+    def __iter__(self):
+        while True:
+            frame = self.receive()
+            if frame is None:
+                return
+            yield frame
+
+    def close(self):
+        self.socket.close()
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.remove(self.address)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Print frames received from a landmark publisher")
+    parser.add_argument("address", help="udp://host:port or unix:///path/to/socket")
+    parser.add_argument("--timeout", type=float, default=None, help="Stop after this many idle seconds")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from gesture_classifier import GESTURE_NAMES
+
+    args = parse_args()
+    subscriber = LandmarkSubscriber(args.address, args.timeout)
+    try:
+        for frame in subscriber:
+            gestures = [GESTURE_NAMES[g] if g < len(GESTURE_NAMES) else int(g) for g in frame.gestures]
+            print(f"stream {frame.stream_id} frame {frame.frame_index}: {frame.hand_count} hands {gestures}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
@@ -0,0 +1,393 @@
+"""
+Learned gesture classifiers over normalized landmarks
+
+An alternative to the rule table in gesture_classifier.py. Each hand's 21
+landmarks are translated to the wrist and divided by the wrist to middle
+finger MCP distance, so the features do not depend on the hand's position,
+size or the camera resolution. A k-nearest-neighbour or a one-hidden-layer
+MLP classifier is then fitted on labelled hands and stored as a .npz file.
+
+Both classifiers have the GestureClassifier interface (classify,
+classify_id, classify_batch, gesture_id), so a loaded model can replace a
+HandTracker's gesture_classifier.
+
+Datasets are .npz files with 'landmarks' (n, 21, 2|3) pixel coordinates and
+'labels' (n,) gesture names, or landmark recordings given as PATH=GESTURE,
+where every recorded hand is labelled GESTURE.
+
+    python learned_classifier.py train data.npz peace.hlrec="Peace Sign" -o gestures.npz --kind mlp
+    python learned_classifier.py eval gestures.npz test.npz
+"""
+import argparse
+import time
+
+import numpy as np
+
+from gesture_classifier import GESTURE_NAMES, NO_HAND, UNKNOWN, WRIST, palm_lengths
+
+FEATURE_SIZE = 42
+
+
+def landmark_features(landmarks):
+    """
+    Position and scale invariant features for (..., 21, 2|3) landmarks
+    Returns (..., 42) float32: x, y of every landmark relative to the wrist, in units of palm length
+    """
+    points = np.asarray(landmarks, dtype=np.float32)[..., :2]
+    if points.ndim < 2 or points.shape[-2] != 21:
+        raise ValueError(f"Expected landmarks of shape (..., 21, 2|3), got {np.shape(landmarks)}")
+    relative = points - points[..., WRIST:WRIST + 1, :]
+    scale = palm_lengths(points).astype(np.float32)
+    return (relative / scale[..., None, None]).reshape(points.shape[:-2] + (FEATURE_SIZE,))
+
+
+class LearnedGestureClassifier:
+    """
+    Base class of the learned classifiers
+    Subclasses implement _scores(features) -> (n, n_labels) class scores that sum to 1.
+    Hands whose best score is below min_confidence are reported as unknown.
+    """
+
+    kind = None
+
+    def __init__(self, labels, mean, std, min_confidence=0.0):
+        self.labels = list(labels)
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.std = np.asarray(std, dtype=np.float32)
+        self.min_confidence = min_confidence
+        # Ids index into gesture_names, which starts with GESTURE_NAMES so ids match the rule classifier
+        self.gesture_names = list(GESTURE_NAMES)
+        for label in self.labels:
+            if label not in self.gesture_names:
+                self.gesture_names.append(label)
+        self.label_ids = np.array([self.gesture_names.index(label) for label in self.labels], dtype=np.int16)
+
+    def _scores(self, features):
+        raise NotImplementedError
+
+    def _standardize(self, features):
+        return (features - self.mean) / self.std
+
+    def gesture_id(self, name):
+        """Id of a gesture name, UNKNOWN for names the classifier never produces"""
+        if name not in self.gesture_names:
+            return UNKNOWN
+        return self.gesture_names.index(name)
+
+    def predict_ids(self, landmarks):
+        """Gesture ids for an (n, 21, 2|3) array of hands"""
+        features = self._standardize(landmark_features(landmarks))
+        if len(features) == 0:
+            return np.zeros(0, dtype=np.int16)
+        scores = self._scores(features)
+        best = np.argmax(scores, axis=1)
+        ids = self.label_ids[best]
+        if self.min_confidence > 0:
+            ids = np.where(scores[np.arange(len(best)), best] >= self.min_confidence, ids, UNKNOWN)
+        return ids.astype(np.int16)
+
+    def classify_id(self, finger_states, hand_landmarks):
+        """Gesture id for one hand; finger_states is accepted for interface compatibility and unused"""
+        if hand_landmarks is None or len(hand_landmarks) == 0:
+            return NO_HAND
+        return int(self.predict_ids(np.asarray(hand_landmarks)[None])[0])
+
+    def classify(self, finger_states, hand_landmarks):
+        """Gesture name for one hand"""
+        return self.gesture_names[self.classify_id(finger_states, hand_landmarks)]
+
+    def classify_batch(self, finger_states, landmarks, as_ids=False):
+        """
+        Classify many hands at once
+        landmarks has shape (..., 21, 2|3); finger_states is unused
+        Returns an array of gesture ids, or a nested list of names unless as_ids
+        """
+        points = np.asarray(landmarks)
+        batch_shape = points.shape[:-2]
+        ids = self.predict_ids(points.reshape((-1,) + points.shape[-2:])).reshape(batch_shape)
+        if as_ids:
+            return ids
+        return np.asarray(self.gesture_names, dtype=object)[ids].tolist()
+
+    def register_gesture(self, name, fingers, predicate=None, priority=True):
+        raise ValueError("Learned classifiers are extended by retraining, not by registering rules")
+
+    def _arrays(self):
+        return {}
+
+    def save(self, path):
+        np.savez(path, kind=self.kind, labels=np.array(self.labels), mean=self.mean, std=self.std,
+                 min_confidence=self.min_confidence, **self._arrays())
+
+
+class KNNGestureClassifier(LearnedGestureClassifier):
+    """Majority vote of the k nearest training hands in standardized feature space"""
+
+    kind = 'knn'
+
+    def __init__(self, labels, mean, std, features, targets, k=5, min_confidence=0.0, chunk_size=1024):
+        super().__init__(labels, mean, std, min_confidence)
+        self.features = np.asarray(features, dtype=np.float32)
+        self.targets = np.asarray(targets, dtype=np.int64)
+        self.k = min(k, len(self.features))
+        self.chunk_size = chunk_size
+        self._norms = np.einsum('ij,ij->i', self.features, self.features)
+
+    def _scores(self, features):
+        n_labels = len(self.labels)
+        scores = np.empty((len(features), n_labels), dtype=np.float32)
+        # Chunked so thousands of queries never build one huge distance matrix
+        for start in range(0, len(features), self.chunk_size):
+            chunk = features[start:start + self.chunk_size]
+            # |a - b|^2 up to the per-query constant |a|^2, which does not change the ranking
+            distances = self._norms[None, :] - 2.0 * (chunk @ self.features.T)
+            nearest = np.argpartition(distances, self.k - 1, axis=1)[:, :self.k]
+            # Votes counted per (query, label) cell in one bincount
+            cells = self.targets[nearest] + (np.arange(len(chunk)) * n_labels)[:, None]
+            counts = np.bincount(cells.ravel(), minlength=len(chunk) * n_labels)
+            scores[start:start + len(chunk)] = counts.reshape(len(chunk), n_labels) / self.k
+        return scores
+
+    def _arrays(self):
+        return {'features': self.features, 'targets': self.targets, 'k': self.k}
+
+    @classmethod
+    def fit(cls, landmarks, labels, k=5, min_confidence=0.0):
+        names, targets = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+        features = landmark_features(landmarks)
+        mean, std = features.mean(axis=0), features.std(axis=0) + 1e-6
+        return cls(names.tolist(), mean, std, (features - mean) / std, targets, k, min_confidence)
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    np.exp(logits, out=logits)
+    logits /= logits.sum(axis=1, keepdims=True)
+    return logits
+
+
+class MLPGestureClassifier(LearnedGestureClassifier):
+    """Small fully connected network: features -> ReLU hidden layer -> softmax"""
+
+    kind = 'mlp'
+
+    def __init__(self, labels, mean, std, w1, b1, w2, b2, min_confidence=0.0):
+        super().__init__(labels, mean, std, min_confidence)
+        self.w1 = np.asarray(w1, dtype=np.float32)
+        self.b1 = np.asarray(b1, dtype=np.float32)
+        self.w2 = np.asarray(w2, dtype=np.float32)
+        self.b2 = np.asarray(b2, dtype=np.float32)
+
+    def _scores(self, features):
+        hidden = features @ self.w1
+        hidden += self.b1
+        np.maximum(hidden, 0, out=hidden)
+        logits = hidden @ self.w2
+        logits += self.b2
+        return _softmax(logits)
+
+    def _arrays(self):
+        return {'w1': self.w1, 'b1': self.b1, 'w2': self.w2, 'b2': self.b2}
+
+    @classmethod
+    def fit(cls, landmarks, labels, hidden=64, epochs=200, batch_size=256, learning_rate=0.01,
+            weight_decay=1e-4, min_confidence=0.0, seed=0):
+        """Train with Adam on softmax cross-entropy"""
+        names, targets = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+        features = landmark_features(landmarks)
+        mean, std = features.mean(axis=0), features.std(axis=0) + 1e-6
+        x = (features - mean) / std
+        n, n_labels = len(x), len(names)
+
+        rng = np.random.default_rng(seed)
+        params = [
+            rng.normal(0.0, np.sqrt(2.0 / FEATURE_SIZE), (FEATURE_SIZE, hidden)).astype(np.float32),
+            np.zeros(hidden, dtype=np.float32),
+            rng.normal(0.0, np.sqrt(1.0 / hidden), (hidden, n_labels)).astype(np.float32),
+            np.zeros(n_labels, dtype=np.float32),
+        ]
+        moments = [np.zeros_like(p) for p in params]
+        squares = [np.zeros_like(p) for p in params]
+        beta1, beta2, step = 0.9, 0.999, 0
+
+        for _ in range(epochs):
+            order = rng.permutation(n)
+            for start in range(0, n, batch_size):
+                rows = order[start:start + batch_size]
+                xb, yb = x[rows], targets[rows]
+                w1, b1, w2, b2 = params
+
+                pre = xb @ w1 + b1
+                hidden_out = np.maximum(pre, 0)
+                probs = _softmax(hidden_out @ w2 + b2)
+
+                # Cross-entropy gradient with respect to the logits
+                probs[np.arange(len(rows)), yb] -= 1.0
+                probs /= len(rows)
+                grad_w2 = hidden_out.T @ probs + weight_decay * w2
+                grad_b2 = probs.sum(axis=0)
+                grad_hidden = (probs @ w2.T) * (pre > 0)
+                grad_w1 = xb.T @ grad_hidden + weight_decay * w1
+                grad_b1 = grad_hidden.sum(axis=0)
+
+                step += 1
+                for param, grad, m, v in zip(params, (grad_w1, grad_b1, grad_w2, grad_b2), moments, squares):
+                    m *= beta1
+                    m += (1 - beta1) * grad
+                    v *= beta2
+                    v += (1 - beta2) * grad * grad
+                    m_hat = m / (1 - beta1 ** step)
+                    v_hat = v / (1 - beta2 ** step)
+                    param -= learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)
+
+        return cls(names.tolist(), mean, std, *params, min_confidence=min_confidence)
+
+
+CLASSIFIERS = {
+    'knn': KNNGestureClassifier,
+    'mlp': MLPGestureClassifier,
+}
+
+
+def load_classifier(path, min_confidence=None):
+    """Load a classifier saved with save(); min_confidence overrides the stored value"""
+    data = np.load(path)
+    kind = str(data['kind'])
+    if kind not in CLASSIFIERS:
+        raise ValueError(f"Unknown classifier kind {kind!r} in {path}")
+    confidence = float(data['min_confidence']) if min_confidence is None else min_confidence
+    common = (data['labels'].tolist(), data['mean'], data['std'])
+    if kind == 'knn':
+        return KNNGestureClassifier(*common, data['features'], data['targets'], int(data['k']), confidence)
+    return MLPGestureClassifier(*common, data['w1'], data['b1'], data['w2'], data['b2'], confidence)
+
+
+def load_dataset(sources):
+    """
+    Concatenate labelled hands from .npz datasets and PATH=GESTURE landmark recordings
+    Returns (landmarks (n, 21, 2) float32 pixels, labels (n,) names)
+    """
+    from landmark_recording import LandmarkRecording
+
+    all_landmarks, all_labels = [], []
+    for source in sources:
+        path, _, label = source.partition('=')
+        if label:
+            recording = LandmarkRecording(path)
+            records = recording.records
+            counts = records['hand_count'].astype(np.int64)
+            # Every valid hand slot of every frame
+            mask = np.arange(recording.max_hands)[None, :] < counts[:, None]
+            # Sub-pixel frame coordinates rebuilt from the normalized landmarks, as in replay.py
+            frame_sizes = np.stack([records['width'], records['height']], axis=-1).astype(np.float64)
+            frame_sizes = np.broadcast_to(frame_sizes[:, None], mask.shape + (2,))[mask]
+            landmarks = (records['landmarks'][mask][..., :2] * frame_sizes[:, None]).astype(np.float32)
+            labels = np.full(len(landmarks), label, dtype=object)
+        else:
+            data = np.load(path, allow_pickle=False)
+            landmarks = np.asarray(data['landmarks'], dtype=np.float32)[..., :2]
+            labels = data['labels'].astype(str).astype(object)
+        if len(landmarks) != len(labels):
+            raise ValueError(f"{path} has {len(landmarks)} hands but {len(labels)} labels")
+        all_landmarks.append(landmarks)
+        all_labels.append(labels)
+    if not all_landmarks:
+        raise ValueError("No datasets given")
+    return np.concatenate(all_landmarks), np.concatenate(all_labels).astype(str)
+
+
+def rule_predictions(landmarks):
+    """Gesture names from the rule engine, for comparison"""
+    from hand_tracker import finger_states_batch
+    from gesture_classifier import GestureClassifier
+
+    points = np.asarray(landmarks, dtype=np.float32)
+    ids = GestureClassifier().classify_batch(finger_states_batch(points), points, as_ids=True)
+    return np.asarray(GESTURE_NAMES, dtype=object)[ids].astype(str)
+
+
+def evaluate(classifier, landmarks, labels, repeats=3):
+    """
+    Accuracy and throughput of a classifier and of the rule engine on the same hands
+    Returns {'learned': {...}, 'rules': {...}} with accuracy, per-gesture accuracy and hands/s
+    """
+    def timed(predict):
+        best, predictions = float('inf'), None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            predictions = predict()
+            best = min(best, time.perf_counter() - start)
+        return predictions, len(labels) / best if best > 0 else 0.0
+
+    results = {}
+    candidates = {
+        'learned': lambda: np.asarray(classifier.classify_batch(None, landmarks), dtype=object).astype(str),
+        'rules': lambda: rule_predictions(landmarks),
+    }
+    for name, predict in candidates.items():
+        predictions, throughput = timed(predict)
+        correct = predictions == labels
+        results[name] = {
+            'accuracy': float(correct.mean()) if len(labels) else 0.0,
+            'per_gesture': {label: float(correct[labels == label].mean()) for label in np.unique(labels)},
+            'hands_per_second': throughput,
+        }
+    return results
+
+
+def split(landmarks, labels, test_fraction, seed=0):
+    order = np.random.default_rng(seed).permutation(len(labels))
+    n_test = int(len(labels) * test_fraction)
+    test, train = order[:n_test], order[n_test:]
+    return landmarks[train], labels[train], landmarks[test], labels[test]
+
+
+def print_evaluation(results):
+    for name, result in results.items():
+        print(f"{name:8s} accuracy {result['accuracy'] * 100:5.1f}%  {result['hands_per_second']:12.0f} hands/s")
+    print("per gesture:      learned    rules")
+    for label, accuracy in results['learned']['per_gesture'].items():
+        print(f"  {label:16s} {accuracy * 100:6.1f}%  {results['rules']['per_gesture'][label] * 100:6.1f}%")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train and evaluate learned gesture classifiers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="Fit a classifier and save it as .npz")
+    train.add_argument("datasets", nargs="+", help=".npz datasets or recording.hlrec=GESTURE")
+    train.add_argument("-o", "--output", default="gestures.npz", help="Model file to write")
+    train.add_argument("--kind", choices=sorted(CLASSIFIERS), default="mlp", help="Classifier type")
+    train.add_argument("--k", type=int, default=5, help="Neighbours for knn")
+    train.add_argument("--hidden", type=int, default=64, help="Hidden units for mlp")
+    train.add_argument("--epochs", type=int, default=200, help="Training epochs for mlp")
+    train.add_argument("--min-confidence", type=float, default=0.0,
+                       help="Report hands below this vote share / probability as unknown")
+    train.add_argument("--test-fraction", type=float, default=0.2,
+                       help="Share of the hands held out and evaluated after training")
+
+    evaluate_parser = commands.add_parser("eval", help="Compare a saved classifier with the rule engine")
+    evaluate_parser.add_argument("model", help="Model file written by train")
+    evaluate_parser.add_argument("datasets", nargs="+", help=".npz datasets or recording.hlrec=GESTURE")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    landmarks, labels = load_dataset(args.datasets)
+    if args.command == "train":
+        train_landmarks, train_labels, test_landmarks, test_labels = split(landmarks, labels, args.test_fraction)
+        start = time.perf_counter()
+        if args.kind == "knn":
+            classifier = KNNGestureClassifier.fit(train_landmarks, train_labels, args.k, args.min_confidence)
+        else:
+            classifier = MLPGestureClassifier.fit(train_landmarks, train_labels, args.hidden, args.epochs,
+                                                  min_confidence=args.min_confidence)
+        print(f"Trained {args.kind} on {len(train_labels)} hands in {time.perf_counter() - start:.1f} s")
+        classifier.save(args.output)
+        print(f"Saved {args.output}")
+        if len(test_labels):
+            print(f"Held-out evaluation on {len(test_labels)} hands:")
+            print_evaluation(evaluate(classifier, test_landmarks, test_labels))
+    else:
+        print_evaluation(evaluate(load_classifier(args.model), landmarks, labels))
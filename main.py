@@ -1,111 +1,250 @@
-import cv2
+import argparse
 import time
+import numpy as np
+import metrics
+from adaptive import hand_scale_controller
 from hand_tracker import HandTracker
 from gesture_actions import GestureActionHandler
+from gesture_classifier import palm_length
+from hand_tracks import HandTrackManager
+from pipeline import FramePipeline, open_source, is_live_source, format_stats
+from landmark_recording import LandmarkRecorder
+from learned_classifier import load_classifier
+from landmark_stream import LandmarkPublisher
+from motion_gate import MotionGate, add_arguments as add_motion_gate_arguments
+from renderer import Overlay, Renderer
+
+GESTURE_HOLD_TIME = 1.0  # seconds
+
+# Gestures that trigger an action once held for GESTURE_HOLD_TIME
+TIMED_ACTIONS = {
+    "Peace Sign": "lock_computer",
+    "Thumbs Up": "thumbs_up_action",
+}
+
+
+class GestureProcessor:
+    """
+    Runs hand tracking and gesture logic for one frame at a time
+    Returns (frame, overlay); nothing is drawn here, so a headless or rate
+    capped renderer skips the drawing work entirely
+    """
+
+    def __init__(self, tracker, action_handler, track_manager=None, collect_overlay=True, publisher=None,
+                 scale_controller=None, clock=time.time, motion_gate=None):
+        self.tracker = tracker
+        self.action_handler = action_handler
+        self.collect_overlay = collect_overlay
+        self.publisher = publisher
+        # Optional AdaptiveController that trades MediaPipe input size for latency
+        self.scale_controller = scale_controller
+        # Source of gesture hold times; replay passes the recorded timestamps
+        self.clock = clock
+        # Optional MotionGate; on static frames the previous hands are reused without running MediaPipe
+        self.motion_gate = motion_gate
+        self.last_hands = ([], [])
+        self.gesture_ids = np.zeros(tracker.max_hands, dtype=np.uint8)
+
+        # Each hand keeps its own gesture history and hold timer
+        self.track_manager = track_manager or HandTrackManager()
+
+    def classify(self, tracks):
+        """
+        Raw gestures for this frame's hands, from one batched finger-state and gesture call
+        Hands whose landmarks haven't moved since their last classification keep that gesture
+        """
+        tracker = self.tracker
+        gestures = [track.raw_gesture for track in tracks]
+        moving = [i for i, track in enumerate(tracks) if not (track.stationary and track.raw_gesture is not None)]
+        if moving:
+            # Sub-pixel landmarks for the gesture geometry
+            points = tracker.point_buffer[moving]
+            finger_states = tracker.get_finger_states_batch(points)
+            for i, gesture in zip(moving, tracker.get_hand_gestures_batch(finger_states, points)):
+                gestures[i] = gesture
+        return gestures
+
+    def __call__(self, frame):
+        tracker = self.tracker
+        action_handler = self.action_handler
+
+        # Find hands; landmarks are drawn later by the renderer
+        started = time.perf_counter()
+        gate = self.motion_gate
+        if gate is None or gate.should_run(frame, started):
+            frame, hands, boxes = tracker.find_hands(frame, draw=False)
+            self.last_hands = (hands, boxes)
+            if gate is not None:
+                gate.observe(len(hands))
+            if self.scale_controller is not None:
+                self.scale_controller.update(time.perf_counter() - started)
+        else:
+            # The tracker's buffers still hold these hands for the geometry and the publisher
+            hands, boxes = self.last_hands
+        tracks = self.track_manager.update(hands, boxes, tracker.get_handedness())
+        current_time = self.clock()
+        overlay = Overlay() if self.collect_overlay else None
+        self.gesture_ids[:] = 0
+        gestures = self.classify(tracks)
+
+        # Process each detected hand
+        for i, (hand, box, track, gesture) in enumerate(zip(hands, boxes, tracks, gestures)):
+            if not hand:
+                continue
+
+            # Sub-pixel landmarks for the gesture geometry
+            points = tracker.point_buffer[i]
+
+            # Debounced gesture for this hand
+            gesture = track.observe(gesture, current_time)
+            if self.publisher is not None:
+                self.gesture_ids[i] = tracker.gesture_classifier.gesture_id(gesture)
+
+            # Handle volume control gesture
+            if gesture == "Volume Control":
+                # Get index finger and thumb positions
+                index_tip = points[8]  # Index finger tip
+                thumb_tip = points[4]  # Thumb tip
+                action_handler.control_volume(index_tip, thumb_tip, palm_length(points))
+
+            # Peace sign locks and thumbs up unlocks once held long enough
+            elif gesture in TIMED_ACTIONS:
+                if not track.triggered and track.held_for(current_time) >= GESTURE_HOLD_TIME:
+                    getattr(action_handler, TIMED_ACTIONS[gesture])()
+                    track.triggered = True
+
+            if overlay is None:
+                continue
+
+            # Gesture text and timer above the hand
+            overlay.add_hand(hand)
+            x_min, y_min, x_max, y_max = box
+            text = f"#{track.track_id} {gesture}"
+
+            # Add timer for timed gestures
+            if gesture in TIMED_ACTIONS and not track.triggered:
+                text += f" ({track.held_for(current_time):.1f}s)"
+
+            overlay.add_text(text, (x_min, y_min - 10))
+
+        if self.publisher is not None:
+            # Straight from the tracker's buffers, which still hold this frame's hands
+            n = len(hands)
+            self.publisher.publish(current_time, (frame.shape[1], frame.shape[0]), tracker.landmark_buffer[:n],
+                                   tracker.box_buffer[:n], tracker.handedness_buffer[:n], self.gesture_ids[:n],
+                                   tracker.score_buffer[:n])
+
+        return frame, overlay
+
+
+def make_renderer(display=True, render_fps=30.0):
+    """Window renderer with the instructions cached as a static layer, or a headless one"""
+    return Renderer("Hand Tracking", headless=not display, max_fps=render_fps,
+                    static_texts=[('Press q to quit', (10, 30))])
+
+
+def main(source=0, drop_stale=None, queue_size=2, display=True, stats_interval=5.0, roi_mode=False,
+         render_fps=30.0, publish=None, metrics_json=None, metrics_port=None, metrics_interval=5.0,
+         adaptive_budget_ms=None, record=None, classifier=None, motion_gate=False, idle_after=10.0, idle_fps=2.0):
+    # Start loading MediaPipe in the background while the camera opens
+    gesture_classifier = load_classifier(classifier) if classifier else None
+    tracker = HandTracker(roi_mode=roi_mode, warm_start=True, gesture_classifier=gesture_classifier)
+
+    # Initialize webcam or video file
+    cap = open_source(source)
+    if not cap.isOpened():
+        print(f"Error: Could not open source {source}")
+        return
 
-def main():
-    # Initialize webcam
-    cap = cv2.VideoCapture(0)
-    tracker = HandTracker()
     action_handler = GestureActionHandler()
 
+    # Live cameras always process the newest frame, files are processed in full
+    if drop_stale is None:
+        drop_stale = is_live_source(source)
+
     print("Make a peace sign (✌️) to lock your computer")
     print("Hold index and thumb up to control volume")
     print("Hold thumbs up to unlock")
     print("Press 'q' to quit")
 
-    # Variables for gesture timing
-    gesture_start_time = None
-    GESTURE_HOLD_TIME = 1.0  # seconds
-    gesture_triggered = False
-    last_gesture = None
-
-    while True:
-        success, frame = cap.read()
-        if not success:
-            print("Failed to grab frame")
-            break
-
-        # Find and draw hands
-        frame, hands, boxes = tracker.find_hands(frame)
-        
-        # Process each detected hand
-        for i, hand in enumerate(hands):
-            if hand:
-                # Get finger states for this hand
-                finger_states = tracker.get_finger_state(hand)
-                
-                # Get gesture for this hand
-                gesture = tracker.get_hand_gesture(finger_states, hand)
-                
-                # Handle volume control gesture
-                if gesture == "Volume Control":
-                    # Get index finger and thumb positions
-                    index_tip = hand[8]  # Index finger tip
-                    thumb_tip = hand[4]  # Thumb tip
-                    action_handler.control_volume(index_tip, thumb_tip)
-                    gesture_start_time = None
-                    gesture_triggered = False
-                
-                # Handle peace sign gesture with timing
-                elif gesture == "Peace Sign":
-                    current_time = time.time()
-                    
-                    # Start timing if this is the first frame with peace sign
-                    if gesture_start_time is None:
-                        gesture_start_time = current_time
-                        gesture_triggered = False
-                    
-                    # Check if we've held the gesture long enough
-                    elif not gesture_triggered and (current_time - gesture_start_time) >= GESTURE_HOLD_TIME:
-                        action_handler.lock_computer()
-                        gesture_triggered = True
-                
-                # Handle thumbs up gesture with timing
-                elif gesture == "Thumbs Up":
-                    current_time = time.time()
-                    
-                    # Start timing if this is the first frame with thumbs up
-                    if gesture_start_time is None:
-                        gesture_start_time = current_time
-                        gesture_triggered = False
-                    
-                    # Check if we've held the gesture long enough
-                    elif not gesture_triggered and (current_time - gesture_start_time) >= GESTURE_HOLD_TIME:
-                        action_handler.thumbs_up_action()
-                        gesture_triggered = True
-                else:
-                    # Reset timing if gesture changes
-                    gesture_start_time = None
-                    gesture_triggered = False
-                
-                # Draw gesture text and timer above the hand
-                if boxes and i < len(boxes):
-                    x_min, y_min, x_max, y_max = boxes[i]
-                    text = gesture
-                    
-                    # Add timer for timed gestures
-                    if gesture in ["Peace Sign", "Thumbs Up"] and gesture_start_time is not None:
-                        elapsed = time.time() - gesture_start_time
-                        if not gesture_triggered:
-                            text += f" ({elapsed:.1f}s)"
-                    
-                    cv2.putText(frame, text, (x_min, y_min - 10),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-
-        # Display instructions
-        cv2.putText(frame, 'Press q to quit', (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-
-        # Show the frame
-        cv2.imshow("Hand Tracking", frame)
-        
-        # Break the loop if 'q' is pressed
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    stop_metrics = metrics.start_exporters(metrics_json, metrics_port, metrics_interval)
+    recorder = LandmarkRecorder(record, max_hands=tracker.max_hands) if record else None
+    tracker.recorder = recorder
+    renderer = make_renderer(display, render_fps)
+    publisher = LandmarkPublisher(publish, max_hands=tracker.max_hands) if publish else None
+    scale_controller = hand_scale_controller(tracker, adaptive_budget_ms / 1000) if adaptive_budget_ms else None
+    gate = MotionGate(idle_after=idle_after, idle_fps=idle_fps) if motion_gate else None
+    processor = GestureProcessor(tracker, action_handler, collect_overlay=display, publisher=publisher,
+                                 scale_controller=scale_controller, motion_gate=gate)
+    # While the gate is idle the capture thread itself slows down to --idle-fps
+    idle_delay = (lambda last_read: gate.idle_delay(since=last_read)) if gate is not None else None
+    pipeline = FramePipeline(cap, processor,
+                             queue_size=queue_size, drop_stale=drop_stale, idle_delay=idle_delay)
+    last_report = time.time()
+
+    def present(result):
+        nonlocal last_report
+        if stats_interval and time.time() - last_report >= stats_interval:
+            print(format_stats(pipeline.stats()))
+            last_report = time.time()
+        frame, overlay = result
+        return (renderer.present(frame, overlay) & 0xFF) != ord('q')
+
+    pipeline.run(present)
+    print(format_stats(pipeline.stats()))
+    print(f"Average latency: {pipeline.average_latency_ms():.1f} ms")
+    action_handler.close()
+    print(f"Actions: {action_handler.stats()}")
+    if display:
+        print(f"Render: {renderer.stats()}")
+    if scale_controller is not None:
+        print(f"Adaptive input scale: {scale_controller.stats()}")
+    if gate is not None:
+        print(f"Motion gate: {gate.stats()}")
+    if publisher is not None:
+        print(f"Published: {publisher.stats()}")
+        publisher.close()
+    if recorder is not None:
+        print(f"Recorded {recorder.frames} frames to {record}")
+        recorder.close()
 
     cap.release()
-    cv2.destroyAllWindows()
+    renderer.close()
+    stop_metrics()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hand tracking with gesture actions")
+    parser.add_argument("--source", default="0", help="Webcam index or video file path")
+    parser.add_argument("--queue-size", type=int, default=2, help="Capacity of each stage queue")
+    policy = parser.add_mutually_exclusive_group()
+    policy.add_argument("--drop-stale", dest="drop_stale", action="store_true", default=None,
+                        help="Always process the newest frame and drop stale ones")
+    policy.add_argument("--no-drop", dest="drop_stale", action="store_false",
+                        help="Process every frame, blocking capture when inference falls behind")
+    parser.add_argument("--no-display", "--headless", dest="display", action="store_false",
+                        help="Run without an OpenCV window and without drawing overlays")
+    parser.add_argument("--render-fps", type=float, default=30.0,
+                        help="Maximum frames shown per second, independent of processing (0 for every frame)")
+    parser.add_argument("--roi", dest="roi_mode", action="store_true",
+                        help="Track hands in a crop around the previous frame's hands")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="Seconds between pipeline stats reports (0 to disable)")
+    parser.add_argument("--publish", metavar="ADDRESS",
+                        help="Stream landmarks and gestures to udp://host:port or unix:///path (see landmark_stream.py)")
+    parser.add_argument("--adaptive-budget-ms", type=float,
+                        help="Hand tracking latency budget; MediaPipe input is downscaled while it is exceeded")
+    parser.add_argument("--record", metavar="PATH",
+                        help="Append every frame's landmarks to a recording for replay.py")
+    parser.add_argument("--classifier", metavar="MODEL",
+                        help="Classify gestures with a model trained by learned_classifier.py instead of the rules")
+    add_motion_gate_arguments(parser)
+    metrics.add_arguments(parser)
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    args = parse_args()
+    main(args.source, args.drop_stale, args.queue_size, args.display, args.stats_interval, args.roi_mode,
+         args.render_fps, args.publish, args.metrics_json, args.metrics_port, args.metrics_interval,
+         args.adaptive_budget_ms, args.record, args.classifier, args.motion_gate, args.idle_after, args.idle_fps)
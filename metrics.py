@@ -0,0 +1,342 @@
+"""
+Lightweight in-process metrics: counters, gauges, fixed-bucket histograms and timers
+
+Metrics are collected only after enable() is called. While disabled, a timed
+function costs one extra call and a flag check, and Histogram.time() hands
+back a shared no-op context manager. Everything can be exported as Prometheus
+text (export_prometheus, serve_prometheus) or written as JSON snapshots
+(write_json, JsonSnapshotWriter).
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds, from 50 us to 1 s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Counter:
+    """A value that only goes up"""
+
+    def __init__(self, registry, name, labels, description):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.description = description
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if not self.registry.enabled:
+            return
+        with self.lock:
+            self.value += amount
+
+    def snapshot(self):
+        with self.lock:
+            return {'value': self.value}
+
+
+class Gauge:
+    """
+    A value that can go up and down, such as a current operating point
+    Unlike counters and histograms it is kept while collection is disabled,
+    so enabling an export later still reports the current value
+    """
+
+    def __init__(self, registry, name, labels, description):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.description = description
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return {'value': self.value}
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram:
+    """Observations counted into fixed buckets, plus their sum and count"""
+
+    def __init__(self, registry, name, labels, description, buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.description = description
+        self.buckets = tuple(buckets)
+        # One extra slot for observations above the last bound (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        if not self.registry.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Context manager that observes the time spent inside it"""
+        return _Timer(self) if self.registry.enabled else _NULL_TIMER
+
+    def quantile(self, q):
+        """Approximate quantile: the upper bound of the bucket holding it"""
+        with self.lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        target = q * total
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        with self.lock:
+            counts, total, value_sum = list(self.counts), self.count, self.sum
+        return {
+            'count': total,
+            'sum': value_sum,
+            'mean': value_sum / total if total else 0.0,
+            'buckets': dict(zip([str(bound) for bound in self.buckets] + ['+Inf'], counts)),
+        }
+
+
+_KINDS = {Counter: 'counter', Gauge: 'gauge', Histogram: 'histogram'}
+
+
+class MetricsRegistry:
+    """Holds every metric by (name, labels); disabled until enable() is called"""
+
+    def __init__(self):
+        self.enabled = False
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, labels, description, **kwargs):
+        labels = tuple(sorted(labels.items())) if labels else ()
+        key = (name, labels)
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.get(key)
+                if metric is None:
+                    metric = cls(self, name, labels, description, **kwargs)
+                    self.metrics[key] = metric
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {type(metric).__name__}")
+        return metric
+
+    def counter(self, name, description="", labels=None):
+        return self._get(Counter, name, labels, description)
+
+    def gauge(self, name, description="", labels=None):
+        return self._get(Gauge, name, labels, description)
+
+    def histogram(self, name, description="", labels=None, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, labels, description, buckets=buckets)
+
+    def reset(self):
+        with self.lock:
+            for metric in self.metrics.values():
+                with metric.lock:
+                    if isinstance(metric, Histogram):
+                        metric.counts = [0] * len(metric.counts)
+                        metric.sum = 0.0
+                        metric.count = 0
+                    elif isinstance(metric, Counter):
+                        metric.value = 0
+
+    def snapshot(self):
+        """Plain dict of every metric, keyed by its Prometheus-style name"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {metric.name + _label_text(metric.labels): metric.snapshot() for metric in metrics}
+
+    def export_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: (metric.name, metric.labels))
+        lines = []
+        described = set()
+        for metric in metrics:
+            kind = _KINDS[type(metric)]
+            if metric.name not in described:
+                described.add(metric.name)
+                if metric.description:
+                    lines.append(f"# HELP {metric.name} {metric.description}")
+                lines.append(f"# TYPE {metric.name} {kind}")
+            if kind != 'histogram':
+                lines.append(f"{metric.name}{_label_text(metric.labels)} {metric.snapshot()['value']}")
+                continue
+            with metric.lock:
+                counts, total, value_sum = list(metric.counts), metric.count, metric.sum
+            cumulative = 0
+            for bound, count in zip([repr(bound) for bound in metric.buckets] + ['+Inf'], counts):
+                cumulative += count
+                labels = metric.labels + (('le', bound),)
+                lines.append(f"{metric.name}_bucket{_label_text(labels)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_label_text(metric.labels)} {value_sum!r}")
+            lines.append(f"{metric.name}_count{_label_text(metric.labels)} {total}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        """Write a snapshot to path atomically"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({'timestamp': time.time(), 'metrics': self.snapshot()}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+# Process-wide registry used by the instrumented modules
+registry = MetricsRegistry()
+
+
+def enable():
+    registry.enabled = True
+
+
+def disable():
+    registry.enabled = False
+
+
+def counter(name, description="", labels=None):
+    return registry.counter(name, description, labels)
+
+
+def gauge(name, description="", labels=None):
+    return registry.gauge(name, description, labels)
+
+
+def histogram(name, description="", labels=None, buckets=DEFAULT_BUCKETS):
+    return registry.histogram(name, description, labels, buckets)
+
+
+def timed(name, description=""):
+    """Decorator recording each call's duration in the histogram name"""
+    def decorate(func):
+        hist = registry.histogram(name, description)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class JsonSnapshotWriter:
+    """Writes the registry to a JSON file every interval seconds on a background thread"""
+
+    def __init__(self, path, interval=5.0, metrics_registry=None):
+        self.path = path
+        self.interval = interval
+        self.registry = metrics_registry or registry
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='metrics-json', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.registry.write_json(self.path)
+
+    def close(self):
+        """Stop the thread and write a final snapshot"""
+        self.stop_event.set()
+        self.thread.join(timeout=1.0)
+        self.registry.write_json(self.path)
+
+
+def serve_prometheus(port, host="127.0.0.1", metrics_registry=None):
+    """Serve /metrics in Prometheus text format from a daemon thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    source = metrics_registry or registry
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = source.export_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def start_exporters(json_path=None, port=None, interval=5.0):
+    """
+    Enable collection when an export is requested and start it
+    Returns a function that stops the exporters and writes the final JSON snapshot
+    """
+    if not json_path and not port:
+        return lambda: None
+    enable()
+    writer = JsonSnapshotWriter(json_path, interval) if json_path else None
+    server = serve_prometheus(port) if port else None
+
+    def stop():
+        if writer is not None:
+            writer.close()
+        if server is not None:
+            server.shutdown()
+    return stop
+
+
+def add_arguments(parser):
+    """The --metrics-json / --metrics-port / --metrics-interval options shared by the entry points"""
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write a metrics snapshot to this JSON file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-interval", type=float, default=5.0, help="Seconds between JSON snapshots")
@@ -0,0 +1,303 @@
+"""
+Registry and local cache for the object detection models
+
+Model files live in a cache directory (HAND_TRACKER_MODEL_DIR, default
+~/.cache/handmovementtracker/models). Files are downloaded once, checked
+against their pinned SHA-256 and recorded in a manifest; later loads only
+re-hash a file when its size or modification time no longer match the
+manifest. The Darknet configs ship with the repository in models/. With
+offline=True (or HAND_TRACKER_OFFLINE=1) nothing is ever downloaded.
+
+    python model_registry.py list
+    python model_registry.py fetch yolov3-tiny
+    python model_registry.py load yolov3-tiny --verify
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib.request
+
+import cv2
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "handmovementtracker", "models")
+MANIFEST_NAME = "manifest.json"
+CLASSES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "coco.names")
+BUNDLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+
+class ModelCacheError(Exception):
+    """Raised when a model file is missing offline or fails its checksum"""
+
+
+class ModelFile:
+    """
+    One file of a model: its cache name, where to get it and its expected SHA-256 (if pinned)
+    Bundled files are read from BUNDLED_DIR and never downloaded
+    """
+
+    def __init__(self, filename, url=None, sha256=None, bundled=False):
+        self.filename = filename
+        self.url = url
+        self.sha256 = sha256
+        self.bundled = bundled
+
+
+class ModelSpec:
+    """
+    A named detector
+    format is 'darknet' (files 'config' and 'weights') or 'onnx' (file 'model').
+    ONNX models must keep the Darknet YOLOv3 output layout: rows of
+    normalized (cx, cy, w, h, objectness, class scores...)
+    """
+
+    def __init__(self, name, format, files, input_size=416, description=""):
+        self.name = name
+        self.format = format
+        self.files = files
+        self.input_size = input_size
+        self.description = description
+
+
+MODELS = {}
+
+
+def register_model(spec):
+    if spec.format not in ('darknet', 'onnx'):
+        raise ValueError(f"Unknown model format {spec.format!r}, expected 'darknet' or 'onnx'")
+    MODELS[spec.name] = spec
+    return spec
+
+
+# The configs are bundled rather than fetched from a branch that can change under the pinned hash
+register_model(ModelSpec(
+    "yolov3", "darknet",
+    {
+        "config": ModelFile("yolov3.cfg", sha256="2707584747de1cbf3d1d7033ec0da1c60324a0a83e30db93ed8fa58ccbeb4753",
+                            bundled=True),
+        "weights": ModelFile("yolov3.weights", "https://pjreddie.com/media/files/yolov3.weights",
+                             sha256="523e4e69e1d015393a1b0a441cef1d9c7659e3eb2d7e15f793f060a21b32f297"),
+    },
+    description="Full YOLOv3, 240 MB of weights",
+))
+register_model(ModelSpec(
+    "yolov3-tiny", "darknet",
+    {
+        "config": ModelFile("yolov3-tiny.cfg",
+                            sha256="40f59687457f04b62b7d30300e7c11ed8269b554c39fd03f611db6d059c5bb77", bundled=True),
+        "weights": ModelFile("yolov3-tiny.weights", "https://pjreddie.com/media/files/yolov3-tiny.weights",
+                             sha256="dccea06f59b781ec1234ddf8d1e94b9519a97f4245748a7d4db75d5b7080a42c"),
+    },
+    description="YOLOv3-tiny, 34 MB of weights, several times faster to load and run",
+))
+
+
+def get_cache_dir(cache_dir=None):
+    return cache_dir or os.environ.get("HAND_TRACKER_MODEL_DIR") or DEFAULT_CACHE_DIR
+
+
+def is_offline(offline=None):
+    if offline is None:
+        return os.environ.get("HAND_TRACKER_OFFLINE", "") not in ("", "0")
+    return offline
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelCache:
+    """A cache directory plus its manifest of file checksums"""
+
+    def __init__(self, cache_dir=None, offline=None):
+        self.cache_dir = get_cache_dir(cache_dir)
+        self.offline = is_offline(offline)
+        self.manifest_path = os.path.join(self.cache_dir, MANIFEST_NAME)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def _save_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def locate(self, model_file):
+        """Path of an existing copy: the cache first, then the working directory (older setups)"""
+        if model_file.bundled:
+            path = os.path.join(BUNDLED_DIR, model_file.filename)
+            return path if os.path.exists(path) else None
+        for directory in (self.cache_dir, os.getcwd()):
+            path = os.path.join(directory, model_file.filename)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def download(self, model_file):
+        if model_file.bundled:
+            raise ModelCacheError(f"{model_file.filename} is missing from {BUNDLED_DIR}")
+        if model_file.url is None:
+            raise ModelCacheError(f"{model_file.filename} has no download URL, copy it into {self.cache_dir}")
+        if self.offline:
+            raise ModelCacheError(f"{model_file.filename} is not cached and offline mode is on")
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, model_file.filename)
+        print(f"Downloading {model_file.filename}...")
+        # Download next to the target and rename, so an interrupted download never looks cached
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out, urllib.request.urlopen(model_file.url) as response:
+                shutil.copyfileobj(response, out, 1 << 20)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def verify(self, model_file, path, force=False):
+        """
+        Check path against the pinned or recorded SHA-256
+        Unchanged files (same size and mtime as in the manifest) are trusted without hashing
+        Returns True if the file was hashed
+        """
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        entry = self.manifest.get(key)
+        unchanged = entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime
+        if unchanged and not force and (model_file.sha256 is None or entry["sha256"] == model_file.sha256):
+            return False
+
+        digest = file_sha256(path)
+        expected = model_file.sha256 or (entry["sha256"] if entry else None)
+        if expected is not None and digest != expected:
+            raise ModelCacheError(f"Checksum mismatch for {path}: expected {expected}, got {digest} "
+                                  f"(delete the file or its entry in {self.manifest_path} to replace it)")
+
+        self.manifest[key] = {"sha256": digest, "size": stat.st_size, "mtime": stat.st_mtime}
+        self._save_manifest()
+        return True
+
+    def fetch(self, model_file, force_verify=False):
+        """
+        Return a verified local path for model_file, downloading it if needed
+        Also returns (download_seconds, verify_seconds)
+        """
+        download_time = 0.0
+        path = self.locate(model_file)
+        if path is None:
+            start = time.perf_counter()
+            path = self.download(model_file)
+            download_time = time.perf_counter() - start
+            # A fresh download is checked against the pinned hash only, never a stale entry
+            self.manifest.pop(os.path.abspath(path), None)
+            force_verify = True
+
+        start = time.perf_counter()
+        try:
+            self.verify(model_file, path, force=force_verify)
+        except ModelCacheError:
+            if download_time:
+                os.remove(path)
+            raise
+        return path, download_time, time.perf_counter() - start
+
+
+def read_network(spec, paths):
+    if spec.format == "darknet":
+        return cv2.dnn.readNetFromDarknet(paths["config"], paths["weights"])
+    return cv2.dnn.readNetFromONNX(paths["model"])
+
+
+def load_classes(path=CLASSES_PATH):
+    if not os.path.exists(path):
+        path = "coco.names"
+    with open(path, "r") as f:
+        return [line.strip() for line in f.readlines()]
+
+
+def load_network(name="yolov3", cache_dir=None, offline=None, verify=False):
+    """
+    Fetch, verify and read a registered model
+    Returns (net, classes, spec, metrics) where metrics holds the load timings in milliseconds
+    """
+    if name not in MODELS:
+        raise ValueError(f"Unknown model {name!r}, expected one of {sorted(MODELS)}")
+    spec = MODELS[name]
+    cache = ModelCache(cache_dir, offline)
+
+    start = time.perf_counter()
+    paths = {}
+    download_time = verify_time = 0.0
+    for role, model_file in spec.files.items():
+        paths[role], downloaded, verified = cache.fetch(model_file, force_verify=verify)
+        download_time += downloaded
+        verify_time += verified
+
+    read_start = time.perf_counter()
+    net = read_network(spec, paths)
+    classes_start = time.perf_counter()
+    classes = load_classes()
+    end = time.perf_counter()
+
+    metrics = {
+        "model": name,
+        "format": spec.format,
+        "download_ms": download_time * 1000,
+        "verify_ms": verify_time * 1000,
+        "read_ms": (classes_start - read_start) * 1000,
+        "classes_ms": (end - classes_start) * 1000,
+        "total_ms": (end - start) * 1000,
+        "bytes": sum(os.path.getsize(path) for path in paths.values()),
+    }
+    return net, classes, spec, metrics
+
+
+def format_load_metrics(metrics):
+    return (f"{metrics['model']} ({metrics['format']}, {metrics['bytes'] / 1e6:.1f} MB) loaded in "
+            f"{metrics['total_ms']:.0f} ms: read {metrics['read_ms']:.0f} ms, "
+            f"verify {metrics['verify_ms']:.0f} ms, download {metrics['download_ms']:.0f} ms")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Manage the local object detection model cache")
+    parser.add_argument("command", choices=["list", "fetch", "load"])
+    parser.add_argument("models", nargs="*", help="Model names (default: all for list, yolov3 otherwise)")
+    parser.add_argument("--cache-dir", help=f"Cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--offline", action="store_true", help="Never download, fail if a file is missing")
+    parser.add_argument("--verify", action="store_true", help="Re-hash every file even if unchanged")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    names = args.models or (sorted(MODELS) if args.command == "list" else ["yolov3"])
+    offline = True if args.offline else None
+
+    if args.command == "list":
+        cache = ModelCache(args.cache_dir, offline)
+        print(f"Cache: {cache.cache_dir}")
+        for name in names:
+            spec = MODELS[name]
+            cached = all(cache.locate(model_file) for model_file in spec.files.values())
+            print(f"{name:<14} {spec.format:<8} {'cached ' if cached else 'missing'}  {spec.description}")
+    elif args.command == "fetch":
+        cache = ModelCache(args.cache_dir, offline)
+        for name in names:
+            for model_file in MODELS[name].files.values():
+                path, _, _ = cache.fetch(model_file, force_verify=args.verify)
+                print(f"{name}: {path}")
+    else:
+        for name in names:
+            _, _, _, metrics = load_network(name, args.cache_dir, offline, args.verify)
+            print(format_load_metrics(metrics))
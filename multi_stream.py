@@ -0,0 +1,310 @@
+"""
+Track hands on many video sources at once
+
+Every source gets its own capture thread and its own tracker state; a shared
+pool of worker threads processes whichever streams have a frame waiting.
+
+    python multi_stream.py 0 1 rtsp://camera-3/stream
+    python multi_stream.py lobby.mp4 door.mp4 --priority 3 1 --policy priority --workers 4
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+from pipeline import open_source, is_live_source
+
+POLICIES = ('fair', 'priority')
+
+
+class Stream:
+    """One source with its capture, processor, pending frames and counters"""
+
+    def __init__(self, name, source, processor, priority=1.0, drop_stale=None, queue_size=2):
+        if priority <= 0:
+            raise ValueError(f"priority must be positive, got {priority}")
+        self.name = name
+        self.source = source
+        self.processor = processor
+        self.priority = priority
+        self.drop_stale = is_live_source(source) if drop_stale is None else drop_stale
+        self.queue_size = queue_size
+        self.capture = None
+
+        self.pending = deque()
+        self.busy = False
+        self.ended = False
+        # Virtual time for stride scheduling: a stream is served when its pass is the lowest
+        self.pass_value = 0.0
+
+        self.frames_read = 0
+        self.dropped = 0
+        self.processed = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.process_total = 0.0
+        self.started_at = None
+        self.last_processed_at = None
+
+    def snapshot(self, now):
+        # Finished streams report their rate over the time they were actually running
+        end = self.last_processed_at if self.ended and not self.pending and self.last_processed_at else now
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            'source': self.source,
+            'priority': self.priority,
+            'read': self.frames_read,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'pending': len(self.pending),
+            'fps': self.processed / elapsed if elapsed > 0 else 0.0,
+            'avg_latency_ms': self.latency_total / self.processed * 1000 if self.processed else 0.0,
+            'max_latency_ms': self.latency_max * 1000,
+            'avg_process_ms': self.process_total / self.processed * 1000 if self.processed else 0.0,
+            'ended': self.ended,
+        }
+
+
+class MultiStreamRunner:
+    """
+    Schedules frames from several streams onto a pool of worker threads
+
+    Each stream is processed by at most one worker at a time, so its tracker
+    state is never shared. Ready streams are picked by stride scheduling: with
+    policy='fair' every stream gets the same share of the workers, with
+    policy='priority' a stream's share is proportional to its priority. Live
+    sources keep only their newest frames; files block their capture thread
+    until the pending frames have been processed.
+
+    process_factory(stream) builds the per-stream callable; each frame's
+    result is passed to on_result(stream, result) on the worker thread.
+    """
+
+    def __init__(self, process_factory, workers=None, policy='fair', queue_size=2, on_result=None):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        self.process_factory = process_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.policy = policy
+        self.queue_size = queue_size
+        self.on_result = on_result
+
+        self.streams = []
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.virtual_time = 0.0
+        self.threads = []
+
+    def add_stream(self, source, name=None, priority=1.0, drop_stale=None):
+        stream = Stream(name or str(source), source, None, priority, drop_stale, self.queue_size)
+        stream.processor = self.process_factory(stream)
+        self.streams.append(stream)
+        return stream
+
+    def _stride(self, stream):
+        return 1.0 if self.policy == 'fair' else 1.0 / stream.priority
+
+    def _capture_loop(self, stream):
+        capture = stream.capture
+        while not self.stop_event.is_set():
+            success, frame = capture.read()
+            if not success:
+                break
+            captured_at = time.perf_counter()
+            with self.condition:
+                stream.frames_read += 1
+                if not stream.drop_stale:
+                    while len(stream.pending) >= stream.queue_size and not self.stop_event.is_set():
+                        self.condition.wait(0.1)
+                elif len(stream.pending) >= stream.queue_size:
+                    stream.pending.popleft()
+                    stream.dropped += 1
+                if not stream.pending and not stream.busy:
+                    # An idle stream rejoins at the current virtual time instead of catching up
+                    stream.pass_value = max(stream.pass_value, self.virtual_time)
+                stream.pending.append((captured_at, frame))
+                self.condition.notify_all()
+        with self.condition:
+            stream.ended = True
+            self.condition.notify_all()
+        capture.release()
+
+    def _next_stream(self):
+        """Ready stream with the lowest pass value, or None"""
+        best = None
+        for stream in self.streams:
+            if stream.pending and not stream.busy and (best is None or stream.pass_value < best.pass_value):
+                best = stream
+        return best
+
+    def _finished(self):
+        return all(stream.ended and not stream.pending and not stream.busy for stream in self.streams)
+
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                stream = self._next_stream()
+                while stream is None:
+                    if self.stop_event.is_set() or self._finished():
+                        return
+                    self.condition.wait(0.1)
+                    stream = self._next_stream()
+                captured_at, frame = stream.pending.popleft()
+                stream.busy = True
+                self.virtual_time = stream.pass_value
+                stream.pass_value += self._stride(stream)
+                self.condition.notify_all()
+
+            start = time.perf_counter()
+            failed = False
+            try:
+                result = stream.processor(frame)
+            except Exception as e:
+                print(f"Error processing stream {stream.name}: {e}")
+                failed = True
+            end = time.perf_counter()
+
+            if not failed and self.on_result is not None:
+                self.on_result(stream, result)
+
+            with self.condition:
+                stream.busy = False
+                if failed:
+                    stream.errors += 1
+                else:
+                    stream.processed += 1
+                    stream.process_total += end - start
+                    stream.last_processed_at = end
+                    stream.latency_total += end - captured_at
+                    stream.latency_max = max(stream.latency_max, end - captured_at)
+                self.condition.notify_all()
+
+    def start(self):
+        for stream in self.streams:
+            stream.capture = open_source(stream.source)
+            if not stream.capture.isOpened():
+                print(f"Error: Could not open source {stream.source}")
+                stream.ended = True
+                continue
+            stream.started_at = time.perf_counter()
+            self.threads.append(threading.Thread(target=self._capture_loop, args=(stream,),
+                                                 name=f'capture-{stream.name}', daemon=True))
+        for i in range(self.workers):
+            self.threads.append(threading.Thread(target=self._worker_loop, name=f'stream-worker-{i}', daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+
+    def run(self, duration=None, stats_interval=None):
+        """Process every stream until all sources end, duration seconds pass or Ctrl+C"""
+        self.start()
+        deadline = time.perf_counter() + duration if duration else None
+        last_report = time.perf_counter()
+        try:
+            with self.condition:
+                while not self._finished():
+                    self.condition.wait(0.1)
+                    now = time.perf_counter()
+                    if deadline is not None and now >= deadline:
+                        break
+                    if stats_interval and now - last_report >= stats_interval:
+                        print(format_stream_stats(self.stats()))
+                        last_report = now
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stats(self):
+        """Per-stream read, processed and dropped counts, fps and capture-to-result latency"""
+        now = time.perf_counter()
+        with self.condition:
+            return {stream.name: stream.snapshot(now) for stream in self.streams}
+
+
+def format_stream_stats(stats):
+    """Format per-stream stats, one line per stream"""
+    return "\n".join(
+        f"{name}: {s['fps']:.1f} fps, {s['processed']} done, {s['dropped']} dropped, "
+        f"latency {s['avg_latency_ms']:.1f} ms avg / {s['max_latency_ms']:.1f} ms max"
+        for name, s in stats.items()
+    )
+
+
+def gesture_processor_factory(action_handler, publish=None):
+    """
+    Per-stream HandTracker and track state around the shared gesture logic from main.py
+    Every stream gets its own GestureActionHandler, so volume state is never fed by two
+    streams at once; they share action_handler's backend, executor and action cooldowns.
+    With publish every stream sends its landmarks to that address, tagged with its stream index
+    """
+    from gesture_actions import GestureActionHandler
+    from hand_tracker import HandTracker
+    from landmark_stream import LandmarkPublisher
+    from main import GestureProcessor
+
+    publishers = []
+
+    def factory(stream):
+        tracker = HandTracker(warm_start=True)
+        stream_actions = GestureActionHandler(action_handler.backend, action_handler.executor, action_handler.clock)
+        publisher = None
+        if publish:
+            publisher = LandmarkPublisher(publish, stream_id=len(publishers), max_hands=tracker.max_hands)
+            publishers.append(publisher)
+        return GestureProcessor(tracker, stream_actions, collect_overlay=False, publisher=publisher)
+    factory.publishers = publishers
+    return factory
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hand tracking across several video sources")
+    parser.add_argument("sources", nargs="+", help="Webcam indices, video files or stream URLs")
+    parser.add_argument("--priority", type=float, nargs="+",
+                        help="Priority per source, used with --policy priority (default: 1 each)")
+    parser.add_argument("--policy", choices=POLICIES, default="fair",
+                        help="Share workers equally, or in proportion to each source's priority")
+    parser.add_argument("--workers", type=int, default=None, help="Worker threads (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=2, help="Pending frames kept per source")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="Seconds between per-stream stats reports (0 to disable)")
+    parser.add_argument("--publish", metavar="ADDRESS",
+                        help="Stream every source's landmarks to udp://host:port or unix:///path")
+    parser.add_argument("--actions", action="store_true",
+                        help="Perform gesture actions (default: recognise gestures only)")
+    metrics.add_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from gesture_actions import GestureActionHandler
+
+    args = parse_args()
+    priorities = args.priority or [1.0] * len(args.sources)
+    if len(priorities) != len(args.sources):
+        raise SystemExit("--priority needs one value per source")
+
+    action_handler = GestureActionHandler(backend=None if args.actions else 'noop')
+    factory = gesture_processor_factory(action_handler, args.publish)
+    runner = MultiStreamRunner(factory, args.workers, args.policy, args.queue_size)
+    for source, priority in zip(args.sources, priorities):
+        runner.add_stream(source, priority=priority)
+
+    stop_metrics = metrics.start_exporters(args.metrics_json, args.metrics_port, args.metrics_interval)
+    runner.run(args.duration, args.stats_interval)
+    stop_metrics()
+    print(format_stream_stats(runner.stats()))
+    for publisher in factory.publishers:
+        publisher.close()
+    action_handler.close()
@@ -1,89 +1,189 @@
+import argparse
 import cv2
 import numpy as np
 import os
-import urllib.request
 import time
 from datetime import datetime
+import metrics
+from adaptive import hand_scale_controller, yolo_size_controller
 from hand_tracker import HandTracker
+from hand_tracks import HandTrackManager
+from interactions import InteractionTracker
+from motion_gate import MotionGate, add_arguments as add_motion_gate_arguments
+from model_registry import MODELS, load_network, format_load_metrics
+from renderer import Renderer, draw_hand
 
-def load_model():
-    # Load the pre-trained model and configuration
-    model_path = "yolov3.weights"
-    config_path = "yolov3.cfg"
-    
-    # Download the model files if they don't exist
-    if not os.path.exists(model_path):
-        print("Downloading YOLOv3 weights...")
-        # Using a mirror from GitHub
-        urllib.request.urlretrieve(
-            "https://github.com/AlexeyAB/darknet/releases/download/darknet_yolo_v3_optimal/yolov3.weights",
-            model_path
-        )
-    
-    if not os.path.exists(config_path):
-        print("Downloading YOLOv3 configuration...")
-        # Using the configuration from the darknet repository
-        urllib.request.urlretrieve(
-            "https://raw.githubusercontent.com/AlexeyAB/darknet/master/cfg/yolov3.cfg",
-            config_path
-        )
-    
-    # Load the network
-    net = cv2.dnn.readNetFromDarknet(config_path, model_path)
-    
-    # Load class names
-    with open("coco.names", "r") as f:
-        classes = [line.strip() for line in f.readlines()]
-    
-    return net, classes
+YOLO_FORWARD_SECONDS = metrics.histogram('yolo_forward_seconds', 'Blob creation and YOLO forward pass')
+YOLO_NMS_SECONDS = metrics.histogram('yolo_nms_seconds', 'Non-maximum suppression')
+BATCHED_FRAMES = metrics.counter('yolo_batched_frames_total', 'Frames detected through process_frames')
 
-def process_frame(frame, net, classes, confidence_threshold=0.5):
-    height, width, _ = frame.shape
-    
-    # Create a blob from the frame
-    blob = cv2.dnn.blobFromImage(frame, 1/255.0, (416, 416), swapRB=True, crop=False)
-    
-    # Set the input to the network
-    net.setInput(blob)
-    
-    # Get the output layer names
+def _resolve_output_layers(net):
     layer_names = net.getLayerNames()
-    output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers()]
-    
-    # Run forward pass
-    outputs = net.forward(output_layers)
-    
-    # Process detections
-    boxes = []
-    confidences = []
-    class_ids = []
-    
-    for output in outputs:
-        for detection in output:
-            scores = detection[5:]
-            class_id = np.argmax(scores)
-            confidence = scores[class_id]
-            
-            if confidence > confidence_threshold:
-                # Object detected
-                center_x = int(detection[0] * width)
-                center_y = int(detection[1] * height)
-                w = int(detection[2] * width)
-                h = int(detection[3] * height)
-                
-                # Rectangle coordinates
-                x = int(center_x - w / 2)
-                y = int(center_y - h / 2)
-                
-                boxes.append([x, y, w, h])
-                confidences.append(float(confidence))
-                class_ids.append(class_id)
-    
+    return [layer_names[i - 1] for i in np.asarray(net.getUnconnectedOutLayers()).flatten()]
+
+class YoloNet:
+    """
+    A cv2.dnn net together with its output layer names, resolved once when loaded
+    cv2.dnn.Net takes neither attributes nor weak references, so the names live
+    on this wrapper and go away with it; everything else is passed to the net
+    """
+
+    def __init__(self, net):
+        self.net = net
+        self.output_layers = _resolve_output_layers(net)
+
+    def __getattr__(self, name):
+        return getattr(self.net, name)
+
+def get_output_layers(net):
+    """Return the names of the network's unconnected output layers, cached on a YoloNet"""
+    if isinstance(net, YoloNet):
+        return net.output_layers
+    return _resolve_output_layers(net)
+
+def load_model(name="yolov3", cache_dir=None, offline=None, verify=False):
+    """
+    Load a registered model from the local cache (see model_registry.py)
+    Files are only downloaded when missing; returns (YoloNet, classes)
+    """
+    net, classes, spec, load_metrics = load_network(name, cache_dir, offline, verify)
+    print(format_load_metrics(load_metrics))
+    return YoloNet(net), classes
+
+def nms_boxes_batched(boxes, confidences, class_ids, score_threshold, nms_threshold):
+    """
+    Class-aware NMS: boxes only suppress boxes of the same class
+    cv2.dnn.NMSBoxesBatched needs OpenCV 4.7; on older versions every class is
+    moved to its own region of the plane so one NMSBoxes call cannot mix them
+    """
+    if hasattr(cv2.dnn, 'NMSBoxesBatched'):
+        return cv2.dnn.NMSBoxesBatched(boxes, confidences, class_ids, score_threshold, nms_threshold)
+    if not len(boxes):
+        return cv2.dnn.NMSBoxes(boxes, confidences, score_threshold, nms_threshold)
+    boxes = np.asarray(boxes, dtype=np.float64)
+    extent = (boxes[:, :2] + boxes[:, 2:]).max() - boxes[:, :2].min() + 1
+    shifted = boxes.copy()
+    shifted[:, :2] += np.asarray(class_ids, dtype=np.float64)[:, None] * extent
+    return cv2.dnn.NMSBoxes(shifted.tolist(), confidences, score_threshold, nms_threshold)
+
+@metrics.timed('yolo_postprocess_seconds', 'YOLO output decoding including NMS')
+def postprocess_detections(outputs, width, height, confidence_threshold=0.5, nms_threshold=0.4,
+                           class_aware_nms=False):
+    """
+    Decode YOLO outputs into pixel boxes and run non-maximum suppression
+    All candidate rows are scored, filtered and decoded with array operations
+    With class_aware_nms boxes only suppress other boxes of the same class
+    """
+    detections = np.concatenate(outputs, axis=0) if len(outputs) > 1 else outputs[0]
+    scores = detections[:, 5:]
+    class_ids = np.argmax(scores, axis=1)
+    confidences = scores[np.arange(len(scores)), class_ids]
+
+    # Object detected
+    mask = confidences > confidence_threshold
+    detections = detections[mask]
+    class_ids = class_ids[mask]
+    confidences = confidences[mask]
+
+    center_x = (detections[:, 0] * width).astype(np.int64)
+    center_y = (detections[:, 1] * height).astype(np.int64)
+    w = (detections[:, 2] * width).astype(np.int64)
+    h = (detections[:, 3] * height).astype(np.int64)
+
+    # Rectangle coordinates
+    x = (center_x - w / 2).astype(np.int64)
+    y = (center_y - h / 2).astype(np.int64)
+
+    boxes = np.stack([x, y, w, h], axis=1).tolist()
+    confidences = confidences.astype(float).tolist()
+    class_ids = class_ids.tolist()
+
     # Apply non-maximum suppression
-    indices = cv2.dnn.NMSBoxes(boxes, confidences, confidence_threshold, 0.4)
-    
+    with YOLO_NMS_SECONDS.time():
+        if class_aware_nms:
+            indices = nms_boxes_batched(boxes, confidences, class_ids, confidence_threshold, nms_threshold)
+        else:
+            indices = cv2.dnn.NMSBoxes(boxes, confidences, confidence_threshold, nms_threshold)
+
     return boxes, confidences, class_ids, indices
 
+@metrics.timed('yolo_process_frame_seconds', 'process_frame: forward pass and postprocessing')
+def process_frame(frame, net, classes, confidence_threshold=0.5, nms_threshold=0.4, class_aware_nms=False,
+                  input_size=416):
+    height, width, _ = frame.shape
+    
+    with YOLO_FORWARD_SECONDS.time():
+        # Create a blob from the frame
+        blob = cv2.dnn.blobFromImage(frame, 1/255.0, (input_size, input_size), swapRB=True, crop=False)
+        
+        # Set the input to the network
+        net.setInput(blob)
+        
+        # Run forward pass
+        outputs = net.forward(get_output_layers(net))
+    
+    return postprocess_detections(outputs, width, height, confidence_threshold, nms_threshold, class_aware_nms)
+
+class BlobBuffer:
+    """
+    Reusable NCHW input blob for batched YOLO
+    Fills the same values as cv2.dnn.blobFromImages(frames, 1/255, (size, size), swapRB=True, crop=False)
+    but resizes and converts every frame into arrays allocated once
+    """
+
+    def __init__(self, batch_size, input_size=416):
+        self.batch_size = 0
+        self.input_size = 0
+        self.ensure(batch_size, input_size)
+
+    def ensure(self, batch_size, input_size):
+        """Grow the buffer for batch_size frames, or reallocate it for a new input size"""
+        if batch_size > self.batch_size or input_size != self.input_size:
+            self.batch_size = max(batch_size, self.batch_size if input_size == self.input_size else 0)
+            self.input_size = input_size
+            self.blob = np.empty((self.batch_size, 3, input_size, input_size), dtype=np.float32)
+            self.resized = np.empty((input_size, input_size, 3), dtype=np.uint8)
+
+    def fill(self, frames, input_size=None):
+        input_size = input_size or self.input_size
+        self.ensure(len(frames), input_size)
+        size = (input_size, input_size)
+        for i, frame in enumerate(frames):
+            cv2.resize(frame, size, dst=self.resized)
+            # BGR -> RGB while going from HWC to CHW
+            for channel in range(3):
+                np.multiply(self.resized[..., 2 - channel], np.float32(1 / 255.0), out=self.blob[i, channel],
+                            casting='unsafe')
+        return self.blob[:len(frames)]
+
+@metrics.timed('yolo_process_frames_seconds', 'process_frames: one batched forward pass and postprocessing')
+def process_frames(frames, net, classes, confidence_threshold=0.5, nms_threshold=0.4, class_aware_nms=False,
+                   input_size=416, blob_buffer=None):
+    """
+    Run YOLO on several frames with a single forward pass
+    Returns one (boxes, confidences, class_ids, indices) tuple per frame, as process_frame does
+    """
+    if not len(frames):
+        return []
+    with YOLO_FORWARD_SECONDS.time():
+        if blob_buffer is not None:
+            blob = blob_buffer.fill(frames, input_size)
+        else:
+            blob = cv2.dnn.blobFromImages(frames, 1/255.0, (input_size, input_size), swapRB=True, crop=False)
+        net.setInput(blob)
+        outputs = net.forward(get_output_layers(net))
+    BATCHED_FRAMES.inc(len(frames))
+
+    # Each output layer holds the rows of every frame in batch order
+    per_frame = [np.asarray(output).reshape(len(frames), -1, output.shape[-1]) for output in outputs]
+    results = []
+    for i, frame in enumerate(frames):
+        height, width = frame.shape[:2]
+        results.append(postprocess_detections([output[i] for output in per_frame], width, height,
+                                              confidence_threshold, nms_threshold, class_aware_nms))
+    return results
+
+@metrics.timed('object_scanner_draw_seconds', 'draw_detections')
 def draw_detections(frame, boxes, confidences, class_ids, indices, classes, fps, hand_boxes=None, gesture_texts=None):
     if len(indices) > 0:
         for i in indices.flatten():
@@ -130,7 +230,12 @@ def save_frame(frame):
     cv2.imwrite(filename, frame)
     print(f"Saved screenshot: {filename}")
 
-def main():
+def main(detect_every=5, min_interval=0.0, propagation='flow', model="yolov3", cache_dir=None, offline=None,
+         headless=False, render_fps=30.0, metrics_json=None, metrics_port=None, metrics_interval=5.0,
+         adaptive_budget_ms=None, yolo_budget_ms=None, motion_gate=False, idle_after=10.0, idle_fps=2.0):
+    # Imported here because async_detector itself imports this module
+    from async_detector import AsyncObjectDetector
+
     # Initialize webcam
     cap = cv2.VideoCapture(0)
     
@@ -139,12 +244,15 @@ def main():
         return
     
     print("Loading models...")
-    net, classes = load_model()
+    net, classes = load_model(model, cache_dir, offline)
     hand_tracker = HandTracker()
     print("Models loaded successfully!")
+    renderer = Renderer('Object Detection with Hand Tracking', headless=headless, max_fps=render_fps)
+    stop_metrics = metrics.start_exporters(metrics_json, metrics_port, metrics_interval)
     
     # Initialize variables
     confidence_threshold = 0.5
+    class_aware_nms = False
     frame_count = 0
     start_time = time.time()
     fps = 0
@@ -153,6 +261,7 @@ def main():
     print("Press 'q' to quit")
     print("Press 's' to save screenshot")
     print("Press 'c' to toggle confidence threshold")
+    print("Press 'n' to toggle class-aware NMS")
     print("\nHand Gestures:")
     print("- Open Hand: All fingers up")
     print("- Closed Fist: All fingers down")
@@ -161,53 +270,126 @@ def main():
     print("- Gun Sign: Thumb and index fingers up")
     print("- Four Fingers: All fingers up except thumb")
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Could not read frame")
-            break
+    # Object detection runs on its own worker, hand tracking runs on every frame
+    detector = AsyncObjectDetector(net, classes, every_n_frames=detect_every, min_interval=min_interval,
+                                   confidence_threshold=confidence_threshold, propagation=propagation,
+                                   input_size=MODELS[model].input_size)
+    scale_controller = hand_scale_controller(hand_tracker, adaptive_budget_ms / 1000) if adaptive_budget_ms else None
+    interactions = InteractionTracker(classes)
+    # Stable hand ids, so a grab stays with its hand when MediaPipe reorders the hands
+    track_manager = HandTrackManager()
+    # Skips MediaPipe and YOLO on frames without motion, reusing the last hands and boxes
+    gate = MotionGate(idle_after=idle_after, idle_fps=idle_fps) if motion_gate else None
+    hands, hand_boxes, gestures, hand_ids = [], [], [], []
+    if yolo_budget_ms:
+        detector.size_controller = yolo_size_controller(detector, yolo_budget_ms / 1000)
+    
+    try:
+        while True:
+            if gate is not None:
+                # Low-fps idle mode when nobody has been in view for a while
+                delay = gate.idle_delay()
+                if delay:
+                    time.sleep(delay)
+
+            ret, frame = cap.read()
+            if not ret:
+                print("Error: Could not read frame")
+                break
         
-        # Calculate FPS
-        frame_count += 1
-        if frame_count >= 30:  # Update FPS every 30 frames
-            end_time = time.time()
-            fps = frame_count / (end_time - start_time)
-            frame_count = 0
-            start_time = time.time()
+            # Calculate FPS
+            frame_count += 1
+            if frame_count >= 30:  # Update FPS every 30 frames
+                end_time = time.time()
+                fps = frame_count / (end_time - start_time)
+                frame_count = 0
+                start_time = time.time()
         
-        # Process hand tracking
-        frame, hands, hand_boxes = hand_tracker.find_hands(frame)
-        gesture_texts = []
+            if gate is None or gate.should_run(frame):
+                # Queue object detection on the undrawn frame and carry the last boxes forward
+                detector.submit(frame)
         
-        if hands:
-            # Get finger states and gestures for each detected hand
-            for hand in hands:
-                finger_states = hand_tracker.get_finger_state(hand)
-                gesture = hand_tracker.get_hand_gesture(finger_states)
-                gesture_texts.append(gesture)
+                # Process hand tracking; landmarks are only drawn on frames that get shown
+                started = time.perf_counter()
+                frame, hands, hand_boxes = hand_tracker.find_hands(frame, draw=False)
+                if scale_controller is not None:
+                    scale_controller.update(time.perf_counter() - started)
+                if gate is not None:
+                    gate.observe(len(hands))
+                tracks = track_manager.update(hands, hand_boxes, hand_tracker.get_handedness())
+                hand_ids = [track.track_id for track in tracks]
         
-        # Process object detection
-        boxes, confidences, class_ids, indices = process_frame(frame, net, classes, confidence_threshold)
+                # Finger states and gestures for all detected hands in one batched call
+                # on the sub-pixel points, like main.py
+                hand_points = hand_tracker.point_buffer[:len(hands)]
+                finger_states = hand_tracker.get_finger_states_batch(hand_points)
+                gestures = list(hand_tracker.get_hand_gestures_batch(finger_states, hand_points))
+            gesture_texts = list(gestures)
         
-        # Draw detections
-        frame = draw_detections(frame, boxes, confidences, class_ids, indices, classes, fps, hand_boxes, gesture_texts)
+            # Latest object detections, checked against the fingertips on every frame
+            boxes, confidences, class_ids, indices = detector.get_detections()
+            points = hand_tracker.point_buffer[:len(hands)]
+            for event in interactions.update(points, hand_ids, boxes, class_ids, indices,
+                                             (frame.shape[1], frame.shape[0]), time.time()):
+                print(f"Hand #{event.hand_id} {event.kind} {event.label} ({event.duration:.1f}s)")
+            for i, hand_id in enumerate(hand_ids):
+                for label in interactions.held(hand_id):
+                    gesture_texts[i] += f" + {label}"
         
-        # Display the frame
-        cv2.imshow('Object Detection with Hand Tracking', frame)
+            if not renderer.due():
+                renderer.skip()
+                continue
+        
+            # Draw hands and detections
+            for hand in hands:
+                draw_hand(frame, hand)
+            frame = draw_detections(frame, boxes, confidences, class_ids, indices, classes, fps, hand_boxes, gesture_texts)
         
-        # Handle key presses
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
-            break
-        elif key == ord('s'):
-            save_frame(frame)
-        elif key == ord('c'):
-            confidence_threshold = 0.3 if confidence_threshold > 0.3 else 0.5
-            print(f"Confidence threshold: {confidence_threshold}")
+            # Display the frame and handle key presses
+            key = renderer.show(frame) & 0xFF
+            if key == ord('q'):
+                break
+            elif key == ord('s'):
+                save_frame(frame)
+            elif key == ord('c'):
+                confidence_threshold = 0.3 if confidence_threshold > 0.3 else 0.5
+                detector.confidence_threshold = confidence_threshold
+                print(f"Confidence threshold: {confidence_threshold}")
+            elif key == ord('n'):
+                class_aware_nms = not class_aware_nms
+                detector.class_aware_nms = class_aware_nms
+                print(f"Class-aware NMS: {'on' if class_aware_nms else 'off'}")
+    except KeyboardInterrupt:
+        pass
     
     # Clean up
+    if gate is not None:
+        print(f"Motion gate: {gate.stats()}")
+    detector.close()
     cap.release()
-    cv2.destroyAllWindows()
+    renderer.close()
+    stop_metrics()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Object detection with hand tracking")
+    parser.add_argument("--detect-every", type=int, default=5, help="Run YOLO every N frames")
+    parser.add_argument("--min-interval", type=float, default=0.0, help="Minimum seconds between YOLO runs")
+    parser.add_argument("--propagation", choices=["flow", "velocity", "none"], default="flow",
+                        help="How boxes are carried forward between detector runs")
+    parser.add_argument("--model", choices=sorted(MODELS), default="yolov3", help="Detector to load")
+    parser.add_argument("--model-dir", help="Model cache directory (default: ~/.cache/handmovementtracker/models)")
+    parser.add_argument("--offline", action="store_true", help="Never download model files")
+    parser.add_argument("--headless", action="store_true", help="No window and no drawing, stop with Ctrl+C")
+    parser.add_argument("--render-fps", type=float, default=30.0,
+                        help="Maximum frames shown per second, independent of processing (0 for every frame)")
+    parser.add_argument("--adaptive-budget-ms", type=float,
+                        help="Hand tracking latency budget; MediaPipe input is downscaled while it is exceeded")
+    parser.add_argument("--yolo-budget-ms", type=float,
+                        help="YOLO latency budget; the input size moves between 608, 416 and 320 to meet it")
+    add_motion_gate_arguments(parser)
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    main(args.detect_every, args.min_interval, args.propagation, args.model, args.model_dir,
+         True if args.offline else None, args.headless, args.render_fps,
+         args.metrics_json, args.metrics_port, args.metrics_interval,
+         args.adaptive_budget_ms, args.yolo_budget_ms, args.motion_gate, args.idle_after, args.idle_fps) 
\ No newline at end of file
@@ -0,0 +1,244 @@
+import queue
+import threading
+import time
+
+import cv2
+
+import metrics
+
+
+def open_source(source):
+    """Open a webcam index, a digit string or a video file path with OpenCV"""
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    return cv2.VideoCapture(source)
+
+
+def is_live_source(source):
+    """Device indices and network streams (rtsp://, http://, ...) are live, everything else is a file"""
+    if isinstance(source, int):
+        return True
+    return isinstance(source, str) and (source.isdigit() or "://" in source)
+
+
+class StageStats:
+    """Counters for a single pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.lock = threading.Lock()
+        self.histogram = metrics.histogram('pipeline_stage_seconds', 'Time per frame in each pipeline stage',
+                                           {'stage': name})
+        self.drop_counter = metrics.counter('pipeline_dropped_total', 'Stale frames dropped after each stage',
+                                            {'stage': name})
+        self.error_counter = metrics.counter('pipeline_errors_total', 'Frames whose capture or processing raised',
+                                             {'stage': name})
+
+    def record(self, elapsed):
+        with self.lock:
+            self.processed += 1
+            self.total_time += elapsed
+        self.histogram.observe(elapsed)
+
+    def record_drop(self):
+        with self.lock:
+            self.dropped += 1
+        self.drop_counter.inc()
+
+    def record_error(self):
+        with self.lock:
+            self.errors += 1
+        self.error_counter.inc()
+
+    def snapshot(self):
+        with self.lock:
+            avg_ms = self.total_time / self.processed * 1000 if self.processed else 0.0
+            return {'processed': self.processed, 'dropped': self.dropped, 'errors': self.errors, 'avg_ms': avg_ms}
+
+
+class FramePipeline:
+    """
+    Capture -> inference -> presentation pipeline joined by bounded queues
+
+    Capture and inference run on their own threads; presentation runs on the
+    calling thread because OpenCV windows must be driven from the main thread.
+    With drop_stale=True a full queue discards its oldest frame so the next
+    stage always works on the newest one; otherwise producers block.
+    idle_delay(last_read) may return the seconds the capture thread should
+    wait before its next read, e.g. to drop to a low frame rate while idle.
+    """
+
+    def __init__(self, capture, process, queue_size=2, drop_stale=True, idle_delay=None):
+        self.capture = capture
+        self.process = process
+        self.drop_stale = drop_stale
+        self.idle_delay = idle_delay
+
+        self.frame_queue = queue.Queue(maxsize=queue_size)
+        self.result_queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+
+        self.stage_stats = {
+            'capture': StageStats('capture'),
+            'inference': StageStats('inference'),
+            'presentation': StageStats('presentation'),
+        }
+        self.threads = []
+        self.latency_total = 0.0
+        self.latency_count = 0
+
+    def _put(self, target_queue, item, stats):
+        """Put an item on a queue, discarding the oldest entry when dropping stale frames"""
+        while not self.stop_event.is_set():
+            if self.drop_stale:
+                try:
+                    target_queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        target_queue.get_nowait()
+                        stats.record_drop()
+                    except queue.Empty:
+                        pass
+            else:
+                try:
+                    target_queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+    def _put_end(self, target_queue):
+        """Deliver the end-of-stream marker, making room for it once the pipeline is stopping"""
+        while True:
+            try:
+                target_queue.put(None, timeout=0.1)
+                return
+            except queue.Full:
+                if self.stop_event.is_set():
+                    try:
+                        target_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _capture_loop(self):
+        stats = self.stage_stats['capture']
+        last_read = None
+        try:
+            while not self.stop_event.is_set():
+                if self.idle_delay is not None and last_read is not None:
+                    delay = self.idle_delay(last_read)
+                    if delay:
+                        # Not reading at all while idle spares the camera and the decoder too
+                        if self.stop_event.wait(delay):
+                            break
+                start = last_read = time.perf_counter()
+                success, frame = self.capture.read()
+                if not success:
+                    break
+                stats.record(time.perf_counter() - start)
+                self._put(self.frame_queue, (time.perf_counter(), frame), stats)
+        except Exception as e:
+            # A failing camera or decoder ends the stream like its end would
+            print(f"Error capturing frame: {e}")
+            stats.record_error()
+        finally:
+            # The inference loop, and through it run(), waits for this marker
+            self._put_end(self.frame_queue)
+
+    def _inference_loop(self):
+        stats = self.stage_stats['inference']
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    item = self.frame_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                captured_at, frame = item
+                start = time.perf_counter()
+                try:
+                    result = self.process(frame)
+                except Exception as e:
+                    # One bad frame must not take the pipeline down; skip it and keep going
+                    print(f"Error processing frame: {e}")
+                    stats.record_error()
+                    continue
+                stats.record(time.perf_counter() - start)
+                self._put(self.result_queue, (captured_at, result), stats)
+        finally:
+            # run() waits for this marker, so it is sent however the loop ends
+            self._put_end(self.result_queue)
+
+    def start(self):
+        self.threads = [
+            threading.Thread(target=self._capture_loop, name='capture', daemon=True),
+            threading.Thread(target=self._inference_loop, name='inference', daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+
+    def run(self, present=None):
+        """
+        Run the pipeline until the source ends or present() returns False
+        present receives each processed result on the calling thread
+        """
+        stats = self.stage_stats['presentation']
+        self.start()
+        try:
+            while True:
+                try:
+                    item = self.result_queue.get(timeout=0.1)
+                except queue.Empty:
+                    if self.stop_event.is_set():
+                        break
+                    continue
+                if item is None:
+                    break
+                captured_at, result = item
+                start = time.perf_counter()
+                keep_running = present(result) if present is not None else True
+                end = time.perf_counter()
+                stats.record(end - start)
+                self.latency_total += end - captured_at
+                self.latency_count += 1
+                if keep_running is False:
+                    break
+        finally:
+            self.stop()
+
+    def stats(self):
+        """
+        Per-stage processed, dropped and error counts, average time and current input queue depth
+        A stage's dropped count is the number of its outputs discarded as stale
+        """
+        snapshot = {name: stage.snapshot() for name, stage in self.stage_stats.items()}
+        snapshot['capture']['queue_depth'] = 0
+        snapshot['inference']['queue_depth'] = self.frame_queue.qsize()
+        snapshot['presentation']['queue_depth'] = self.result_queue.qsize()
+        return snapshot
+
+    def average_latency_ms(self):
+        """Average capture-to-presentation latency"""
+        if not self.latency_count:
+            return 0.0
+        return self.latency_total / self.latency_count * 1000
+
+
+def format_stats(stats):
+    """Format pipeline stats as a single log line"""
+    return " | ".join(
+        f"{name}: {s['processed']} done, {s['dropped']} dropped, "
+        f"depth {s['queue_depth']}, {s['avg_ms']:.1f} ms"
+        + (f", {s['errors']} errors" if s.get('errors') else "")
+        for name, s in stats.items()
+    )
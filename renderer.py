@@ -0,0 +1,145 @@
+import time
+
+import cv2
+import numpy as np
+
+# Landmark pairs joined when drawing a hand (same topology as MediaPipe's HAND_CONNECTIONS)
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+
+# BGR colours per landmark: wrist, thumb, index, middle, ring, pinky
+_FINGER_COLORS = ((48, 48, 255), (180, 229, 255), (128, 64, 128), (0, 204, 255), (48, 255, 48), (192, 101, 21))
+LANDMARK_COLORS = tuple(_FINGER_COLORS[0 if i == 0 else (i - 1) // 4 + 1] for i in range(21))
+CONNECTION_COLOR = (224, 224, 224)
+
+_CONNECTION_INDEX = np.array(HAND_CONNECTIONS, dtype=np.intp)
+
+
+class TextLayer:
+    """
+    A piece of text that never changes, rendered once and blitted onto every frame
+    Only the pixels covered by the glyphs are copied
+    """
+
+    def __init__(self, text, origin, color=(0, 255, 0), scale=1.0, thickness=2, font=cv2.FONT_HERSHEY_SIMPLEX):
+        (width, height), baseline = cv2.getTextSize(text, font, scale, thickness)
+        pad = thickness
+        patch = np.zeros((height + baseline + 2 * pad, width + 2 * pad, 3), dtype=np.uint8)
+        cv2.putText(patch, text, (pad, height + pad), font, scale, color, thickness)
+
+        self.patch = patch
+        self.mask = patch.any(axis=2, keepdims=True)
+        self.x = origin[0] - pad
+        self.y = origin[1] - height - pad
+
+    def draw(self, frame):
+        h, w = self.patch.shape[:2]
+        x0, y0 = max(self.x, 0), max(self.y, 0)
+        x1, y1 = min(self.x + w, frame.shape[1]), min(self.y + h, frame.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+        px, py = x0 - self.x, y0 - self.y
+        np.copyto(frame[y0:y1, x0:x1], self.patch[py:py + y1 - y0, px:px + x1 - x0],
+                  where=self.mask[py:py + y1 - y0, px:px + x1 - x0])
+
+
+class Overlay:
+    """Everything to draw on one frame, collected during processing and drawn only if the frame is shown"""
+
+    __slots__ = ('hands', 'texts')
+
+    def __init__(self):
+        self.hands = []
+        self.texts = []
+
+    def add_hand(self, landmarks):
+        self.hands.append(landmarks)
+
+    def add_text(self, text, origin, color=(0, 255, 0), scale=0.9, thickness=2):
+        self.texts.append((text, origin, color, scale, thickness))
+
+
+def draw_hand(frame, landmarks, radius=4):
+    """Draw one hand's 21 (x, y) pixel landmarks and their connections"""
+    points = np.asarray(landmarks, dtype=np.int32)[:, :2]
+    cv2.polylines(frame, points[_CONNECTION_INDEX], False, CONNECTION_COLOR, 2)
+    for point, color in zip(points.tolist(), LANDMARK_COLORS):
+        cv2.circle(frame, tuple(point), radius, color, -1)
+
+
+class Renderer:
+    """
+    Draws overlays and shows frames, decoupled from the processing rate
+
+    Headless renderers never draw and never open a window. Otherwise frames are
+    shown at most max_fps times per second (None or 0 for every frame); frames
+    in between are dropped before any drawing happens. Static text layers are
+    rendered once and blitted onto every shown frame.
+    """
+
+    def __init__(self, window_name, headless=False, max_fps=30.0, static_texts=()):
+        self.window_name = window_name
+        self.headless = headless
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.static_layers = [TextLayer(*text) if isinstance(text, tuple) else text for text in static_texts]
+        self.last_render = None
+        self.rendered = 0
+        self.skipped = 0
+
+    def due(self, now=None):
+        """True when the next frame should be drawn and shown"""
+        if self.headless:
+            return False
+        if self.last_render is None or not self.min_interval:
+            return True
+        now = time.perf_counter() if now is None else now
+        return now - self.last_render >= self.min_interval
+
+    def draw(self, frame, overlay=None):
+        """Draw the static layers and an overlay onto frame"""
+        for layer in self.static_layers:
+            layer.draw(frame)
+        if overlay is None:
+            return frame
+        for landmarks in overlay.hands:
+            draw_hand(frame, landmarks)
+        for text, origin, color, scale, thickness in overlay.texts:
+            cv2.putText(frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+        return frame
+
+    def show(self, frame):
+        """
+        Show an already drawn frame and return the pressed key (-1 if none)
+        The key code is unmasked; compare key & 0xFF against ord(...)
+        """
+        self.last_render = time.perf_counter()
+        self.rendered += 1
+        cv2.imshow(self.window_name, frame)
+        return cv2.waitKey(1)
+
+    def skip(self):
+        """Count a frame that was processed but not shown"""
+        self.skipped += 1
+
+    def present(self, frame, overlay=None):
+        """
+        Draw and show frame if a render is due
+        Returns the pressed key, or -1 when nothing was shown
+        """
+        if not self.due():
+            self.skip()
+            return -1
+        self.draw(frame, overlay)
+        return self.show(frame)
+
+    def stats(self):
+        return {'rendered': self.rendered, 'skipped': self.skipped}
+
+    def close(self):
+        if not self.headless and self.rendered:
+            cv2.destroyWindow(self.window_name)
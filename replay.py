@@ -0,0 +1,135 @@
+"""
+Replay a landmark recording through the gesture and action logic
+
+No webcam or MediaPipe is needed: ReplayTracker hands the recorded
+landmarks to the unchanged GestureProcessor, and actions go to a
+RecordingBackend instead of the desktop. Hold timers, volume timing and
+action cooldowns follow the recorded timestamps, and actions run inline
+rather than through the executor's bounded queue, so a replay produces the
+same actions at full speed as it does at the recorded pace.
+
+    python main.py --record session.hlrec               # record a session
+    python replay.py session.hlrec                       # replay it as fast as possible
+    python replay.py session.hlrec --realtime --speed 2  # at twice the recorded pace
+"""
+import argparse
+import time
+
+import numpy as np
+
+from action_backends import RecordingBackend
+from action_executor import ActionExecutor
+from gesture_actions import GestureActionHandler
+from hand_tracker import HandTracker
+from landmark_recording import LandmarkRecording
+from main import GestureProcessor
+
+_BLANK_PIXEL = np.zeros((1, 1, 3), dtype=np.uint8)
+
+
+class ReplayTracker(HandTracker):
+    """HandTracker whose find_hands calls return the next recorded frame instead of running MediaPipe"""
+
+    def __init__(self, recording):
+        super().__init__(max_hands=recording.max_hands)
+        self.recording = recording
+        self.index = -1
+        self.timestamp = 0.0
+
+    def clock(self):
+        """Recorded time of the current frame, used in place of time.time()"""
+        return self.timestamp
+
+    def seek(self, index):
+        """Make the next find_hands call return frame index"""
+        self.index = index - 1
+
+    def find_hands_array(self, frame, draw=True):
+        self.index += 1
+        timestamp, frame_size, landmarks, pixels, boxes, handedness, scores = self.recording.frame(self.index)
+        n = len(landmarks)
+        self.timestamp = timestamp
+        self.landmark_buffer[:n] = landmarks
+        self.pixel_buffer[:n] = pixels
+        np.multiply(landmarks[:, :, :2], frame_size, out=self.point_buffer[:n], casting='same_kind')
+        self.box_buffer[:n] = boxes
+        self.handedness_buffer[:] = -1
+        self.handedness_buffer[:n] = handedness
+        self.score_buffer[:n] = scores
+        self.num_hands = n
+        return (frame, self.landmark_buffer[:n], self.pixel_buffer[:n], self.box_buffer[:n],
+                self.handedness_buffer[:n], self.score_buffer[:n])
+
+
+class ReplayEngine:
+    """
+    Drives the batched finger-state and gesture calls and the action handler from a recording
+    backend receives the actions and defaults to a RecordingBackend
+    """
+
+    def __init__(self, recording, backend=None):
+        if isinstance(recording, str):
+            recording = LandmarkRecording(recording)
+        self.recording = recording
+        self.backend = backend if backend is not None else RecordingBackend()
+        self.tracker = ReplayTracker(recording)
+        # Inline actions: at full speed a bounded queue would drop some of them
+        executor = ActionExecutor(clock=self.tracker.clock, synchronous=True)
+        self.action_handler = GestureActionHandler(self.backend, executor=executor, clock=self.tracker.clock)
+        self.processor = GestureProcessor(self.tracker, self.action_handler, collect_overlay=False,
+                                          clock=self.tracker.clock)
+
+    def run(self, realtime=False, speed=1.0, start=0, stop=None):
+        """
+        Replay frames start..stop, as fast as possible or at speed times the recorded pace
+        Waits for the queued actions and stops the action handler, so an engine runs once
+        """
+        if speed <= 0:
+            raise ValueError(f"speed must be positive, got {speed}")
+        records = self.recording.records
+        stop = len(records) if stop is None else min(stop, len(records))
+        self.tracker.seek(start)
+
+        started = time.perf_counter()
+        first_timestamp = float(records['timestamp'][start]) if start < stop else 0.0
+        for index in range(start, stop):
+            record = records[index]
+            if realtime:
+                due = started + (float(record['timestamp']) - first_timestamp) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            # Only the frame size matters to the gesture logic, so no pixels are allocated
+            frame = np.broadcast_to(_BLANK_PIXEL, (int(record['height']), int(record['width']), 3))
+            self.processor(frame)
+        elapsed = time.perf_counter() - started
+
+        self.action_handler.close()
+        frames = stop - start
+        return {
+            'frames': frames,
+            'elapsed': elapsed,
+            'fps': frames / elapsed if elapsed > 0 else 0.0,
+            'actions': self.action_handler.stats(),
+        }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay a landmark recording through the gesture logic")
+    parser.add_argument("recording", help="Recording written with main.py --record")
+    parser.add_argument("--realtime", action="store_true", help="Keep the recorded pace instead of full speed")
+    parser.add_argument("--speed", type=float, default=1.0, help="Pace multiplier for --realtime")
+    parser.add_argument("--start", type=int, default=0, help="First frame to replay")
+    parser.add_argument("--stop", type=int, default=None, help="Frame to stop before")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    engine = ReplayEngine(args.recording)
+    stats = engine.run(args.realtime, args.speed, args.start, args.stop)
+    first = engine.backend.events[0][0] if engine.backend.events else 0.0
+    for event in engine.backend.events:
+        print(f"{event[0] - first:8.3f} s  {' '.join(str(part) for part in event[1:])}")
+    print(f"Replayed {stats['frames']} frames in {stats['elapsed']:.2f} s ({stats['fps']:.0f} fps)")
+    print(f"Actions: {stats['actions']}")
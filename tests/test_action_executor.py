@@ -0,0 +1,153 @@
+import threading
+
+from action_backends import RecordingBackend
+from action_executor import ActionExecutor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def blocked_executor(**kwargs):
+    """An executor whose thread is stuck on a first job until the returned event is set"""
+    executor = ActionExecutor(**kwargs)
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5.0)
+
+    executor.submit('block', block)
+    assert started.wait(2.0)
+    return executor, release
+
+
+def test_jobs_run_in_order_off_the_calling_thread():
+    backend = RecordingBackend()
+    executor = ActionExecutor()
+    threads = []
+    try:
+        for key in ('a', 'b', 'c'):
+            assert executor.submit('press', backend.press, key)
+        executor.submit('thread', lambda: threads.append(threading.current_thread()))
+    finally:
+        executor.close()
+    assert backend.actions() == [('press', 'a', 1), ('press', 'b', 1), ('press', 'c', 1)]
+    assert threads == [executor.thread]
+    assert executor.stats()['executed'] == 4
+
+
+def test_full_queue_drops_new_jobs():
+    backend = RecordingBackend()
+    executor, release = blocked_executor(max_queue=2)
+    try:
+        results = [executor.submit('press', backend.press, key) for key in 'abcd']
+        assert results == [True, True, False, False]
+        stats = executor.stats()
+        assert (stats['queued'], stats['dropped'], stats['pending']) == (3, 2, 2)
+    finally:
+        release.set()
+        executor.close()
+    # The jobs that were queued still run, the dropped ones never do
+    assert backend.actions() == [('press', 'a', 1), ('press', 'b', 1)]
+
+
+def test_cooldown_skips_jobs_by_action_name():
+    backend = RecordingBackend()
+    clock = FakeClock()
+    executor = ActionExecutor(max_queue=16, cooldowns={'lock': 2.0}, clock=clock)
+    try:
+        for now in (0.0, 1.0, 1.9, 2.0, 3.0):
+            clock.now = now
+            executor.submit('lock', backend.lock_workstation)
+            # Other actions have no cooldown
+            executor.submit('press', backend.press, 'x')
+    finally:
+        executor.close()
+    assert backend.actions().count(('lock',)) == 2
+    assert backend.actions().count(('press', 'x', 1)) == 5
+    assert executor.stats()['cooldown_skipped'] == 3
+
+
+def test_cooldown_uses_submit_time_not_run_time():
+    # Jobs that sat in the queue are judged by when they were submitted
+    backend = RecordingBackend()
+    clock = FakeClock()
+    executor, release = blocked_executor(cooldowns={'lock': 1.0}, clock=clock)
+    try:
+        executor.submit('lock', backend.lock_workstation)
+        clock.now = 1.5
+        executor.submit('lock', backend.lock_workstation)
+        clock.now = 10.0
+    finally:
+        release.set()
+        executor.close()
+    assert backend.actions() == [('lock',), ('lock',)]
+
+
+def test_set_cooldown():
+    backend = RecordingBackend()
+    clock = FakeClock()
+    executor = ActionExecutor(clock=clock, synchronous=True)
+    executor.set_cooldown('press', 0.5)
+    for now in (0.0, 0.25, 0.5):
+        clock.now = now
+        executor.submit('press', backend.press, 'x')
+    assert len(backend.actions()) == 2
+
+
+def test_failing_job_is_counted_and_the_thread_survives():
+    backend = RecordingBackend()
+    executor = ActionExecutor()
+
+    def fail():
+        raise RuntimeError("no display")
+
+    try:
+        executor.submit('fail', fail)
+        executor.submit('press', backend.press, 'x')
+    finally:
+        executor.close()
+    assert backend.actions() == [('press', 'x', 1)]
+    stats = executor.stats()
+    assert (stats['errors'], stats['executed']) == (1, 1)
+
+
+def test_close_runs_queued_jobs_then_stops():
+    backend = RecordingBackend()
+    executor, release = blocked_executor()
+    for key in 'abc':
+        executor.submit('press', backend.press, key)
+    release.set()
+    executor.close()
+    assert not executor.thread.is_alive()
+    assert len(backend.actions()) == 3
+    assert executor.stats()['pending'] == 0
+
+
+def test_close_gives_up_after_the_timeout():
+    executor, release = blocked_executor()
+    try:
+        executor.close(timeout=0.05)
+        assert executor.thread.is_alive()
+    finally:
+        release.set()
+    executor.thread.join(2.0)
+    assert not executor.thread.is_alive()
+
+
+def test_synchronous_executor_runs_inline_and_never_drops():
+    backend = RecordingBackend()
+    executor = ActionExecutor(max_queue=1, synchronous=True)
+    assert executor.thread is None
+    for key in 'abcd':
+        assert executor.submit('press', backend.press, key)
+        assert backend.actions()[-1] == ('press', key, 1)
+    executor.close()
+    stats = executor.stats()
+    assert (stats['queued'], stats['executed'], stats['dropped']) == (4, 4, 0)
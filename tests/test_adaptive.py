@@ -0,0 +1,121 @@
+import pytest
+
+import metrics
+from adaptive import YOLO_SIZES, AdaptiveController, hand_scale_controller, yolo_size_controller
+
+BUDGET = 0.010
+SLOW = 0.020
+FAST = 0.002
+# Between budget * lower and budget * upper: neither over nor under
+STEADY = 0.008
+
+
+def controller(**kwargs):
+    applied = []
+    # smoothing=1.0 makes the average the last latency, so every decision follows the trace directly
+    kwargs = dict(dict(smoothing=1.0, down_patience=3, up_patience=5, cooldown=2), **kwargs)
+    ctrl = AdaptiveController('test_knob', (1.0, 0.75, 0.5), BUDGET, applied.append, **kwargs)
+    return ctrl, applied
+
+
+def feed(ctrl, latencies):
+    return [ctrl.update(latency) for latency in latencies]
+
+
+def test_bad_arguments_are_rejected():
+    with pytest.raises(ValueError):
+        AdaptiveController('test_knob', (), BUDGET)
+    with pytest.raises(ValueError):
+        AdaptiveController('test_knob', (1.0,), BUDGET, lower=1.0, upper=1.0)
+
+
+def test_start_level_is_applied_and_clamped():
+    ctrl, applied = controller(start=7)
+    assert ctrl.value == 0.5
+    assert applied == [0.5]
+
+
+def test_steps_down_after_down_patience_over_budget():
+    ctrl, applied = controller()
+    assert feed(ctrl, [SLOW] * 3) == [1.0, 1.0, 0.75]
+    assert applied == [1.0, 0.75]
+    assert ctrl.changes == 1
+
+
+def test_an_in_budget_frame_resets_the_patience():
+    ctrl, _ = controller()
+    assert feed(ctrl, [SLOW, SLOW, STEADY, SLOW, SLOW]) == [1.0] * 5
+    assert feed(ctrl, [SLOW]) == [0.75]
+
+
+def test_cooldown_holds_the_new_level():
+    ctrl, _ = controller()
+    feed(ctrl, [SLOW] * 3)
+    # Two held updates, then three more over budget for the next step
+    assert feed(ctrl, [SLOW] * 5) == [0.75, 0.75, 0.75, 0.75, 0.5]
+    # Already at the cheapest level
+    assert feed(ctrl, [SLOW] * 10) == [0.5] * 10
+    assert ctrl.changes == 2
+
+
+def test_steps_up_only_after_the_longer_up_patience():
+    ctrl, applied = controller(start=2)
+    assert feed(ctrl, [FAST] * 4) == [0.5] * 4
+    assert feed(ctrl, [FAST]) == [0.75]
+    assert applied == [0.5, 0.75]
+
+
+def test_hysteresis_band_does_not_oscillate():
+    ctrl, _ = controller(start=1)
+    # Latencies that wander inside the band between lower and upper never change the level
+    feed(ctrl, [STEADY, 0.0095, 0.0065, 0.0099, 0.007] * 20)
+    assert ctrl.value == 0.75
+    assert ctrl.changes == 0
+
+
+def test_alternating_load_settles_instead_of_flapping():
+    ctrl, _ = controller()
+    # Bursts too short for down_patience and gaps too short for up_patience
+    feed(ctrl, ([SLOW] * 2 + [FAST] * 4) * 20)
+    assert ctrl.changes == 0
+
+
+def test_smoothing_averages_out_a_single_spike():
+    ctrl, _ = controller(smoothing=0.2, down_patience=1)
+    feed(ctrl, [STEADY] * 5)
+    # One 15 ms spike only lifts the average to 9.4 ms
+    assert ctrl.update(0.015) == 1.0
+    assert ctrl.average == pytest.approx(0.0094)
+
+
+def test_step_resets_the_average():
+    ctrl, _ = controller(cooldown=0)
+    feed(ctrl, [SLOW] * 3)
+    assert ctrl.average is None
+    ctrl.update(FAST)
+    assert ctrl.average == FAST
+
+
+def test_operating_point_is_exported():
+    ctrl, _ = controller()
+    gauge = metrics.gauge('adaptive_operating_point', labels={'knob': 'test_knob'})
+    assert gauge.value == 1.0
+    feed(ctrl, [SLOW] * 3)
+    assert gauge.value == 0.75
+    assert ctrl.stats() == {'value': 0.75, 'average_ms': 0.0, 'budget_ms': 10.0, 'changes': 1}
+
+
+class Knobs:
+    input_scale = 1.0
+    input_size = 416
+
+
+def test_factories_drive_their_knob():
+    knobs = Knobs()
+    hands = hand_scale_controller(knobs, BUDGET, smoothing=1.0, down_patience=1)
+    yolo = yolo_size_controller(knobs, BUDGET, smoothing=1.0, down_patience=1)
+    assert yolo.value == 416 and knobs.input_size == 416
+    hands.update(SLOW)
+    yolo.update(SLOW)
+    assert knobs.input_scale == 0.75
+    assert knobs.input_size == YOLO_SIZES[-1]
@@ -0,0 +1,42 @@
+import time
+
+import numpy as np
+
+import async_detector
+from async_detector import AsyncObjectDetector
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_worker_survives_a_failing_run(monkeypatch):
+    calls = []
+
+    def process_frame(frame, *args):
+        calls.append(frame)
+        if len(calls) == 1:
+            raise RuntimeError("forward failed")
+        return [[10, 10, 20, 20]], [0.9], [3], np.array([0])
+
+    monkeypatch.setattr(async_detector, "process_frame", process_frame)
+    detector = AsyncObjectDetector(None, ["object"] * 4, every_n_frames=1, propagation='none')
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    try:
+        detector.submit(frame)
+        assert wait_for(lambda: detector.errors == 1 and not detector.busy)
+        assert detector.worker.is_alive()
+
+        # The next frame schedules a new run, whose detections come through
+        detector.submit(frame)
+        assert wait_for(lambda: detector.runs == 1)
+        detector.submit(frame)
+        boxes, confidences, class_ids, indices = detector.get_detections()
+        assert boxes == [[10, 10, 20, 20]] and class_ids == [3]
+    finally:
+        detector.close()
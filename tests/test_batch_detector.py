@@ -0,0 +1,147 @@
+import cv2
+import numpy as np
+import pytest
+
+from batch_detector import BatchedDetector
+from object_scanner import BlobBuffer, process_frames
+
+CLASSES = ["a", "b", "c", "d"]
+
+
+class FakeNet:
+    """
+    Stands in for a YOLO net with two output layers
+    For frame i of the batch it emits one detection whose class is the frame's red
+    value (as read back from the blob), centred in the frame with a 20% x 40% box.
+    Every other row scores zero, like the empty anchors of a real output.
+    """
+
+    def __init__(self, rows=(3, 2), fail=False):
+        self.rows = rows
+        self.fail = fail
+        self.blobs = []
+
+    def getLayerNames(self):
+        return ['conv_0', 'yolo_0', 'yolo_1']
+
+    def getUnconnectedOutLayers(self):
+        return np.array([2, 3])
+
+    def setInput(self, blob):
+        self.blobs.append(np.array(blob))
+
+    def forward(self, names):
+        if self.fail:
+            raise RuntimeError("forward failed")
+        blob = self.blobs[-1]
+        outputs = []
+        for layer, rows in enumerate(self.rows):
+            output = np.zeros((len(blob), rows, 5 + len(CLASSES)), dtype=np.float32)
+            if layer == 0:
+                for i in range(len(blob)):
+                    class_id = int(round(blob[i, 0, 0, 0] * 255)) % len(CLASSES)
+                    output[i, 1, :5] = (0.5, 0.5, 0.2, 0.4, 1.0)
+                    output[i, 1, 5 + class_id] = 0.9
+            # Darknet stacks the rows of every frame into one 2D array per layer
+            outputs.append(output.reshape(-1, output.shape[-1]))
+        return outputs
+
+
+def tagged_frame(red, height, width):
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[..., 2] = red
+    return frame
+
+
+SIZES = [(480, 640), (240, 320), (720, 1280), (100, 100), (64, 200)]
+
+
+def tagged_frames():
+    return [tagged_frame(i, height, width) for i, (height, width) in enumerate(SIZES)]
+
+
+def expected_detection(i):
+    height, width = SIZES[i]
+    w, h = int(0.2 * width), int(0.4 * height)
+    return [int(int(0.5 * width) - w / 2), int(int(0.5 * height) - h / 2), w, h], i % len(CLASSES)
+
+
+@pytest.mark.parametrize("input_size", [320, 416])
+def test_blob_buffer_matches_blob_from_images(input_size):
+    rng = np.random.default_rng(input_size)
+    frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for height, width in SIZES]
+    expected = cv2.dnn.blobFromImages(frames, 1/255.0, (input_size, input_size), swapRB=True, crop=False)
+    buffer = BlobBuffer(2, input_size)
+    blob = buffer.fill(frames)
+    assert blob.shape == expected.shape and blob.dtype == np.float32
+    np.testing.assert_allclose(blob, expected, rtol=0, atol=1e-6)
+
+
+def test_blob_buffer_reuses_its_arrays():
+    buffer = BlobBuffer(4, 320)
+    frames = tagged_frames()[:3]
+    first = buffer.fill(frames)
+    second = buffer.fill(frames[:2])
+    assert np.shares_memory(first, second)
+    # A new input size reallocates, down to the requested batch
+    resized = buffer.fill(frames[:2], 416)
+    assert resized.shape == (2, 3, 416, 416)
+    assert buffer.blob.shape == (2, 3, 416, 416)
+
+
+@pytest.mark.parametrize("use_buffer", [False, True])
+def test_process_frames_splits_outputs_per_frame(use_buffer):
+    net = FakeNet()
+    frames = tagged_frames()
+    buffer = BlobBuffer(2, 320) if use_buffer else None
+    results = process_frames(frames, net, CLASSES, input_size=320, blob_buffer=buffer)
+    assert len(net.blobs) == 1 and net.blobs[0].shape == (len(frames), 3, 320, 320)
+    assert len(results) == len(frames)
+    for i, (boxes, confidences, class_ids, indices) in enumerate(results):
+        box, class_id = expected_detection(i)
+        assert boxes == [box]
+        assert class_ids == [class_id]
+        assert confidences == [pytest.approx(0.9)]
+        assert np.asarray(indices).flatten().tolist() == [0]
+
+
+def test_process_frames_without_frames():
+    net = FakeNet()
+    assert process_frames([], net, CLASSES) == []
+    assert not net.blobs
+
+
+def test_batched_detector_resolves_each_frame():
+    net = FakeNet()
+    detector = BatchedDetector(net, CLASSES, batch_size=2, max_wait=0.5, input_size=320)
+    try:
+        futures = [detector.submit(frame) for frame in tagged_frames()]
+        results = [future.result(timeout=5.0) for future in futures]
+    finally:
+        detector.close()
+    for i, (boxes, confidences, class_ids, indices) in enumerate(results):
+        assert (boxes, class_ids) == ([expected_detection(i)[0]], [expected_detection(i)[1]])
+    assert all(len(blob) <= 2 for blob in net.blobs)
+    assert detector.stats()['frames'] == len(SIZES)
+    assert detector.stats()['batches'] == len(net.blobs)
+
+
+def test_batched_detector_fails_the_whole_batch_and_keeps_running():
+    net = FakeNet(fail=True)
+    detector = BatchedDetector(net, CLASSES, batch_size=4, max_wait=0.5, input_size=320)
+    try:
+        failed = [detector.submit(frame) for frame in tagged_frames()[:2]]
+        for future in failed:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5.0)
+        net.fail = False
+        boxes, _, class_ids, _ = detector.submit(tagged_frame(3, 480, 640)).result(timeout=5.0)
+        assert class_ids == [3]
+    finally:
+        detector.close()
+    assert detector.stats()['frames'] == 1
+
+
+def test_batch_size_must_be_positive():
+    with pytest.raises(ValueError):
+        BatchedDetector(FakeNet(), CLASSES, batch_size=0)
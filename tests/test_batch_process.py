@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+
+import batch_process
+from gesture_classifier import GestureClassifier
+from hand_tracker import HandTracker, finger_states_batch
+from test_hand_tracker import BlobHands, blob_frame
+
+
+def test_chunks_store_and_classify_sub_pixel_points(tmp_path, monkeypatch):
+    tracker = HandTracker(mode=True)
+    tracker.hands = BlobHands()
+    monkeypatch.setitem(batch_process._trackers, True, tracker)
+
+    paths = []
+    for i in range(4):
+        # Odd blob sizes put landmarks on half pixels
+        path = str(tmp_path / f"frame{i}.png")
+        cv2.imwrite(path, blob_frame([(100 + 7 * i, 200, 41, 61), (400, 150 + 3 * i, 33, 45)], (640, 480)))
+        paths.append(path)
+
+    chunk_path = str(tmp_path / "chunk.npz")
+    batch_process._process_task(('images', paths, 0, None, chunk_path))
+    results = batch_process.load_results([chunk_path])
+
+    points = results['landmarks'][..., :2]
+    assert results['hand_count'].tolist() == [2, 2, 2, 2]
+    assert np.any(points != np.floor(points))
+    ids = GestureClassifier().classify_batch(finger_states_batch(points), points, as_ids=True)
+    np.testing.assert_array_equal(results['gesture'], ids)
+    # The frame size recovers MediaPipe's normalized coordinates
+    np.testing.assert_array_equal(results['frame_size'], [[640, 480]] * 4)
+    normalized = points / results['frame_size'][:, None, None].astype(np.float32)
+    assert normalized.max() <= 1.0
+
+
+def test_sources_with_the_same_name_get_separate_chunks(tmp_path):
+    for directory in ("a", "b", "x"):
+        (tmp_path / directory).mkdir()
+        for i in range(3):
+            cv2.imwrite(str(tmp_path / directory / f"{i}.png"), blob_frame([], (64, 48)))
+    video = str(tmp_path / "x.avi")
+    writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for _ in range(3):
+        writer.write(blob_frame([], (64, 48)))
+    writer.release()
+
+    sources = [str(tmp_path / "a"), str(tmp_path / "b" / ""), str(tmp_path / "x"), video]
+    tasks = batch_process.build_tasks(sources, str(tmp_path / "out"), chunk_size=2)
+    chunk_paths = [task[4] for task in tasks]
+    assert len(chunk_paths) == 8
+    assert len(set(chunk_paths)) == len(chunk_paths)
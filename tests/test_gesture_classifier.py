@@ -0,0 +1,204 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from gesture_classifier import GestureClassifier, palm_length, spacing, spacing_ok
+from hand_tracker import HandTracker
+
+ALL_STATES = [list(states) for states in itertools.product([False, True], repeat=5)]
+
+
+def reference_gesture(finger_states, hand_landmarks):
+    """
+    The if/elif cascade HandTracker.get_hand_gesture used before the table,
+    kept verbatim apart from the debug print. check_finger_spacing now measures
+    in palm lengths; it was 10 < distance < 150 pixels, the same range for the
+    ~100 px palm of a hand at 640x480.
+    """
+    def check_finger_spacing(tip1, tip2):
+        distance = np.linalg.norm(np.array(tip1) - np.array(tip2))
+        return bool(spacing_ok(distance, palm_length(hand_landmarks)))
+
+    if not finger_states or not hand_landmarks:
+        return "No hand detected"
+
+    thumb, index, middle, ring, pinky = finger_states
+
+    if index and thumb and not (middle or ring or pinky):
+        if check_finger_spacing(hand_landmarks[4], hand_landmarks[8]):
+            return "Volume Control"
+
+    if index and middle and not (ring or pinky or thumb):
+        if check_finger_spacing(hand_landmarks[8], hand_landmarks[12]):
+            return "Peace Sign"
+
+    fingers_up = sum(finger_states)
+
+    if fingers_up >= 4:
+        if all([index, middle, ring, pinky]):
+            return "Open Hand"
+    elif fingers_up == 0:
+        if not any([index, middle, ring, pinky, thumb]):
+            return "Closed Fist"
+    elif index and not (middle or ring or pinky):
+        if not thumb:
+            return "Pointing"
+    elif thumb and index and not (middle or ring or pinky):
+        if check_finger_spacing(hand_landmarks[4], hand_landmarks[8]):
+            return "Gun Sign"
+    elif all([index, middle, ring, pinky]) and not thumb:
+        if check_finger_spacing(hand_landmarks[8], hand_landmarks[20]):
+            return "Four Fingers"
+    elif fingers_up == 1:
+        if index and not any([middle, ring, pinky, thumb]):
+            return "Pointing"
+        elif middle and not any([index, ring, pinky, thumb]):
+            return "Middle Finger"
+        elif ring and not any([index, middle, pinky, thumb]):
+            return "Ring Up"
+        elif pinky and not any([index, middle, ring, thumb]):
+            return "Pinky Up"
+        elif thumb and not any([index, middle, ring, pinky]):
+            return "Thumbs Up"
+    elif fingers_up == 2:
+        if index and middle and not (ring or pinky or thumb):
+            if check_finger_spacing(hand_landmarks[8], hand_landmarks[12]):
+                return "Peace Sign"
+        elif thumb and index and not (middle or ring or pinky):
+            if check_finger_spacing(hand_landmarks[4], hand_landmarks[8]):
+                return "Gun Sign"
+        elif index and ring and not (middle or pinky or thumb):
+            if check_finger_spacing(hand_landmarks[8], hand_landmarks[16]):
+                return "Two Fingers"
+    elif fingers_up == 3:
+        if check_finger_spacing(hand_landmarks[8], hand_landmarks[20]):
+            return "Three Fingers"
+
+    return "Unknown Gesture"
+
+
+def hand_with_tips(tip_x):
+    """Landmarks with a 100 px palm and the five fingertips at the given x positions on one row"""
+    points = [[200, 300] for _ in range(21)]
+    points[9] = [200, 200]
+    for tip, x in zip((4, 8, 12, 16, 20), tip_x):
+        points[tip] = [x, 150]
+    return points
+
+
+# Every spacing pair (4-8, 8-12, 8-16, 8-20) between 0.1 and 1.5 palms, or all of them at zero distance
+SPACED = hand_with_tips([170, 200, 230, 260, 290])
+CRAMPED = hand_with_tips([200, 200, 200, 200, 200])
+
+
+def random_hands(count, seed=0):
+    """Hands whose spacing checks pass and fail in every mix"""
+    rng = np.random.default_rng(seed)
+    hands = rng.uniform(0, 400, (count, 21, 2))
+    hands[:, 0] = (200, 300)
+    hands[:, 9] = (200, 200)
+    hands[:, [4, 8, 12, 16, 20], 1] = 150
+    hands[:, [4, 8, 12, 16, 20], 0] = 200 + rng.choice([-200, -80, -5, 0, 5, 40, 120, 200], (count, 5))
+    return hands
+
+
+@pytest.mark.parametrize("hand", [SPACED, CRAMPED], ids=["spaced", "cramped"])
+@pytest.mark.parametrize("states", ALL_STATES, ids=lambda s: "".join("1" if f else "0" for f in s))
+def test_classify_matches_cascade(states, hand):
+    assert GestureClassifier().classify(states, hand) == reference_gesture(states, hand)
+
+
+def test_fixed_hands_exercise_both_spacing_outcomes():
+    # Otherwise the parametrized test above would not cover both branches of every spacing check
+    for tip1, tip2 in ((4, 8), (8, 12), (8, 16), (8, 20)):
+        for hand, expected in ((SPACED, True), (CRAMPED, False)):
+            distance = np.linalg.norm(np.subtract(hand[tip1], hand[tip2]))
+            assert bool(spacing_ok(distance, palm_length(hand))) is expected
+
+
+def test_classify_batch_matches_cascade():
+    classifier = GestureClassifier()
+    hands = np.concatenate([[SPACED, CRAMPED], random_hands(62)])
+    states = np.array(ALL_STATES, dtype=bool)
+    # Every finger combination on every hand, as a (32, 64) batch
+    batch_states = np.broadcast_to(states[:, None], (32, len(hands), 5))
+    batch_hands = np.broadcast_to(hands[None], (32, len(hands), 21, 2))
+
+    names = classifier.classify_batch(batch_states, batch_hands)
+    ids = classifier.classify_batch(batch_states, batch_hands, as_ids=True)
+    assert ids.shape == (32, len(hands))
+    for i, finger_states in enumerate(ALL_STATES):
+        for j, hand in enumerate(hands.tolist()):
+            expected = reference_gesture(finger_states, hand)
+            assert names[i][j] == expected
+            assert classifier.gesture_names[ids[i, j]] == expected
+
+
+def test_no_hand():
+    classifier = GestureClassifier()
+    assert classifier.classify([], SPACED) == "No hand detected"
+    assert classifier.classify([True] * 5, []) == "No hand detected"
+
+
+def test_register_gesture_with_wildcard_finger():
+    classifier = GestureClassifier()
+    # Index and pinky up, middle and ring down, thumb either way
+    classifier.register_gesture("Rock", (None, True, False, False, True))
+    for thumb in (False, True):
+        assert classifier.classify([thumb, True, False, False, True], SPACED) == "Rock"
+    # Other keys keep their built-in rules
+    for states in ALL_STATES:
+        if not (states[1] and states[4] and not states[2] and not states[3]):
+            assert classifier.classify(states, SPACED) == reference_gesture(states, SPACED)
+
+
+def test_register_gesture_with_callable_predicate():
+    classifier = GestureClassifier()
+    # Tried before Open Hand, but only when the thumb tip is left of the pinky tip
+    classifier.register_gesture("Palm Forward", (True, True, True, True, True),
+                                predicate=lambda hand: hand[4][0] < hand[20][0])
+    mirrored = hand_with_tips([290, 260, 230, 200, 170])
+    assert classifier.classify([True] * 5, SPACED) == "Palm Forward"
+    assert classifier.classify([True] * 5, mirrored) == "Open Hand"
+    assert classifier.classify_batch([[True] * 5] * 2, [SPACED, mirrored]) == ["Palm Forward", "Open Hand"]
+
+
+def test_register_gesture_with_spacing_predicate_after_builtin_rules():
+    classifier = GestureClassifier()
+    index_ring = [False, True, False, True, False]
+    classifier.register_gesture("Index Ring Pinch", (False, True, False, True, False), predicate=spacing(4, 8),
+                                priority=False)
+    classifier.register_gesture("Index Ring", (False, True, False, True, False), priority=False)
+    # Two Fingers still wins when its own spacing holds; the new rules only catch what it leaves
+    assert classifier.classify(index_ring, SPACED) == "Two Fingers"
+    assert classifier.classify(index_ring, CRAMPED) == "Index Ring"
+    pinch = hand_with_tips([170, 200, 230, 200, 290])
+    assert classifier.classify(index_ring, pinch) == "Index Ring Pinch"
+    assert classifier.classify_batch([index_ring] * 3, [SPACED, CRAMPED, pinch]) == [
+        "Two Fingers", "Index Ring", "Index Ring Pinch"]
+
+
+def test_register_gesture_needs_five_fingers():
+    with pytest.raises(ValueError):
+        GestureClassifier().register_gesture("Bad", (True, True))
+
+
+def test_small_batches_match_cascade():
+    # Live frames hold a few hands and take the per-hand path of classify_batch
+    classifier = GestureClassifier()
+    hands = np.concatenate([[SPACED, CRAMPED], random_hands(14)])
+    for i, finger_states in enumerate(ALL_STATES):
+        states = np.roll(np.array(ALL_STATES, dtype=bool), i, axis=0)[:len(hands)]
+        names = classifier.classify_batch(states, hands)
+        assert names == [reference_gesture(s, hand) for s, hand in zip(states.tolist(), hands.tolist())]
+
+
+def test_check_finger_spacing_keeps_its_original_signature():
+    tracker = HandTracker()
+    # The original 10 < distance < 150 pixel range
+    assert [tracker.check_finger_spacing((0, 0), (x, 0)) for x in (5, 11, 149, 151)] == [False, True, True, False]
+    # Measured in palm lengths when the hand's palm length is given
+    hand = hand_with_tips([170, 200, 230, 260, 290])
+    assert tracker.check_finger_spacing(hand[4], hand[8], palm_length(hand))
+    assert not tracker.check_finger_spacing((0, 0), (100, 0), palm_length=50)
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from hand_tracker import HandTracker
+
+
+class BlobHands:
+    """
+    Stands in for a MediaPipe Hands graph: every white blob in the input is a
+    hand whose 21 landmarks lie on a grid over the blob, normalized to the input
+    """
+
+    def __init__(self):
+        self.input_shapes = []
+        self.resets = 0
+
+    def reset(self):
+        self.resets += 1
+
+    def process(self, rgb):
+        self.input_shapes.append(rgb.shape[:2])
+        height, width = rgb.shape[:2]
+        mask = (rgb[:, :, 0] > 128).astype(np.uint8)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        hands, handedness = [], []
+        for x, y, w, h, _ in sorted(stats[1:].tolist()):
+            grid = [(x + w * (j % 3) / 2, y + h * (j // 3) / 6) for j in range(21)]
+            hands.append(SimpleNamespace(landmark=[SimpleNamespace(x=px / width, y=py / height, z=0.0)
+                                                   for px, py in grid]))
+            handedness.append(SimpleNamespace(classification=[SimpleNamespace(label="Right", score=0.9)]))
+        return SimpleNamespace(multi_hand_landmarks=hands or None, multi_handedness=handedness or None)
+
+
+def blob_frame(rects, size=(640, 480)):
+    frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    for x, y, w, h in rects:
+        frame[y:y + h, x:x + w] = 255
+    return frame
+
+
+def roi_tracker(**kwargs):
+    tracker = HandTracker(roi_mode=True, **kwargs)
+    tracker.hands = BlobHands()
+    tracker.roi_hands = BlobHands()
+    return tracker
+
+
+def test_roi_crops_and_full_frames_use_separate_graphs():
+    tracker = roi_tracker(full_frame_interval=10)
+    regions = []
+    for i in range(25):
+        rects = [(250 + 2 * i, 300, 40, 60), (340 + 2 * i, 290, 40, 60)]
+        _, landmarks, _, _, _, _ = tracker.find_hands_array(blob_frame(rects), draw=False)
+        regions.append(tracker.results_region)
+
+        # Landmarks come back in full-frame coordinates whichever graph produced them
+        assert len(landmarks) == 2
+        for (x, y, w, h), hand in zip(rects, tracker.point_buffer[:2]):
+            np.testing.assert_allclose(hand.min(axis=0), (x, y), atol=1e-3)
+            np.testing.assert_allclose(hand.max(axis=0), (x + w, y + h), atol=1e-3)
+
+    assert tracker.roi_passes > tracker.full_passes > 0
+    # The full-frame graph only ever sees full frames, the ROI graph only crops
+    assert set(tracker.hands.input_shapes) == {(480, 640)}
+    assert all(shape != (480, 640) for shape in tracker.roi_hands.input_shapes)
+
+    # The ROI graph is reset whenever the crop changes, the full-frame graph when it resumes after crops
+    crops = [region for region in regions if region != (0, 0, 640, 480)]
+    crop_changes = sum(1 for before, after in zip([None] + regions, regions)
+                       if after != (0, 0, 640, 480) and after != before)
+    assert len(crops) == tracker.roi_passes
+    assert tracker.roi_hands.resets == crop_changes
+    assert tracker.hands.resets == tracker.full_passes - 1
+
+
+def test_lost_hand_falls_back_to_full_frame():
+    tracker = roi_tracker()
+    tracker.find_hands_array(blob_frame([(250, 300, 40, 60), (340, 290, 40, 60)]), draw=False)
+    tracker.find_hands_array(blob_frame([(252, 300, 40, 60), (342, 290, 40, 60)]), draw=False)
+    assert tracker.results_region != (0, 0, 640, 480)
+
+    # The second hand jumps out of the crop: the crop finds one hand, so the frame is reprocessed whole
+    _, _, pixels, _, _, _ = tracker.find_hands_array(blob_frame([(254, 300, 40, 60), (20, 20, 40, 60)]),
+                                                     draw=False)
+    assert tracker.results_region == (0, 0, 640, 480)
+    assert len(pixels) == 2
+    assert tracker.hands.resets == 1
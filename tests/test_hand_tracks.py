@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from hand_tracks import HandTrack, HandTrackManager, box_iou
+
+
+def hand_at(x, y):
+    """21 landmarks spread over a 100 px hand whose corner is at (x, y)"""
+    offsets = np.stack([np.arange(21) * 4, np.arange(21) * 5], axis=1)
+    return (offsets + (x, y)).astype(np.float32)
+
+
+def box_at(x, y):
+    return (x, y, x + 100, y + 100)
+
+
+def test_box_iou():
+    assert box_iou(box_at(0, 0), box_at(0, 0)) == 1.0
+    assert box_iou(box_at(0, 0), box_at(50, 0)) == pytest.approx(1 / 3)
+    assert box_iou(box_at(0, 0), box_at(200, 0)) == 0.0
+    assert box_iou((0, 0, 0, 0), (0, 0, 0, 0)) == 0.0
+
+
+def test_ids_follow_moving_hands():
+    manager = HandTrackManager()
+    first = manager.update([hand_at(0, 0), hand_at(400, 0)], [box_at(0, 0), box_at(400, 0)])
+    assert [track.track_id for track in first] == [1, 2]
+    # Both hands move and come back in the opposite order
+    second = manager.update([hand_at(420, 10), hand_at(20, 10)], [box_at(420, 10), box_at(20, 10)])
+    assert [track.track_id for track in second] == [2, 1]
+
+
+def test_centroid_distance_matches_without_overlap():
+    manager = HandTrackManager(min_iou=0.2, max_distance=1.0)
+    manager.update([hand_at(0, 0)], [box_at(0, 0)])
+    # No overlap, but within one box diagonal (141 px) of the last position
+    tracks = manager.update([hand_at(120, 0)], [box_at(120, 0)])
+    assert tracks[0].track_id == 1
+    # Too far away: a new hand
+    tracks = manager.update([hand_at(500, 0)], [box_at(500, 0)])
+    assert tracks[0].track_id == 2
+
+
+def test_handedness_must_agree():
+    manager = HandTrackManager()
+    manager.update([hand_at(0, 0)], [box_at(0, 0)], ['Left'])
+    tracks = manager.update([hand_at(5, 0)], [box_at(5, 0)], ['Right'])
+    assert tracks[0].track_id == 2
+    # Unknown handedness matches either side and keeps the known one
+    tracks = manager.update([hand_at(5, 0)], [box_at(5, 0)])
+    assert tracks[0].track_id == 2 and tracks[0].handedness == 'Right'
+
+
+def test_missed_tracks_are_kept_then_dropped():
+    manager = HandTrackManager(max_missed=2)
+    manager.update([hand_at(0, 0)], [box_at(0, 0)])
+    for _ in range(2):
+        manager.update([], [])
+    assert [track.missed for track in manager.tracks] == [2]
+    tracks = manager.update([hand_at(0, 0)], [box_at(0, 0)])
+    assert tracks[0].track_id == 1 and tracks[0].missed == 0
+
+    for _ in range(3):
+        manager.update([], [])
+    assert manager.tracks == []
+    assert manager.update([hand_at(0, 0)], [box_at(0, 0)])[0].track_id == 2
+
+
+def test_stationary_compares_against_the_last_classified_landmarks():
+    manager = HandTrackManager(epsilon=2.0)
+    track = manager.update([hand_at(0, 0)], [box_at(0, 0)])[0]
+    assert not track.stationary
+    # Drift is measured from the last classified landmarks, not the previous frame
+    manager.update([hand_at(1.5, 0)], [box_at(1, 0)])
+    assert track.stationary
+    manager.update([hand_at(2.5, 0)], [box_at(2, 0)])
+    assert not track.stationary
+    manager.update([hand_at(3.5, 0)], [box_at(3, 0)])
+    assert track.stationary
+
+
+def test_observe_debounces_gesture_changes():
+    track = HandTrack(1, box_at(0, 0))
+    assert track.observe("Fist", 0.0) == "Fist"
+    assert track.observe("Open Hand", 0.1) == "Fist"
+    assert track.observe("Open Hand", 0.2) == "Fist"
+    # A different gesture restarts the count
+    assert track.observe("Peace Sign", 0.3) == "Fist"
+    assert [track.observe("Peace Sign", t) for t in (0.4, 0.5)] == ["Fist", "Peace Sign"]
+    assert track.raw_gesture == "Peace Sign"
+    assert list(track.history) == ["Fist", "Open Hand", "Open Hand", "Peace Sign", "Peace Sign", "Peace Sign"]
+
+
+def test_hold_timer_restarts_on_each_debounced_change():
+    track = HandTrack(1, box_at(0, 0))
+    assert track.held_for(0.0) == 0.0
+    track.observe("Peace Sign", 1.0)
+    track.triggered = True
+    assert track.held_for(3.0) == 2.0
+
+    # Flicker inside the debounce window leaves the hold running
+    track.observe("Fist", 3.1)
+    track.observe("Peace Sign", 3.2)
+    assert track.held_for(4.0) == 3.0 and track.triggered
+
+    for t in (5.0, 5.1, 5.2):
+        track.observe("Thumbs Up", t)
+    assert track.gesture == "Thumbs Up"
+    assert track.held_for(6.2) == pytest.approx(1.0)
+    assert not track.triggered
+
+
+def test_reset_hold():
+    track = HandTrack(1, box_at(0, 0))
+    track.observe("Thumbs Up", 0.0)
+    track.triggered = True
+    track.reset_hold(4.0)
+    assert track.held_for(5.0) == 1.0 and not track.triggered
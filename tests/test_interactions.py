@@ -0,0 +1,65 @@
+import numpy as np
+
+from hand_tracks import HandTrackManager
+from interactions import FINGER_TIPS, BoxGrid, InteractionTracker
+
+
+def hand_at(x, y):
+    """21 landmarks within a 40 px square whose top-left corner is at (x, y)"""
+    points = np.zeros((21, 2))
+    points[:] = (x + 20, y + 35)
+    points[FINGER_TIPS] = [(x + 5 * i, y + 5) for i in range(5)]
+    return points
+
+
+def test_grab_follows_track_ids_when_hands_are_reordered():
+    manager = HandTrackManager()
+    tracker = InteractionTracker(["cup"], start_frames=2, release_frames=2)
+    cup = [[90, 90, 60, 60]]
+    holding, free = hand_at(100, 100), hand_at(400, 100)
+
+    events = []
+    for frame in range(10):
+        # MediaPipe swaps the order of the two hands every other frame
+        hands = [holding, free] if frame % 2 == 0 else [free, holding]
+        boxes = [(int(h[:, 0].min()), int(h[:, 1].min()), int(h[:, 0].max()), int(h[:, 1].max())) for h in hands]
+        hand_ids = [track.track_id for track in manager.update(hands, boxes)]
+        events += tracker.update(np.array(hands), hand_ids, cup, [0], [0], (640, 480), frame * 0.1)
+
+    holder = manager.tracks[0].track_id
+    assert [(event.kind, event.hand_id) for event in events] == [("start", holder)]
+    assert tracker.held(holder) == ["cup"]
+
+
+def brute_force(points, boxes):
+    inside = ((points[:, None] >= boxes[None, :, :2]) & (points[:, None] <= boxes[None, :, :2] + boxes[None, :, 2:]))
+    return set(zip(*np.nonzero(inside.all(axis=2))))
+
+
+def test_grid_survives_propagated_boxes_and_matches_brute_force():
+    rng = np.random.default_rng(0)
+    grid = BoxGrid()
+    points = rng.uniform(0, (640, 480), (500, 2))
+    boxes = None
+    for frame in range(50):
+        if frame % 5 == 0:
+            # A detector run: new boxes with new sizes
+            boxes = np.hstack([rng.uniform(0, (640, 480), (40, 2)), rng.uniform(10, 120, (40, 2))])
+        else:
+            # Flow propagation in between: the same boxes shifted by a few pixels
+            boxes = boxes + np.hstack([rng.normal(0, 3, (40, 2)), np.zeros((40, 2))])
+        boxes = np.rint(boxes)
+        grid.update(boxes, (640, 480))
+        assert set(zip(*grid.query(points))) == brute_force(points, boxes)
+    assert grid.builds == 10
+
+
+def test_grid_rebuilds_once_a_box_moves_past_slack():
+    grid = BoxGrid(cell_size=64)
+    grid.update([[100, 100, 50, 50]], (640, 480))
+    grid.update([[100 + grid.slack, 100, 50, 50]], (640, 480))
+    assert grid.builds == 1
+    grid.update([[101 + grid.slack, 100, 50, 50]], (640, 480))
+    assert grid.builds == 2
+    point = [[101 + grid.slack + 50, 120]]
+    assert [list(found) for found in grid.query(point)] == [[0], [0]]
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from landmark_recording import HEADER_SIZE, LandmarkRecorder, LandmarkRecording, record_dtype
+
+
+def random_frame(rng, n, max_hands=2):
+    return ((640, 480), rng.random((n, 21, 3), dtype=np.float32), rng.integers(0, 640, (n, 21, 2), dtype=np.int32),
+            rng.integers(0, 640, (n, 4), dtype=np.int32), rng.integers(0, 2, n, dtype=np.int8),
+            rng.random(n, dtype=np.float32))
+
+
+def test_layout_is_fixed_and_aligned():
+    assert HEADER_SIZE == 32
+    for max_hands in (1, 2, 4):
+        dtype = record_dtype(max_hands)
+        assert dtype.itemsize % 8 == 0
+        assert dtype.fields['landmarks'][1] == 16
+        assert dtype.fields['landmarks'][0].shape == (max_hands, 21, 3)
+
+
+def test_frames_round_trip(tmp_path):
+    path = str(tmp_path / "session.hlrec")
+    rng = np.random.default_rng(0)
+    frames = [random_frame(rng, n) for n in (2, 0, 1, 2)]
+    recorder = LandmarkRecorder(path)
+    for i, frame in enumerate(frames):
+        recorder.write(100.0 + i, *frame)
+    recorder.close()
+
+    recording = LandmarkRecording(path)
+    assert len(recording) == 4
+    assert recording.duration() == 3.0
+    for i, (frame_size, *hands) in enumerate(frames):
+        timestamp, size, *stored = recording.frame(i)
+        assert (timestamp, size) == (100.0 + i, frame_size)
+        for expected, actual in zip(hands, stored):
+            np.testing.assert_array_equal(actual, expected)
+    # Slots past hand_count are cleared, even after a frame with more hands
+    record = recording.records[2]
+    assert not record['landmarks'][1].any() and record['handedness'][1] == -1
+
+
+def test_partial_record_is_ignored_and_dropped_on_append(tmp_path):
+    path = str(tmp_path / "session.hlrec")
+    rng = np.random.default_rng(1)
+    recorder = LandmarkRecorder(path)
+    recorder.write(1.0, *random_frame(rng, 1))
+    recorder.close()
+    with open(path, "ab") as f:
+        f.write(b"\0" * 10)
+
+    assert len(LandmarkRecording(path)) == 1
+    recorder = LandmarkRecorder(path)
+    recorder.write(2.0, *random_frame(rng, 2))
+    recorder.close()
+    recording = LandmarkRecording(path)
+    assert recording.records['timestamp'].tolist() == [1.0, 2.0]
+    assert recording.records['hand_count'].tolist() == [1, 2]
+
+    with pytest.raises(ValueError):
+        LandmarkRecorder(path, max_hands=4)
@@ -0,0 +1,165 @@
+import socket
+import struct
+
+import numpy as np
+import pytest
+
+from landmark_stream import (HAND_DTYPE, HAND_SIZE, HEADER_DTYPE, HEADER_SIZE, MAGIC, VERSION, LandmarkPublisher,
+                             LandmarkSubscriber, packet_size, parse_address)
+
+HEADER_FORMAT = '<4sHHIQdHH'
+HAND_FORMAT = '<63f4ibb2xf'
+
+
+def sample_hands(n, seed=0):
+    rng = np.random.default_rng(seed)
+    landmarks = rng.uniform(0, 1, (n, 21, 3)).astype(np.float32)
+    boxes = rng.integers(-50, 2000, (n, 4)).astype(np.int32)
+    handedness = rng.integers(-1, 2, n).astype(np.int8)
+    gestures = rng.integers(0, 8, n).astype(np.uint8)
+    scores = rng.uniform(0, 1, n).astype(np.float32)
+    return landmarks, boxes, handedness, gestures, scores
+
+
+@pytest.fixture
+def unix_pair(tmp_path):
+    address = f"unix://{tmp_path / 'hands.sock'}"
+    subscriber = LandmarkSubscriber(address, timeout=2.0)
+    publisher = LandmarkPublisher(address, stream_id=7, max_hands=4)
+    yield publisher, subscriber
+    publisher.close()
+    subscriber.close()
+
+
+def test_dtype_layout_matches_the_documented_format():
+    assert HEADER_SIZE == struct.calcsize(HEADER_FORMAT) == 32
+    assert HAND_SIZE == struct.calcsize(HAND_FORMAT) == 276
+    assert [HEADER_DTYPE.fields[name][1] for name in HEADER_DTYPE.names] == [0, 4, 6, 8, 12, 20, 28, 30]
+    assert [HAND_DTYPE.fields[name][1] for name in HAND_DTYPE.names] == [0, 252, 268, 269, 270, 272]
+    assert packet_size(0) == 32 and packet_size(2) == 32 + 2 * 276
+
+
+def test_parse_address():
+    assert parse_address('udp://127.0.0.1:9000') == (socket.AF_INET, ('127.0.0.1', 9000))
+    assert parse_address('unix:///tmp/hands.sock') == (socket.AF_UNIX, '/tmp/hands.sock')
+    for address in ('udp://127.0.0.1', 'tcp://127.0.0.1:9000', '/tmp/hands.sock'):
+        with pytest.raises(ValueError):
+            parse_address(address)
+
+
+def test_publisher_packs_little_endian_fields(tmp_path):
+    # Decode with struct rather than the dtypes so the byte layout itself is checked
+    sock_path = str(tmp_path / 'raw.sock')
+    receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    receiver.bind(sock_path)
+    receiver.settimeout(2.0)
+    publisher = LandmarkPublisher(f"unix://{sock_path}", stream_id=3, max_hands=2)
+    landmarks, boxes, handedness, gestures, scores = sample_hands(1)
+    try:
+        assert publisher.publish(1234.5, (640, 480), landmarks, boxes, handedness, gestures, scores)
+        packet = receiver.recv(4096)
+    finally:
+        publisher.close()
+        receiver.close()
+
+    assert len(packet) == packet_size(1)
+    assert struct.unpack_from(HEADER_FORMAT, packet) == (MAGIC, VERSION, 1, 3, 0, 1234.5, 640, 480)
+    hand = struct.unpack_from(HAND_FORMAT, packet, HEADER_SIZE)
+    np.testing.assert_array_equal(np.float32(hand[:63]), landmarks[0].ravel())
+    assert list(hand[63:67]) == boxes[0].tolist()
+    assert hand[67:69] == (handedness[0], gestures[0])
+    assert np.float32(hand[69]) == scores[0]
+
+
+@pytest.mark.parametrize("n", [0, 1, 4])
+def test_round_trip(unix_pair, n):
+    publisher, subscriber = unix_pair
+    landmarks, boxes, handedness, gestures, scores = sample_hands(n, seed=n)
+    assert publisher.publish(99.25, (1280, 720), landmarks, boxes, handedness, gestures, scores)
+    frame = subscriber.receive()
+    assert (frame.stream_id, frame.frame_index, frame.timestamp) == (7, 0, 99.25)
+    assert (frame.width, frame.height, frame.hand_count) == (1280, 720, n)
+    np.testing.assert_array_equal(frame.landmarks, landmarks)
+    np.testing.assert_array_equal(frame.boxes, boxes)
+    np.testing.assert_array_equal(frame.handedness, handedness)
+    np.testing.assert_array_equal(frame.gestures, gestures)
+    np.testing.assert_array_equal(frame.scores, scores)
+    expected_pixels = (landmarks[..., :2] * (1280, 720)).astype(np.int32)
+    np.testing.assert_array_equal(frame.pixel_landmarks(), expected_pixels)
+
+
+def test_extra_hands_are_cut_and_missing_scores_are_zero(unix_pair):
+    publisher, subscriber = unix_pair
+    landmarks, boxes, handedness, gestures, _ = sample_hands(6)
+    publisher.publish(0.0, (640, 480), landmarks, boxes, handedness, gestures)
+    frame = subscriber.receive()
+    assert frame.hand_count == 4
+    np.testing.assert_array_equal(frame.landmarks, landmarks[:4])
+    assert frame.scores.tolist() == [0.0] * 4
+
+
+def test_copy_survives_the_next_receive(unix_pair):
+    publisher, subscriber = unix_pair
+    first = sample_hands(2, seed=1)
+    second = sample_hands(2, seed=2)
+    publisher.publish(1.0, (640, 480), *first)
+    publisher.publish(2.0, (640, 480), *second)
+    kept = subscriber.receive(copy=True)
+    latest = subscriber.receive()
+    assert (kept.frame_index, latest.frame_index) == (0, 1)
+    np.testing.assert_array_equal(kept.landmarks, first[0])
+    np.testing.assert_array_equal(latest.landmarks, second[0])
+
+
+def test_invalid_packets_are_skipped(unix_pair):
+    publisher, subscriber = unix_pair
+    raw = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        raw.sendto(b'short', subscriber.address)
+        raw.sendto(b'XXXX' + bytes(HEADER_SIZE - 4), subscriber.address)
+        # Right header, but one hand announced and none sent
+        raw.sendto(struct.pack(HEADER_FORMAT, MAGIC, VERSION, 1, 0, 0, 0.0, 0, 0), subscriber.address)
+    finally:
+        raw.close()
+    publisher.publish(5.0, (640, 480), *sample_hands(1))
+    frame = subscriber.receive()
+    assert frame.timestamp == 5.0
+    assert (subscriber.invalid, subscriber.received) == (3, 1)
+
+
+def test_receive_times_out(tmp_path):
+    subscriber = LandmarkSubscriber(f"unix://{tmp_path / 'idle.sock'}", timeout=0.05)
+    try:
+        assert subscriber.receive() is None
+        assert list(subscriber) == []
+    finally:
+        subscriber.close()
+    assert not (tmp_path / 'idle.sock').exists()
+
+
+def test_publishing_without_a_listener_drops(tmp_path):
+    publisher = LandmarkPublisher(f"unix://{tmp_path / 'nobody.sock'}")
+    try:
+        assert not publisher.publish(0.0, (640, 480), *sample_hands(1))
+        assert publisher.stats() == {'sent': 0, 'dropped': 1}
+    finally:
+        publisher.close()
+
+
+def test_udp_round_trip():
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    address = f"udp://127.0.0.1:{port}"
+    subscriber = LandmarkSubscriber(address, timeout=2.0)
+    publisher = LandmarkPublisher(address, max_hands=2)
+    landmarks, boxes, handedness, gestures, scores = sample_hands(2)
+    try:
+        assert publisher.publish(3.0, (320, 240), landmarks, boxes, handedness, gestures, scores)
+        frame = subscriber.receive()
+    finally:
+        publisher.close()
+        subscriber.close()
+    np.testing.assert_array_equal(frame.landmarks, landmarks)
+    np.testing.assert_array_equal(frame.boxes, boxes)
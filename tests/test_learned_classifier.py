@@ -0,0 +1,30 @@
+import numpy as np
+
+from gesture_classifier import GESTURE_NAMES, GestureClassifier
+from hand_tracker import finger_states_batch
+from landmark_recording import LandmarkRecorder
+from learned_classifier import load_dataset, rule_predictions
+from test_scale_invariance import points_at
+
+
+def test_recordings_load_as_sub_pixel_points(tmp_path):
+    size = (160, 120)
+    hands = points_at(size)[:40]
+    path = str(tmp_path / "peace.hlrec")
+    recorder = LandmarkRecorder(path, max_hands=2)
+    for frame in range(20):
+        pair = hands[2 * frame:2 * frame + 2]
+        normalized = np.zeros((2, 21, 3), dtype=np.float32)
+        normalized[:, :, :2] = pair / size
+        recorder.write(float(frame), size, normalized, pair.astype(np.int32), np.zeros((2, 4), np.int32),
+                       np.zeros(2, np.int8), np.ones(2, np.float32))
+    recorder.close()
+
+    landmarks, labels = load_dataset([f"{path}=Peace Sign"])
+    assert set(labels) == {"Peace Sign"}
+    # The points replay.py and the live tracker classify on, not the truncated pixels
+    expected = (hands.reshape(-1, 21, 2) / size).astype(np.float32).astype(np.float64) * size
+    np.testing.assert_array_equal(landmarks, expected.astype(np.float32))
+
+    ids = GestureClassifier().classify_batch(finger_states_batch(landmarks), landmarks, as_ids=True)
+    assert rule_predictions(landmarks).tolist() == [GESTURE_NAMES[i] for i in ids]
@@ -0,0 +1,51 @@
+import numpy as np
+
+from hand_tracker import HandTracker
+from hand_tracks import HandTrack
+from main import GestureProcessor
+from test_scale_invariance import points_at
+
+
+class CountingTracker(HandTracker):
+    def __init__(self):
+        super().__init__(max_hands=4)
+        self.batches = []
+
+    def get_finger_states_batch(self, landmarks):
+        self.batches.append(len(landmarks))
+        return super().get_finger_states_batch(landmarks)
+
+
+def test_frame_gestures_come_from_one_batched_call():
+    tracker = CountingTracker()
+    processor = GestureProcessor(tracker, action_handler=None, collect_overlay=False)
+    hands = points_at((640, 480))[:4]
+    tracker.point_buffer[:] = hands
+    tracks = [HandTrack(i, (0, 0, 0, 0)) for i in range(4)]
+
+    expected = [tracker.get_hand_gesture(tracker.get_finger_state(hand), hand) for hand in hands]
+    assert processor.classify(tracks) == expected
+    assert tracker.batches == [4]
+
+
+def test_stationary_hands_keep_their_gesture():
+    tracker = CountingTracker()
+    processor = GestureProcessor(tracker, action_handler=None, collect_overlay=False)
+    hands = points_at((640, 480))[:3]
+    tracker.point_buffer[:3] = hands
+    tracks = [HandTrack(i, (0, 0, 0, 0)) for i in range(3)]
+    tracks[1].stationary = True
+    tracks[1].raw_gesture = "Closed Fist"
+
+    gestures = processor.classify(tracks)
+    # Only the two moving hands are classified, together
+    assert tracker.batches == [2]
+    assert gestures[1] == "Closed Fist"
+    assert gestures[0] == tracker.get_hand_gesture(tracker.get_finger_state(hands[0]), hands[0])
+    assert gestures[2] == tracker.get_hand_gesture(tracker.get_finger_state(hands[2]), hands[2])
+
+    for track in tracks:
+        track.stationary, track.raw_gesture = True, "Open Hand"
+    assert processor.classify(tracks) == ["Open Hand"] * 3
+    assert tracker.batches == [2]
+    np.testing.assert_array_equal(tracker.point_buffer[:3], hands)
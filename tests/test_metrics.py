@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+import metrics
+from metrics import MetricsRegistry
+
+
+def enabled_registry():
+    registry = MetricsRegistry()
+    registry.enabled = True
+    return registry
+
+
+def test_nothing_is_collected_while_disabled():
+    registry = MetricsRegistry()
+    counter = registry.counter('frames_total')
+    hist = registry.histogram('latency_seconds')
+    gauge = registry.gauge('scale')
+    counter.inc()
+    hist.observe(0.01)
+    gauge.set(0.5)
+    assert counter.value == 0
+    assert hist.count == 0
+    assert hist.time() is metrics._NULL_TIMER
+    # Gauges keep their value so a later export still reports it
+    assert gauge.value == 0.5
+
+
+def test_counter_and_labels():
+    registry = enabled_registry()
+    registry.counter('drops_total', labels={'action': 'click'}).inc()
+    registry.counter('drops_total', labels={'action': 'click'}).inc(2)
+    registry.counter('drops_total', labels={'action': 'scroll'}).inc()
+    snapshot = registry.snapshot()
+    assert snapshot['drops_total{action="click"}'] == {'value': 3}
+    assert snapshot['drops_total{action="scroll"}'] == {'value': 1}
+
+
+def test_same_name_with_another_kind_is_rejected():
+    registry = enabled_registry()
+    registry.counter('frames_total')
+    with pytest.raises(ValueError):
+        registry.histogram('frames_total')
+
+
+def test_histogram_buckets_sum_and_quantile():
+    registry = enabled_registry()
+    hist = registry.histogram('latency_seconds', buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 0.5, 2.0):
+        hist.observe(value)
+    snapshot = hist.snapshot()
+    # Bounds are inclusive, so 0.01 lands in the 0.01 bucket
+    assert snapshot['buckets'] == {'0.01': 2, '0.1': 1, '1.0': 1, '+Inf': 1}
+    assert snapshot['count'] == 5
+    assert snapshot['sum'] == pytest.approx(2.565)
+    assert snapshot['mean'] == pytest.approx(0.513)
+    assert hist.quantile(0.4) == 0.01
+    assert hist.quantile(0.6) == 0.1
+    assert hist.quantile(1.0) == float('inf')
+
+
+def test_reset_clears_counters_and_histograms_but_not_gauges():
+    registry = enabled_registry()
+    counter = registry.counter('frames_total')
+    hist = registry.histogram('latency_seconds')
+    gauge = registry.gauge('scale')
+    counter.inc(4)
+    hist.observe(0.2)
+    gauge.set(0.75)
+    registry.reset()
+    assert counter.value == 0
+    assert hist.count == 0 and hist.sum == 0.0 and not any(hist.counts)
+    assert gauge.value == 0.75
+
+
+def test_prometheus_exposition_format():
+    registry = enabled_registry()
+    registry.counter('drops_total', "Dropped jobs", labels={'action': 'click'}).inc(3)
+    registry.counter('drops_total', "Dropped jobs", labels={'action': 'scroll'}).inc()
+    registry.gauge('scale', "Processing scale").set(0.5)
+    hist = registry.histogram('latency_seconds', "Frame latency", buckets=(0.01, 0.1))
+    hist.observe(0.005)
+    hist.observe(0.05)
+    hist.observe(0.5)
+    assert registry.export_prometheus() == (
+        '# HELP drops_total Dropped jobs\n'
+        '# TYPE drops_total counter\n'
+        'drops_total{action="click"} 3\n'
+        'drops_total{action="scroll"} 1\n'
+        '# HELP latency_seconds Frame latency\n'
+        '# TYPE latency_seconds histogram\n'
+        'latency_seconds_bucket{le="0.01"} 1\n'
+        'latency_seconds_bucket{le="0.1"} 2\n'
+        'latency_seconds_bucket{le="+Inf"} 3\n'
+        'latency_seconds_sum 0.555\n'
+        'latency_seconds_count 3\n'
+        '# HELP scale Processing scale\n'
+        '# TYPE scale gauge\n'
+        'scale 0.5\n'
+    )
+
+
+def test_write_json(tmp_path):
+    registry = enabled_registry()
+    registry.counter('frames_total').inc(7)
+    registry.histogram('latency_seconds', buckets=(0.1,)).observe(0.05)
+    path = str(tmp_path / "metrics.json")
+    registry.write_json(path)
+    with open(path) as f:
+        data = json.load(f)
+    assert 'timestamp' in data
+    assert data['metrics']['frames_total'] == {'value': 7}
+    assert data['metrics']['latency_seconds']['buckets'] == {'0.1': 1, '+Inf': 0}
+    assert not (tmp_path / "metrics.json.tmp").exists()
+
+
+def test_timed_observes_each_call_and_exceptions():
+    @metrics.timed('test_metrics_timed_seconds')
+    def work(fail=False):
+        if fail:
+            raise RuntimeError("boom")
+        return 42
+
+    hist = metrics.histogram('test_metrics_timed_seconds')
+    metrics.disable()
+    assert work() == 42
+    assert hist.count == 0
+    metrics.enable()
+    try:
+        assert work() == 42
+        with pytest.raises(RuntimeError):
+            work(fail=True)
+    finally:
+        metrics.disable()
+    assert hist.count == 2
@@ -0,0 +1,86 @@
+import hashlib
+import os
+import pathlib
+
+import pytest
+
+from model_registry import MODELS, ModelCache, ModelCacheError, ModelFile, file_sha256
+
+
+def source_file(tmp_path, content=b"weights"):
+    """A file:// download source and the SHA-256 of its content"""
+    path = tmp_path / "source.bin"
+    path.write_bytes(content)
+    return pathlib.Path(path).as_uri(), hashlib.sha256(content).hexdigest()
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    # The working directory is searched too, so keep it away from any real model files
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path / "cache")
+
+
+def test_fetch_downloads_and_checks_pinned_hash(tmp_path, cache_dir):
+    url, digest = source_file(tmp_path)
+    model_file = ModelFile("model.bin", url, sha256=digest)
+    cache = ModelCache(cache_dir, offline=False)
+
+    path, download_time, _ = cache.fetch(model_file)
+    assert path == os.path.join(cache_dir, "model.bin")
+    assert download_time > 0
+    assert cache.manifest[os.path.abspath(path)]["sha256"] == digest
+
+    # A second launch finds the file in the cache and trusts the manifest without hashing
+    cache = ModelCache(cache_dir, offline=True)
+    assert cache.fetch(model_file)[:2] == (path, 0.0)
+    assert cache.verify(model_file, path) is False
+
+
+def test_download_with_wrong_hash_is_rejected_and_removed(tmp_path, cache_dir):
+    url, _ = source_file(tmp_path, b"tampered")
+    model_file = ModelFile("model.bin", url, sha256=hashlib.sha256(b"weights").hexdigest())
+    with pytest.raises(ModelCacheError, match="Checksum mismatch"):
+        ModelCache(cache_dir, offline=False).fetch(model_file)
+    assert not os.path.exists(os.path.join(cache_dir, "model.bin"))
+    assert [name for name in os.listdir(cache_dir) if name.endswith(".part")] == []
+
+
+def test_modified_cached_file_fails_verification(tmp_path, cache_dir):
+    url, digest = source_file(tmp_path)
+    model_file = ModelFile("model.bin", url, sha256=digest)
+    path, _, _ = ModelCache(cache_dir, offline=False).fetch(model_file)
+
+    with open(path, "ab") as f:
+        f.write(b"!")
+    with pytest.raises(ModelCacheError, match="Checksum mismatch"):
+        ModelCache(cache_dir, offline=True).fetch(model_file)
+
+
+def test_offline_never_downloads(tmp_path, cache_dir):
+    url, digest = source_file(tmp_path)
+    with pytest.raises(ModelCacheError, match="offline"):
+        ModelCache(cache_dir, offline=True).fetch(ModelFile("model.bin", url, sha256=digest))
+    assert not os.path.exists(os.path.join(cache_dir, "model.bin"))
+
+
+def test_offline_from_environment(monkeypatch, cache_dir):
+    monkeypatch.setenv("HAND_TRACKER_OFFLINE", "1")
+    assert ModelCache(cache_dir).offline
+    monkeypatch.setenv("HAND_TRACKER_OFFLINE", "0")
+    assert not ModelCache(cache_dir).offline
+
+
+def test_registered_models_pin_every_file():
+    for spec in MODELS.values():
+        for model_file in spec.files.values():
+            assert model_file.sha256 is not None and len(model_file.sha256) == 64
+
+
+def test_bundled_configs_match_their_pins(cache_dir):
+    cache = ModelCache(cache_dir, offline=True)
+    for spec in MODELS.values():
+        config = spec.files["config"]
+        path = cache.locate(config)
+        assert path is not None and file_sha256(path) == config.sha256
+        assert cache.fetch(config)[0] == path
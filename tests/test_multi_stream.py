@@ -0,0 +1,46 @@
+import sys
+import threading
+
+import hand_tracker
+import multi_stream
+from action_backends import RecordingBackend
+from gesture_actions import GestureActionHandler
+from multi_stream import gesture_processor_factory
+
+
+def test_streams_get_their_own_volume_state(monkeypatch):
+    # No MediaPipe warm-up; the trackers are never run here
+    tracker_class = hand_tracker.HandTracker
+    monkeypatch.setattr(hand_tracker, "HandTracker", lambda **kwargs: tracker_class())
+    shared = GestureActionHandler(RecordingBackend())
+    factory = gesture_processor_factory(shared)
+    first, second = factory(None).action_handler, factory(None).action_handler
+
+    assert first.volume_controller is not second.volume_controller
+    assert first.executor is second.executor is shared.executor
+    assert first.backend is second.backend is shared.backend
+
+    # One stream opens its pinch while the other closes it, at the same time
+    def pinch(handler, distances):
+        handler.volume_controller.min_interval = 0.0
+        for distance in distances:
+            handler.control_volume((100 + distance, 100), (100, 100))
+
+    opening = [20 + 2 * i for i in range(90)]
+    threads = [threading.Thread(target=pinch, args=(first, opening)),
+               threading.Thread(target=pinch, args=(second, opening[::-1]))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    shared.close()
+
+    assert {event[1] for event in first.volume_controller.events} == {"volumeup"}
+    assert {event[1] for event in second.volume_controller.events} == {"volumedown"}
+
+
+def test_parse_args_without_running_the_script(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["multi_stream.py", "a.mp4", "b.mp4", "--metrics-port", "9100"])
+    args = multi_stream.parse_args()
+    assert args.sources == ["a.mp4", "b.mp4"]
+    assert args.metrics_port == 9100
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+import pytest
+
+import object_scanner
+from object_scanner import nms_boxes_batched
+from test_batch_detector import CLASSES, FakeNet, tagged_frame
+
+
+def random_detections(count, seed):
+    rng = np.random.default_rng(seed)
+    xy = rng.integers(-20, 600, (count, 2))
+    wh = rng.integers(10, 200, (count, 2))
+    boxes = np.hstack([xy, wh]).tolist()
+    confidences = rng.uniform(0.3, 1.0, count).tolist()
+    class_ids = rng.integers(0, 4, count).tolist()
+    return boxes, confidences, class_ids
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_nms_fallback_matches_per_class_nms(monkeypatch, seed):
+    boxes, confidences, class_ids = random_detections(200, seed)
+    # Reference: NMSBoxes on each class separately
+    expected = []
+    for class_id in set(class_ids):
+        members = [i for i, c in enumerate(class_ids) if c == class_id]
+        kept = cv2.dnn.NMSBoxes([boxes[i] for i in members], [confidences[i] for i in members], 0.5, 0.4)
+        expected += [members[i] for i in np.asarray(kept).flatten()]
+
+    # Pretend to be an OpenCV without NMSBoxesBatched
+    monkeypatch.setattr(object_scanner.cv2, "dnn", type("dnn", (), {"NMSBoxes": staticmethod(cv2.dnn.NMSBoxes)}))
+    indices = nms_boxes_batched(boxes, confidences, class_ids, 0.5, 0.4)
+    assert sorted(np.asarray(indices).flatten().tolist()) == sorted(expected)
+
+
+def test_nms_fallback_without_boxes(monkeypatch):
+    monkeypatch.setattr(object_scanner.cv2, "dnn", type("dnn", (), {"NMSBoxes": staticmethod(cv2.dnn.NMSBoxes)}))
+    assert len(nms_boxes_batched([], [], [], 0.5, 0.4)) == 0
+
+
+class CountingNet(FakeNet):
+    def __init__(self):
+        super().__init__()
+        self.lookups = 0
+
+    def getLayerNames(self):
+        self.lookups += 1
+        return super().getLayerNames()
+
+
+def test_yolo_net_resolves_output_layers_once():
+    raw = CountingNet()
+    net = object_scanner.YoloNet(raw)
+    assert raw.lookups == 1
+    for red in range(3):
+        boxes, confidences, class_ids, indices = object_scanner.process_frame(tagged_frame(red, 480, 640), net,
+                                                                              CLASSES, input_size=320)
+        assert class_ids == [red]
+    assert object_scanner.get_output_layers(net) == ['yolo_0', 'yolo_1']
+    assert raw.lookups == 1
+    # Calls go through to the wrapped net
+    assert len(raw.blobs) == 3
+
+    # A bare net is resolved on every call and nothing is kept for it
+    object_scanner.get_output_layers(raw)
+    assert raw.lookups == 2
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import numpy as np
+
+from motion_gate import MotionGate
+from pipeline import FramePipeline
+
+
+class FakeCapture:
+    def __init__(self, frames):
+        self.frames = frames
+
+    def read(self):
+        if self.frames <= 0:
+            return False, None
+        self.frames -= 1
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def run_with_timeout(pipeline, present=None, timeout=5.0):
+    thread = threading.Thread(target=pipeline.run, args=(present,), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+
+def test_failing_frames_are_skipped_and_counted():
+    calls = []
+
+    def process(frame):
+        calls.append(frame)
+        if len(calls) % 3 == 0:
+            raise RuntimeError("bad frame")
+        return len(calls)
+
+    results = []
+    pipeline = FramePipeline(FakeCapture(30), process, drop_stale=False)
+    assert run_with_timeout(pipeline, results.append)
+    assert len(results) == 20
+    assert pipeline.stats()['inference']['errors'] == 10
+
+
+def test_processor_that_always_raises_does_not_hang_run():
+    def process(frame):
+        raise RuntimeError("broken model")
+
+    pipeline = FramePipeline(FakeCapture(5), process, drop_stale=False)
+    assert run_with_timeout(pipeline)
+    assert pipeline.stats()['inference']['errors'] == 5
+
+
+def test_run_returns_once_stopped():
+    class EndlessCapture(FakeCapture):
+        def read(self):
+            return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+    pipeline = FramePipeline(EndlessCapture(0), lambda frame: frame)
+    seen = []
+
+    def present(result):
+        seen.append(result)
+        if len(seen) == 3:
+            pipeline.stop_event.set()
+
+    assert run_with_timeout(pipeline, present)
+
+
+def test_idle_gate_throttles_capture_reads():
+    # Idle as soon as the first frame is checked, then 20 frames per second
+    gate = MotionGate(idle_after=0.0, idle_fps=20.0)
+
+    class CountingCapture(FakeCapture):
+        def read(self):
+            # A 200 fps camera; only the reads made while idle are counted
+            time.sleep(0.005)
+            self.frames += gate.idle
+            return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def process(frame):
+        gate.should_run(frame)
+        gate.observe(0)
+        return frame
+
+    capture = CountingCapture(0)
+    pipeline = FramePipeline(capture, process, idle_delay=lambda last_read: gate.idle_delay(since=last_read))
+    timer = threading.Timer(0.5, pipeline.stop_event.set)
+    timer.start()
+    assert run_with_timeout(pipeline)
+    # About 10 reads in half a second rather than the camera's 100
+    assert 5 <= capture.frames <= 15
+
+
+def test_failing_capture_ends_the_stream():
+    class BrokenCapture(FakeCapture):
+        def read(self):
+            if self.frames <= 2:
+                raise RuntimeError("camera unplugged")
+            return super().read()
+
+    results = []
+    pipeline = FramePipeline(BrokenCapture(5), lambda frame: frame, drop_stale=False)
+    assert run_with_timeout(pipeline, results.append)
+    assert len(results) == 3
+    assert pipeline.stats()['capture']['errors'] == 1
@@ -0,0 +1,14 @@
+import numpy as np
+
+import renderer
+from renderer import Renderer
+
+
+def test_show_returns_minus_one_without_a_key(monkeypatch):
+    monkeypatch.setattr(renderer.cv2, "imshow", lambda name, frame: None)
+    monkeypatch.setattr(renderer.cv2, "waitKey", lambda delay: -1)
+    assert Renderer("test").show(np.zeros((4, 4, 3), dtype=np.uint8)) == -1
+
+
+def test_present_returns_minus_one_when_skipped():
+    assert Renderer("test", headless=True).present(np.zeros((4, 4, 3), dtype=np.uint8)) == -1
@@ -0,0 +1,96 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+import hand_tracker
+from action_backends import RecordingBackend
+from action_executor import ActionExecutor
+from gesture_actions import GestureActionHandler
+from landmark_recording import LandmarkRecorder, LandmarkRecording
+from main import GestureProcessor
+from replay import ReplayEngine
+from test_scale_invariance import points_at
+
+FRAME_SIZE = (640, 480)
+# Fixture poses classified as these gestures at 640x480
+PEACE, THUMBS_UP, VOLUME = 6, 5, 4
+
+
+class SlowLockBackend(RecordingBackend):
+    """Locking takes a while, as it can on a real desktop; a queued executor backs up behind it"""
+
+    def lock_workstation(self):
+        time.sleep(0.2)
+        super().lock_workstation()
+
+
+class ScriptedHands:
+    """Stands in for a MediaPipe Hands graph, returning the next frame's normalized hands"""
+
+    def __init__(self, script):
+        self.script = iter(script)
+
+    def process(self, rgb):
+        hands = next(self.script)
+        return SimpleNamespace(
+            multi_hand_landmarks=[SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=0.0)
+                                                            for x, y in hand]) for hand in hands] or None,
+            multi_handedness=[SimpleNamespace(classification=[SimpleNamespace(label="Right", score=0.9)])
+                              for _ in hands] or None)
+
+
+def pinch(hand, factor):
+    """The hand with its index finger stretched by factor from the MCP, widening the pinch"""
+    hand = hand.copy()
+    hand[6:9] = hand[5] + (hand[6:9] - hand[5]) * factor
+    return hand
+
+
+def session_script():
+    """Peace sign held, no hands, a volume pinch opening and closing, thumbs up held"""
+    poses = points_at(FRAME_SIZE).astype(np.float64)
+    factors = np.concatenate([np.linspace(0.6, 1.6, 25), np.linspace(1.6, 0.6, 25)])
+    script = [[poses[PEACE]]] * 45 + [[]] * 10
+    script += [[pinch(poses[VOLUME], factor)] for factor in factors]
+    script += [[]] * 10 + [[poses[THUMBS_UP]]] * 45
+    return [[hand / FRAME_SIZE for hand in hands] for hands in script]
+
+
+def record_session(path, monkeypatch):
+    """Run the live gesture logic over the script, recording it; returns the actions performed"""
+    now = {"t": 1000.0}
+    clock = lambda: now["t"]  # noqa: E731
+    monkeypatch.setattr(hand_tracker, "time", SimpleNamespace(time=clock, perf_counter=hand_tracker.time.perf_counter))
+
+    script = session_script()
+    recorder = LandmarkRecorder(path)
+    tracker = hand_tracker.HandTracker(recorder=recorder)
+    tracker.hands = ScriptedHands(script)
+    backend = RecordingBackend()
+    handler = GestureActionHandler(backend, executor=ActionExecutor(clock=clock, synchronous=True), clock=clock)
+    processor = GestureProcessor(tracker, handler, collect_overlay=False, clock=clock)
+    frame = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+    for _ in script:
+        processor(frame)
+        now["t"] += 1 / 30
+    recorder.close()
+    handler.close()
+    return backend.actions()
+
+
+def test_replay_reproduces_the_recorded_actions(tmp_path, monkeypatch):
+    path = str(tmp_path / "session.hlrec")
+    live = record_session(path, monkeypatch)
+    kinds = [action[0] for action in live]
+    assert kinds.count('lock') == 1
+    assert kinds.count('write') == 1
+    assert kinds.count('press') > 2
+
+    recording = LandmarkRecording(path)
+    assert len(recording) == len(session_script())
+    for _ in range(2):
+        engine = ReplayEngine(recording, SlowLockBackend())
+        stats = engine.run()
+        assert engine.backend.actions() == live
+        assert stats['actions']['dropped'] == 0
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+from action_backends import RecordingBackend
+from gesture_actions import REFERENCE_PALM_LENGTH, GestureActionHandler
+from gesture_classifier import palm_length
+from hand_tracker import HandTracker
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "benchmarks", "fixtures", "landmarks.npz")
+# The fixture's hands are posed in a 640x480 frame
+REFERENCE = (640, 480)
+RESOLUTIONS = [(160, 120), (320, 240), (640, 480), (1280, 720), (1920, 1080)]
+
+
+def points_at(resolution):
+    """
+    The fixture's poses filmed at another resolution, as HandTracker.point_buffer holds them:
+    the scene is scaled to the frame height and centred, MediaPipe reports float32 normalized
+    landmarks, and those are multiplied back by the frame size in float64 and stored as float32
+    """
+    hands = np.load(FIXTURE)["hands"].astype(np.float64)
+    width, height = resolution
+    scale = height / REFERENCE[1]
+    frame_points = hands * scale + ((width - REFERENCE[0] * scale) / 2, 0)
+    normalized = (frame_points / resolution).astype(np.float32)
+    return (normalized.astype(np.float64) * resolution).astype(np.float32)
+
+
+def classify(points):
+    tracker = HandTracker()
+    states = [tracker.get_finger_state(hand) for hand in points]
+    gestures = [tracker.get_hand_gesture(hand_states, hand) for hand_states, hand in zip(states, points)]
+    batch = tracker.get_hand_gestures_batch(tracker.get_finger_states_batch(points), points)
+    return states, gestures, batch
+
+
+def volume_distances(points):
+    """Distances control_volume hands to the VolumeController, called as GestureProcessor does"""
+    handler = GestureActionHandler(RecordingBackend())
+    distances = []
+    handler.volume_controller.update = lambda distance, now: distances.append(distance) or []
+    for hand in points:
+        handler.control_volume(hand[8], hand[4], palm_length(hand))
+    handler.close()
+    return np.array(distances)
+
+
+@pytest.fixture(scope="module")
+def reference():
+    points = points_at(REFERENCE)
+    return classify(points), volume_distances(points)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS, ids=lambda r: f"{r[0]}x{r[1]}")
+def test_gestures_do_not_depend_on_resolution(resolution, reference):
+    (states, gestures, batch), _ = reference
+    assert classify(points_at(resolution)) == (states, gestures, batch)
+
+
+def test_fixture_covers_many_gestures(reference):
+    (_, gestures, _), _ = reference
+    assert len(set(gestures)) >= 6
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS, ids=lambda r: f"{r[0]}x{r[1]}")
+def test_volume_distance_does_not_depend_on_resolution(resolution, reference):
+    _, expected = reference
+    distances = volume_distances(points_at(resolution))
+    # Equal up to the float32 rounding of the landmarks
+    np.testing.assert_allclose(distances, expected, rtol=1e-5)
+
+
+def test_volume_distance_is_in_reference_palm_units():
+    points = points_at((1920, 1080))
+    raw = np.linalg.norm(points[:, 8] - points[:, 4], axis=1)
+    palms = np.array([palm_length(hand) for hand in points])
+    np.testing.assert_allclose(volume_distances(points), raw * REFERENCE_PALM_LENGTH / palms, rtol=1e-6)
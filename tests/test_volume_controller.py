@@ -0,0 +1,68 @@
+from action_backends import RecordingBackend
+from gesture_actions import GestureActionHandler
+from volume_controller import VolumeController
+
+
+def test_event_history_is_bounded():
+    controller = VolumeController(min_interval=0.0, history=8)
+    distances = [20, 200] * 100
+    sent = 0
+    for i, distance in enumerate(distances):
+        sent += len(controller.update(distance, i * 0.01))
+    assert sent > 8
+    assert len(controller.events) == 8
+    # The newest events are the ones kept
+    assert controller.events[-1][0] == max(event[0] for event in controller.events)
+
+
+# A recorded pinch at 30 fps: anchored at 60 px, opened to 180, closed to 40, a one second pause,
+# then re-anchored at 100 px and opened to 135
+PINCH = [60] * 3 + list(range(60, 188, 8)) + [180] * 10 + list(range(180, 30, -10)) + [40] * 10
+RESUMED = [100] * 3 + list(range(100, 140, 5)) + [135] * 6
+TRACE = ([(round(i / 30, 4), d) for i, d in enumerate(PINCH)]
+         + [(round((len(PINCH) + i) / 30 + 1.0, 4), d) for i, d in enumerate(RESUMED)])
+
+EXPECTED_EVENTS = [
+    (0.1667, 'volumeup', 2), (0.2667, 'volumeup', 5), (0.3667, 'volumeup', 6), (0.5, 'volumeup', 9),
+    (0.6333, 'volumeup', 8), (0.7667, 'volumeup', 3),
+    (1.0333, 'volumedown', 2), (1.1667, 'volumedown', 9), (1.3, 'volumedown', 10), (1.4333, 'volumedown', 10),
+    (1.5333, 'volumedown', 5), (1.6667, 'volumedown', 2),
+    (3.0, 'volumeup', 2), (3.1, 'volumeup', 4), (3.2, 'volumeup', 2), (3.3333, 'volumeup', 2),
+]
+
+
+def test_recorded_trace_gives_expected_events():
+    controller = VolumeController()
+    assert controller.replay(TRACE) == EXPECTED_EVENTS
+    # Levels 11 -> 44 -> 6 for the first gesture, 22 -> 32 after re-anchoring
+    assert controller.level == 32
+    # Replaying again starts from scratch
+    assert controller.replay(TRACE) == EXPECTED_EVENTS
+
+
+def test_dropped_events_are_sent_again():
+    backend = RecordingBackend()
+    now = {"t": 0.0}
+    handler = GestureActionHandler(backend, clock=lambda: now["t"])
+    submitted = []
+
+    def submit(name, func, *args):
+        # Every other volume job is dropped, as on a full executor queue
+        accepted = len(submitted) % 2 == 1
+        submitted.append(args)
+        if accepted:
+            func(*args)
+        return accepted
+
+    handler.executor.submit = submit
+    for now["t"], distance in TRACE[:len(PINCH)]:
+        handler.control_volume((distance, 0), (0, 0))
+        # The estimate only counts presses that were sent, from the level 11 anchor
+        sent = sum(presses if key == 'volumeup' else -presses for _, key, presses in backend.actions())
+        assert handler.volume_controller.level == 11 + sent
+    handler.close()
+
+    assert len(submitted) > len(backend.actions()) > 0
+    # The dropped steps were retried, so the pinch still ends at its level
+    assert handler.volume_controller.level == 6
+    assert [('press',) + event[1:] for event in handler.volume_controller.events] == backend.actions()
@@ -0,0 +1,97 @@
+from collections import deque
+
+import numpy as np
+
+
+class VolumeController:
+    """
+    Turns pinch distance into a minimal stream of volume key events
+
+    The smoothed pinch distance is mapped to a target level between 0 and
+    levels. The controller tracks the level it believes the system is at and,
+    each tick, emits only the net number of steps needed to reach the target,
+    as at most one batched (key, presses) event. Small differences inside the
+    deadband are ignored and sends are rate limited.
+
+    The level is relative: when the gesture starts (or resumes after
+    reset_timeout seconds without updates) the current pinch is taken to match
+    the current system volume. events keeps the last history sent events as
+    (time, key, presses) for inspection.
+    """
+
+    def __init__(self, min_distance=20, max_distance=200, levels=50, smoothing=0.3,
+                 deadband=2, max_steps_per_tick=10, min_interval=0.1, reset_timeout=0.5, history=256):
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.levels = levels
+        self.smoothing = smoothing
+        self.deadband = deadband
+        self.max_steps_per_tick = max_steps_per_tick
+        self.min_interval = min_interval
+        self.reset_timeout = reset_timeout
+
+        self.smoothed_distance = None
+        self.level = None
+        self.last_update = None
+        self.last_send = None
+        self.previous_send = None
+        # Bounded so a long live session does not grow it forever
+        self.events = deque(maxlen=history)
+
+    def reset(self):
+        """Forget the current gesture; the next update re-anchors the level"""
+        self.smoothed_distance = None
+        self.level = None
+        self.last_update = None
+        self.last_send = None
+
+    def distance_to_level(self, distance):
+        fraction = (distance - self.min_distance) / (self.max_distance - self.min_distance)
+        return int(round(float(np.clip(fraction, 0.0, 1.0)) * self.levels))
+
+    def update(self, distance, now):
+        """
+        Feed one pinch distance sample taken at time now
+        Returns a list with at most one (key, presses) event
+        """
+        if self.last_update is None or now - self.last_update > self.reset_timeout:
+            self.smoothed_distance = float(distance)
+            self.level = self.distance_to_level(distance)
+            self.last_update = now
+            self.last_send = None
+            return []
+
+        self.last_update = now
+        self.smoothed_distance += self.smoothing * (float(distance) - self.smoothed_distance)
+
+        delta = self.distance_to_level(self.smoothed_distance) - self.level
+        if abs(delta) < self.deadband:
+            return []
+        if self.last_send is not None and now - self.last_send < self.min_interval:
+            return []
+
+        steps = int(np.clip(delta, -self.max_steps_per_tick, self.max_steps_per_tick))
+        self.level += steps
+        self.previous_send = self.last_send
+        self.last_send = now
+        event = ('volumeup' if steps > 0 else 'volumedown', abs(steps))
+        self.events.append((now,) + event)
+        return [event]
+
+    def discard(self, key, presses):
+        """
+        Take back the event the last update returned when it could not be sent
+        The level goes back to what the system is still at, so a later update sends the steps again
+        """
+        self.level -= presses if key == 'volumeup' else -presses
+        self.last_send = self.previous_send
+        if self.events and self.events[-1][1:] == (key, presses):
+            self.events.pop()
+
+    def replay(self, trace):
+        """Run a recorded [(time, distance), ...] trace from a fresh state and return its events"""
+        self.reset()
+        events = []
+        for now, distance in trace:
+            events.extend((now,) + event for event in self.update(distance, now))
+        return events